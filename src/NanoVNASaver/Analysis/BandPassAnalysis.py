@@ -93,7 +93,7 @@ class BandPassAnalysis(Analysis):
 
         self.reset()
         s21 = self.app.data.s21
-        gains = [d.gain for d in s21]
+        gains = s21.gain.tolist()
 
         if (peak := self.find_center(gains)) < 0:
             return
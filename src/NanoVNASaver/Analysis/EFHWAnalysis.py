@@ -47,7 +47,7 @@ class EFHWAnalysis(ResonanceAnalysis):
     def do_resonance_analysis(self):
         s11 = self.app.data.s11
         maximums = sorted(
-            At.maxima([d.impedance().real for d in s11], threshold=500)
+            At.maxima(s11.impedance().real.tolist(), threshold=500)
         )
         extended_data = {}
         logger.info("TO DO: find near data")
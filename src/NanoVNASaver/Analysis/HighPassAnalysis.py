@@ -63,7 +63,7 @@ class HighPassAnalysis(Analysis):
 
         self.reset()
         s21 = self.app.data.s21
-        gains = [d.gain for d in s21]
+        gains = s21.gain.tolist()
 
         if (peak := self.find_level(gains)) < 0:
             return
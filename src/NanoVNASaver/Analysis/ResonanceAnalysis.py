@@ -98,7 +98,7 @@ class ResonanceAnalysis(Analysis):
             self.layout.removeRow(self.layout.rowCount() - 1)
 
         self.crossings = sorted(
-            set(At.zero_crossings([d.phase for d in self.app.data.s11]))
+            set(At.zero_crossings(self.app.data.s11.phase.tolist()))
         )
         logger.debug("Found %d sections ", len(self.crossings))
         if not self.crossings:
@@ -114,10 +114,10 @@ class SimplePeakSearchAnalysis(Analysis):
             self.button["gain"].setEnabled(True)
 
         if self.button["gain"].isChecked():
-            return ([d.gain for d in s21], format_gain)
+            return (s21.gain.tolist(), format_gain)
         if self.button["resistance"].isChecked():
-            return ([d.impedance().real for d in s11], format_resistance)
+            return (s11.impedance().real.tolist(), format_resistance)
         if self.button["reactance"].isChecked():
-            return ([d.impedance().imag for d in s11], format_resistance)
+            return (s11.impedance().imag.tolist(), format_resistance)
         # default
-        return ([d.vswr for d in s11], format_vswr)
+        return (s11.vswr.tolist(), format_vswr)
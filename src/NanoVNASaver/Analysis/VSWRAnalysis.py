@@ -65,7 +65,7 @@ class VSWRAnalysis(Analysis):
             return
         s11 = self.app.data.s11
 
-        data = [d.vswr for d in s11]
+        data = s11.vswr.tolist()
         threshold = self.input_vswr_limit.value()
 
         minima = sorted(At.minima(data, threshold), key=lambda i: data[i])[
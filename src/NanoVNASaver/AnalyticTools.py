@@ -18,6 +18,7 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import itertools as it
 import math
+from collections.abc import Sequence
 from typing import Callable
 
 import numpy as np
@@ -178,7 +179,7 @@ def dip_cut_offs(
 
 
 def calculate_rolloff(
-    s21: list[Datapoint], idx_1: int, idx_2: int
+    s21: Sequence[Datapoint], idx_1: int, idx_2: int
 ) -> tuple[float, float]:
     if idx_1 == idx_2:
         return (math.nan, math.nan)
@@ -16,15 +16,23 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import bisect
 import cmath
+import copy
+import hashlib
+import io
 import logging
 import math
 import os
 import re
-from collections import UserDict, defaultdict
-from dataclasses import dataclass, field
-from typing import Optional
+import threading
+import zipfile
+from collections import OrderedDict, UserDict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field, fields, replace
+from typing import Optional, TextIO
 
+import numpy as np
 from scipy.interpolate import interp1d
 
 from .RFTools import Datapoint
@@ -35,6 +43,14 @@ IDEAL_OPEN = complex(1, 0)
 IDEAL_LOAD = complex(0, 0)
 IDEAL_THROUGH = complex(1, 0)
 
+ERROR_TERMS = ("e00", "e11", "delta_e", "e10e01", "e30", "e22", "e10e32")
+# upper bound of frequency points kept in the per grid error term cache
+GRID_CACHE_POINTS = 2**18
+# format version of the binary .cal.npz sidecar
+CACHE_VERSION = 1
+# rough memory use of one frequency point of a calculated calibration
+CAL_POINT_BYTES = 1200
+
 RXP_CAL_HEADER = re.compile(
     r"""
     ^ \# \s+ Hz \s+
@@ -48,24 +64,76 @@ RXP_CAL_HEADER = re.compile(
     re.VERBOSE | re.IGNORECASE,
 )
 
-RXP_CAL_LINE = re.compile(
-    r"""
-    ^ \s*
-    (?P<freq>\d+) \s+
-    (?P<shortr>[-0-9Ee.]+) \s+ (?P<shorti>[-0-9Ee.]+) \s+
-    (?P<openr>[-0-9Ee.]+) \s+ (?P<openi>[-0-9Ee.]+) \s+
-    (?P<loadr>[-0-9Ee.]+) \s+ (?P<loadi>[-0-9Ee.]+)
-    ( \s+ (?P<throughr>[-0-9Ee.]+) \s+ (?P<throughi>[-0-9Ee.]+))?
-    ( \s+ (?P<thrureflr>[-0-9Ee.]+) \s+ (?P<thrurefli>[-0-9Ee.]+))?
-    ( \s+ (?P<isolationr>[-0-9Ee.]+) \s+ (?P<isolationi>[-0-9Ee.]+))?
-    \s* $
-""",
-    re.VERBOSE,
-)
+CAL_STANDARDS = ("short", "open", "load", "through", "thrurefl", "isolation")
+# standards stored by a cal data line, by its number of columns
+CAL_LINE_COLUMNS = {
+    7: ("short", "open", "load"),
+    9: ("short", "open", "load", "through"),
+    # short data without thrurefl
+    11: ("short", "open", "load", "through", "isolation"),
+    13: ("short", "open", "load", "through", "thrurefl", "isolation"),
+}
+CAL_VALUE_CHARS = b"-0123456789Ee."
 
 logger = logging.getLogger(__name__)
 
 
+def _is_cal_values(values: str) -> bool:
+    """check for characters not allowed in cal data values"""
+    try:
+        return not values.encode("ascii").translate(None, CAL_VALUE_CHARS)
+    except UnicodeEncodeError:
+        return False
+
+
+def read_cache(filename: str, source: str) -> dict[str, np.ndarray]:
+    """content of a binary calibration cache, empty if stale or unusable
+
+    source is the sha256 hex digest of the .cal file the cache belongs to.
+    """
+    try:
+        with np.load(filename, allow_pickle=False) as npz:
+            cache = {name: npz[name] for name in npz.files}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, zipfile.BadZipFile) as exc:
+        logger.warning("Unusable calibration cache %s: %s", filename, exc)
+        return {}
+    keys = {"version", "source", "element", "notes", "freq"}
+    if not keys.union(CAL_STANDARDS, ERROR_TERMS).issubset(cache):
+        logger.warning("Incomplete calibration cache %s", filename)
+        return {}
+    if cache["version"] != CACHE_VERSION or str(cache["source"]) != source:
+        logger.info("Calibration cache %s is outdated", filename)
+        return {}
+    return cache
+
+
+def write_cache(filename: str, cache: dict[str, np.ndarray]) -> None:
+    tmp_filename = f"{filename}.tmp"
+    try:
+        with open(tmp_filename, "wb") as npz:
+            np.savez(npz, **cache)
+        os.replace(tmp_filename, filename)
+    except OSError as exc:
+        logger.warning(
+            "Unable to write calibration cache %s: %s", filename, exc
+        )
+
+
+def _imag(x: np.ndarray) -> np.ndarray:
+    """complex array with imaginary part x and a real part of zero"""
+    z = np.zeros(np.shape(x), dtype=complex)
+    z.imag = x
+    return z
+
+
+def _complex(re: np.ndarray, im: np.ndarray) -> np.ndarray:
+    z = np.empty(np.shape(re), dtype=complex)
+    z.real, z.imag = re, im
+    return z
+
+
 def correct_delay(d: Datapoint, delay: float, reflect: bool = False):
     mult = 2 if reflect else 1
     corr_data = d.z * cmath.exp(
@@ -74,6 +142,147 @@ def correct_delay(d: Datapoint, delay: float, reflect: bool = False):
     return Datapoint(d.freq, corr_data.real, corr_data.imag)
 
 
+# phase rotations of the delay correction by grid, delay and multiplier,
+# the least recently used are dropped beyond DELAY_CACHE_POINTS points
+DELAY_CACHE_POINTS = 2**20
+_delay_rotations: OrderedDict[
+    tuple[int, int, int, float, int], tuple[np.ndarray, np.ndarray]
+] = OrderedDict()
+_delay_lock = threading.Lock()
+
+
+def _delay_rotation(freq: np.ndarray, delay: float, mult: int) -> np.ndarray:
+    if not len(freq):
+        return np.ones(0, dtype=complex)
+    # cheap key of a segment grid, the grid itself is compared on a hit
+    key = (int(freq[0]), int(freq[-1]), len(freq), delay, mult)
+    with _delay_lock:
+        entry = _delay_rotations.get(key)
+        if entry is not None and np.array_equal(entry[0], freq):
+            _delay_rotations.move_to_end(key)
+            return entry[1]
+    rotation = np.exp(1j * (2 * math.pi * freq * delay * -1 * mult))
+    rotation.flags.writeable = False
+    with _delay_lock:
+        _delay_rotations[key] = (freq.copy(), rotation)
+        _delay_rotations.move_to_end(key)
+        points = sum(len(grid) for grid, _ in _delay_rotations.values())
+        while points > DELAY_CACHE_POINTS and len(_delay_rotations) > 1:
+            grid, _ = _delay_rotations.popitem(last=False)[1]
+            points -= len(grid)
+    return rotation
+
+
+def correct_delay_array(
+    freq: np.ndarray, z: np.ndarray, delay: float, reflect: bool = False
+) -> np.ndarray:
+    """correct_delay for whole arrays of frequencies and values
+
+    The phase rotation is cached per frequency grid and delay, so
+    applying the same delay to every segment of every sweep costs a
+    multiplication.
+    """
+    freq = np.asarray(freq, dtype=np.int64)
+    return z * _delay_rotation(freq, delay, 2 if reflect else 1)
+
+
+class CorrectionTable:
+    """frequency dependent correction of S21, e.g. for fixture loss
+
+    Holds the transmission of whatever sits in the S21 path. Traces get
+    divided by it after resampling onto their frequency grid, the
+    resampled factors are cached per grid.
+    """
+
+    def __init__(
+        self, freq: Sequence[int], s21: Sequence[complex], source: str = ""
+    ) -> None:
+        freq = np.asarray(freq, dtype=np.int64)
+        order = np.argsort(freq, kind="stable")
+        self.freq = freq[order]
+        self.s21 = np.asarray(s21, dtype=complex)[order]
+        if not len(self.freq) or len(self.freq) != len(self.s21):
+            raise ValueError("Correction table needs matching, non empty data")
+        if not np.all(self.s21):
+            raise ValueError("Correction table has zero transmission values")
+        self.source = source
+        self._grid_factors: dict[bytes, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, filename: str) -> "CorrectionTable":
+        """read S21 from a Touchstone file or a CSV table
+
+        CSV rows are either frequency in Hz and loss in dB (positive,
+        like the attenuator setting) or frequency and the real and
+        imaginary part of S21.
+        """
+        if filename.lower().endswith(".csv"):
+            freq, s21 = read_correction_csv(filename)
+        else:
+            touchstone = Touchstone(filename)
+            touchstone.load()
+            freq, s21 = touchstone.s21.freq, touchstone.s21.z
+            if not len(freq):
+                raise ValueError(f"No S21 data in {filename}")
+        return cls(freq, s21, os.path.basename(filename))
+
+    def factors(self, freq: np.ndarray) -> np.ndarray:
+        """correction factors resampled onto the frequency grid freq"""
+        freq = np.asarray(freq, dtype=np.int64)
+        key = freq.tobytes()
+        cache = self._grid_factors
+        if (factors := cache.pop(key, None)) is None:
+            if len(freq) and (
+                freq[0] < self.freq[0] or freq[-1] > self.freq[-1]
+            ):
+                logger.warning(
+                    "Sweep exceeds correction table %s, using its edge values",
+                    self.source,
+                )
+            factors = 1 / _complex(
+                np.interp(freq, self.freq, self.s21.real),
+                np.interp(freq, self.freq, self.s21.imag),
+            )
+            factors.flags.writeable = False
+            while cache and (
+                sum(len(f) for f in cache.values()) + len(freq)
+                > GRID_CACHE_POINTS
+            ):
+                del cache[next(iter(cache))]
+        cache[key] = factors  # (re)insert as most recently used
+        return factors
+
+    def correct(self, freq: np.ndarray, z: np.ndarray) -> np.ndarray:
+        return z * self.factors(freq)
+
+
+def read_correction_csv(filename: str) -> tuple[np.ndarray, np.ndarray]:
+    """frequencies and S21 from a correction table in CSV format"""
+    rows: list[list[float]] = []
+    with open(filename, encoding="utf-8") as csvfile:
+        for i, line in enumerate(csvfile, 1):
+            line = line.strip()  # noqa: PLW2901
+            if not line or line[0] in "#!":
+                continue
+            try:
+                rows.append([float(v) for v in line.replace(",", " ").split()])
+            except ValueError:
+                if rows:
+                    raise ValueError(
+                        f"Illegal correction data. Line {i}: {line}"
+                    ) from None
+                continue  # column titles
+            if len(rows[-1]) not in {2, 3} or len(rows[-1]) != len(rows[0]):
+                raise ValueError(f"Illegal correction data. Line {i}: {line}")
+    if not rows:
+        raise ValueError(f"No correction data in {filename}")
+    values = np.array(rows)
+    freq = np.round(values[:, 0]).astype(np.int64)
+    if values.shape[1] == 2:
+        return freq, 10 ** (-values[:, 1] / 20) + 0j
+    return freq, _complex(values[:, 1], values[:, 2])
+
+
 @dataclass
 class CalData:
     # pylint: disable=too-many-instance-attributes
@@ -141,114 +350,209 @@ class CalElement:
     through_is_ideal: bool = True
     through_length: float = 0.0
 
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        # any parameter change invalidates the standard interpolants
+        super().__setattr__("_interp", {})
+
+    def fingerprint(self) -> str:
+        """hash over all parameters the standard models depend on"""
+        digest = hashlib.sha256()
+        for param in fields(self):
+            value = getattr(self, param.name)
+            if isinstance(value, Touchstone):
+                digest.update(value.s11.freq.tobytes())
+                digest.update(value.s11.z.tobytes())
+            else:
+                digest.update(f"{param.name}={value!r};".encode())
+        return digest.hexdigest()
+
+    def gamma_file(self, name: str, freq: np.ndarray) -> np.ndarray:
+        """s11 of the touchstone file of standard name at freq"""
+        if name not in self._interp:
+            s11 = getattr(self, f"{name}_touchstone").s11
+            self._interp[name] = interp1d(
+                s11.freq,
+                s11.z,
+                kind="slinear",
+                bounds_error=False,
+                fill_value=(s11.z[0], s11.z[-1]),
+            )
+        return self._interp[name](freq)
+
 
 class CalDataSet(UserDict):
+    """calibration data by frequency
+
+    Standards are to be changed by insert() only, which keeps the sorted
+    frequency index and the per standard counts up to date.
+    """
+
     def __init__(self) -> None:
         super().__init__()
         self.notes = ""
-        self.data: defaultdict[int, CalData] = defaultdict(CalData)
+        self.data: dict[int, CalData] = {}
+        self._reindex()
+
+    def __setitem__(self, key: int, item: CalData) -> None:
+        if key in self.data:
+            self._count(self.data[key], -1)
+        else:
+            bisect.insort(self._freqs, key)
+        self.data[key] = item
+        self._count(item, 1)
+
+    def __delitem__(self, key: int) -> None:
+        self._count(self.data.pop(key), -1)
+        del self._freqs[bisect.bisect_left(self._freqs, key)]
+
+    def _count(self, caldata: CalData, step: int) -> None:
+        for name in CAL_STANDARDS:
+            if getattr(caldata, name):
+                self._counts[name] += step
+
+    def _reindex(self) -> None:
+        """rebuild frequency index and counts after bulk changes"""
+        self._freqs: list[int] = sorted(self.data)
+        self._counts = dict.fromkeys(CAL_STANDARDS, 0)
+        for caldata in self.data.values():
+            self._count(caldata, 1)
 
     def __str__(self):
-        return (
-            (
-                "# Calibration data for NanoVNA-Saver\n"
-                + "\n".join([f"! {note}" for note in self.notes.splitlines()])
-                + "\n"
-                + "# Hz ShortR ShortI OpenR OpenI LoadR LoadI"
-                + (
-                    " ThroughR ThroughI ThrureflR"
-                    " ThrureflI IsolationR IsolationI\n"
-                    if self.complete2port()
-                    else "\n"
-                )
-                + "\n".join(
-                    [f"{self.data.get(freq)}" for freq in self.frequencies()]
-                )
-                + "\n"
-            )
-            if self.complete1port()
-            else ""
-        )
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
 
-    def _append_match(
-        self, m: re.Match, header: str, line_nr: int, line: str
-    ) -> None:
-        cal = m.groupdict()
-        columns = {col[:-1] for col in cal.keys() if cal[col] and col != "freq"}
-        if "through" in columns and header == "sol":
-            logger.warning(
-                "Through data with sol header. %i: %s", line_nr, line
-            )
-        # fix short data (without thrurefl)
-        if "thrurefl" in columns and "isolation" not in columns:
-            cal["isolationr"] = cal["thrureflr"]
-            cal["isolationi"] = cal["thrurefli"]
-            cal["thrureflr"], cal["thrurefli"] = None, None
-        for name in columns:
-            self.insert(
-                name,
-                Datapoint(
-                    int(cal["freq"]),
-                    float(cal[f"{name}r"]),
-                    float(cal[f"{name}i"]),
-                ),
+    def write(self, fp: TextIO) -> None:
+        """write the .cal file content row by row to fp"""
+        if not self.complete1port():
+            return
+        fp.write("# Calibration data for NanoVNA-Saver\n")
+        fp.write(
+            "\n".join([f"! {note}" for note in self.notes.splitlines()]) + "\n"
+        )
+        fp.write(
+            "# Hz ShortR ShortI OpenR OpenI LoadR LoadI"
+            + (
+                " ThroughR ThroughI ThrureflR ThrureflI IsolationR IsolationI\n"
+                if self.complete2port()
+                else "\n"
             )
+        )
+        fp.writelines(f"{caldata}\n" for caldata in self.values())
 
     def from_str(self, text: str) -> "CalDataSet":
         # reset data
         self.notes = ""
-        self.data = defaultdict(CalData)
+        self.data = {}
         header = ""
-        # parse text
+        lines: list[str] = []
+        widths: list[int] = []
+        # parse header and notes, the numeric body is converted in bulk
         for i, line in enumerate(text.splitlines(), 1):
             line = line.strip()  # noqa: PLW2901
 
             if line.startswith("!"):
                 self.notes += f"{line[2:]}\n"
                 continue
-            if m := RXP_CAL_HEADER.search(line):
-                if header:
-                    logger.warning(
-                        "Duplicate header in cal data. %i: %s", i, line
-                    )
-                header = "through" if m.group("through") else "sol"
+            if line.startswith("#"):
+                if m := RXP_CAL_HEADER.search(line):
+                    if header:
+                        logger.warning(
+                            "Duplicate header in cal data. %i: %s", i, line
+                        )
+                    header = "through" if m.group("through") else "sol"
                 continue
-            if not line or line.startswith("#"):
+            if not line:
                 continue
 
-            m = RXP_CAL_LINE.search(line)
-            if not m:
+            tokens = line.split()
+            if (
+                len(tokens) not in CAL_LINE_COLUMNS
+                or not tokens[0].isdecimal()
+                or not _is_cal_values("".join(tokens[1:]))
+            ):
                 logger.warning("Illegal caldata. Line %i: %s", i, line)
                 continue
             if not header:
                 logger.warning(
                     "Caldata without having read header: %i: %s", i, line
                 )
-            self._append_match(m, header, i, line)
+            elif header == "sol" and len(tokens) > 7:
+                logger.warning("Through data with sol header. %i: %s", i, line)
+            lines.append(line)
+            widths.append(len(tokens))
+        self._insert_lines(lines, widths)
+        self._reindex()
+        return self
+
+    def _insert_lines(self, lines: list[str], widths: list[int]) -> None:
+        freqs = np.zeros(len(lines), dtype=np.int64)
+        gammas = np.zeros((len(lines), len(CAL_STANDARDS)), dtype=complex)
+        for width, names in CAL_LINE_COLUMNS.items():
+            idx = [i for i, w in enumerate(widths) if w == width]
+            if not idx:
+                continue
+            values = np.loadtxt(
+                [lines[i] for i in idx], dtype=float, ndmin=2, comments=None
+            )
+            cols = [CAL_STANDARDS.index(name) for name in names]
+            freqs[idx] = values[:, 0]
+            gammas[np.ix_(idx, cols)] = _complex(
+                values[:, 1::2], values[:, 2::2]
+            )
+        # keep line order, later lines overwrite values of earlier ones
+        data = self.data
+        for freq, width, gamma in zip(
+            freqs.tolist(), widths, gammas.tolist(), strict=True
+        ):
+            if freq not in data:
+                data[freq] = CalData(*gamma, freq=freq)
+                continue
+            for name in CAL_LINE_COLUMNS[width]:
+                setattr(data[freq], name, gamma[CAL_STANDARDS.index(name)])
+
+    def from_arrays(
+        self, freq: np.ndarray, values: dict[str, np.ndarray]
+    ) -> "CalDataSet":
+        """set data from arrays of all standards and error terms"""
+        columns = [values[name].tolist() for name in CAL_STANDARDS]
+        terms = [values[name].tolist() for name in ERROR_TERMS]
+        self.data = {
+            row[0]: CalData(*row[1:7], row[0], *row[7:])
+            for row in zip(freq.tolist(), *columns, *terms, strict=True)
+        }
+        self._reindex()
         return self
 
+    def copy(self) -> "CalDataSet":
+        """copy with its own rows, index and counts"""
+        result = CalDataSet()
+        result.notes = self.notes
+        result.data = {
+            freq: replace(caldata) for freq, caldata in self.data.items()
+        }
+        result._freqs = self._freqs.copy()
+        result._counts = self._counts.copy()
+        return result
+
     def insert(self, name: str, dp: Datapoint):
-        if name not in {
-            "short",
-            "open",
-            "load",
-            "through",
-            "thrurefl",
-            "isolation",
-        }:
+        if name not in CAL_STANDARDS:
             raise KeyError(name)
         freq = dp.freq
-        setattr(self.data[freq], name, (dp.z))
-        self.data[freq].freq = freq
+        if (caldata := self.data.get(freq)) is None:
+            self[freq] = caldata = CalData(freq=freq)
+        self._counts[name] += bool(dp.z) - bool(getattr(caldata, name))
+        setattr(caldata, name, dp.z)
 
     def frequencies(self) -> list[int]:
-        return sorted(self.data.keys())
+        return self._freqs.copy()
 
     def freq_min(self) -> int:
-        return self.frequencies()[0] if self.frequencies() else 0
+        return self._freqs[0] if self._freqs else 0
 
     def freq_max(self) -> int:
-        return self.frequencies()[-1] if self.frequencies() else 0
+        return self._freqs[-1] if self._freqs else 0
 
     def get(self, key: int, default: Optional[CalData] = None) -> CalData:  # type: ignore[override]
         if default:
@@ -259,25 +563,28 @@ class CalDataSet(UserDict):
         yield from self.data.items()
 
     def values(self):
-        for freq in self.frequencies():
-            yield self.get(freq)
+        for freq in self._freqs:
+            yield self.data[freq]
+
+    def array(self, name: str) -> np.ndarray:
+        """values of name for all frequencies in ascending order"""
+        return np.array(
+            [getattr(self.data[freq], name) for freq in self._freqs],
+            dtype=complex,
+        )
 
     def size_of(self, name: str) -> int:
-        return len([True for val in self.data.values() if getattr(val, name)])
+        return self._counts[name]
+
+    def _complete(self, names: Sequence[str]) -> bool:
+        size = len(self.data)
+        return size > 0 and all(self._counts[name] == size for name in names)
 
     def complete1port(self) -> bool:
-        for val in self.data.values():
-            if not all((val.short, val.open, val.load)):
-                return False
-        return any(self.data)
+        return self._complete(("short", "open", "load"))
 
     def complete2port(self) -> bool:
-        if not self.complete1port():
-            return False
-        for val in self.data.values():
-            if not all((val.through, val.thrurefl, val.isolation)):
-                return False
-        return any(self.data)
+        return self._complete(CAL_STANDARDS)
 
 
 class Calibration:
@@ -287,15 +594,36 @@ class Calibration:
         self.cal_element = CalElement()
         self.interp = {}
         self.isCalculated = False
+        self.singular: list[int] = []
+        self._terms_freq = np.array([], dtype=np.int64)
+        self._terms: dict[str, np.ndarray] = {}
+        self._grid_terms: dict[bytes, dict[str, np.ndarray]] = {}
+        # the .cal file the dataset was loaded from, until it gets changed
+        self.filename = ""
+        # content of the binary cache of that file
+        self._cache_source = ""
+        self._cache: dict[str, np.ndarray] = {}
+        # fingerprint of the standards used for the current error terms
+        self._element = ""
 
         self.source = "Manual"
 
-    def insert(self, name: str, data: list[Datapoint]):
+    def insert(self, name: str, data: Sequence[Datapoint]):
+        # the dataset no longer matches the file it was loaded from
+        self.filename = ""
+        self._cache_source = ""
+        self._cache = {}
+        self._element = ""
         for dp in data:
             self.dataset.insert(name, dp)
 
+    @property
+    def checksum(self) -> str:
+        """sha256 of the unchanged .cal file the data was loaded from"""
+        return self._cache_source
+
     def size(self) -> int:
-        return len(self.dataset.frequencies())
+        return len(self.dataset)
 
     def data_size(self, name) -> int:
         return self.dataset.size_of(name)
@@ -306,14 +634,16 @@ class Calibration:
     def isValid2Port(self) -> bool:
         return self.dataset.complete2port()
 
-    def _calc_port_1(self, freq: int, cal: CalData):
+    def _calc_port_1(
+        self, freq: np.ndarray, terms: dict[str, np.ndarray]
+    ) -> np.ndarray:
         g1 = self.gamma_short(freq)
         g2 = self.gamma_open(freq)
         g3 = self.gamma_load(freq)
 
-        gm1 = cal.short
-        gm2 = cal.open
-        gm3 = cal.load
+        gm1 = self.dataset.array("short")
+        gm2 = self.dataset.array("open")
+        gm3 = self.dataset.array("load")
 
         denominator = (
             g1 * (g2 - g3) * gm1
@@ -321,7 +651,7 @@ class Calibration:
             - g2 * g3 * gm3
             - (g2 * gm2 - g3 * gm3) * g1
         )
-        cal.e00 = (
+        terms["e00"] = (
             -(
                 (g2 * gm3 - g3 * gm3) * g1 * gm2
                 - (g2 * g3 * gm2 - g2 * g3 * gm3 - (g3 * gm2 - g2 * gm3) * g1)
@@ -329,29 +659,36 @@ class Calibration:
             )
             / denominator
         )
-        cal.e11 = (
+        terms["e11"] = (
             (g2 - g3) * gm1 - g1 * (gm2 - gm3) + g3 * gm2 - g2 * gm3
         ) / denominator
-        cal.delta_e = (
+        terms["delta_e"] = (
             -(
                 (g1 * (gm2 - gm3) - g2 * gm2 + g3 * gm3) * gm1
                 + (g2 * gm3 - g3 * gm3) * gm2
             )
             / denominator
         )
+        return denominator == 0
 
-    def _calc_port_2(self, freq: int, cal: CalData):
+    def _calc_port_2(
+        self, freq: np.ndarray, terms: dict[str, np.ndarray]
+    ) -> np.ndarray:
         gt = self.gamma_through(freq)
 
-        gm4 = cal.through
-        gm5 = cal.thrurefl
-        gm6 = cal.isolation
-        gm7 = gm5 - cal.e00
+        gm4 = self.dataset.array("through")
+        gm5 = self.dataset.array("thrurefl")
+        gm6 = self.dataset.array("isolation")
+        gm7 = gm5 - terms["e00"]
 
-        cal.e30 = cal.isolation
-        cal.e10e01 = cal.e00 * cal.e11 - cal.delta_e
-        cal.e22 = gm7 / (gm7 * cal.e11 * gt**2 + cal.e10e01 * gt**2)
-        cal.e10e32 = (gm4 - gm6) * (1 - cal.e11 * cal.e22 * gt**2) / gt
+        terms["e30"] = gm6
+        terms["e10e01"] = terms["e00"] * terms["e11"] - terms["delta_e"]
+        denominator = gm7 * terms["e11"] * gt**2 + terms["e10e01"] * gt**2
+        terms["e22"] = gm7 / denominator
+        terms["e10e32"] = (
+            (gm4 - gm6) * (1 - terms["e11"] * terms["e22"] * gt**2) / gt
+        )
+        return (denominator == 0) | (gt == 0)
 
     def calc_corrections(self):
         if not self.isValid1Port():
@@ -360,39 +697,82 @@ class Calibration:
                 "All of short, open and load calibration steps"
                 "must be completed for calibration to be applied."
             )
-        logger.debug("Calculating calibration for %d points.", self.size())
+        element = self.cal_element.fingerprint()
+        if self.isCalculated and element == self._element:
+            logger.debug("Calibration is up to date.")
+            return
+        self._element = ""
+        if str(self._cache.get("element")) == element:
+            # the dataset rows already hold the cached terms
+            logger.debug("Using cached calibration of %s", self.filename)
+            terms = {name: self._cache[name] for name in ERROR_TERMS}
+        else:
+            terms = self._calc_terms()
+            for caldata, *values in zip(
+                self.dataset.values(),
+                *(terms[name].tolist() for name in ERROR_TERMS),
+                strict=True,
+            ):
+                for name, value in zip(ERROR_TERMS, values, strict=True):
+                    setattr(caldata, name, value)
+            if self.filename:
+                self._update_cache(element, terms)
+        self.singular = []
 
-        for freq, caldata in self.dataset.items():
-            try:
-                self._calc_port_1(freq, caldata)
-                if self.isValid2Port():
-                    self._calc_port_2(freq, caldata)
-            except ZeroDivisionError as exc:
-                self.isCalculated = False
-                logger.error(
-                    "Division error - did you use the same measurement"
-                    " for two of short, open and load?"
-                )
-                raise ValueError(
-                    f"Two of short, open and load returned the same"
-                    f" values at frequency {freq}Hz."
-                ) from exc
-
-        self.gen_interpolation()
+        self._set_terms(np.array(self.dataset.frequencies()), terms)
         self.isCalculated = True
+        self._element = element
         logger.debug("Calibration correctly calculated.")
 
-    def gamma_short(self, freq: int) -> complex:
+    def _calc_terms(self) -> dict[str, np.ndarray]:
+        logger.debug("Calculating calibration for %d points.", self.size())
+
+        freq = np.array(self.dataset.frequencies())
+        terms: dict[str, np.ndarray] = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            singular = self._calc_port_1(freq, terms)
+            if self.isValid2Port():
+                singular |= self._calc_port_2(freq, terms)
+        self.singular = freq[singular].tolist()
+        if self.singular:
+            self.isCalculated = False
+            logger.error(
+                "Division error - did you use the same measurement"
+                " for two of short, open and load?"
+            )
+            shown = ", ".join(f"{f}Hz" for f in self.singular[:5])
+            if len(self.singular) > 5:
+                shown += f" and {len(self.singular) - 5} more"
+            raise ValueError(
+                f"Two of short, open and load returned the same"
+                f" values at frequencies {shown}."
+            )
+        for name in ERROR_TERMS:
+            terms.setdefault(name, np.zeros(len(freq), dtype=complex))
+        return terms
+
+    def _update_cache(self, element: str, terms: dict[str, np.ndarray]):
+        cache = {
+            "version": np.array(CACHE_VERSION),
+            "source": np.array(self._cache_source),
+            "element": np.array(element),
+            "notes": np.array(self.dataset.notes),
+            "freq": np.array(self.dataset.frequencies(), dtype=np.int64),
+        }
+        cache.update((name, self.dataset.array(name)) for name in CAL_STANDARDS)
+        cache.update(terms)
+        write_cache(f"{self.filename}.npz", cache)
+        self._cache = cache
+
+    def gamma_short(self, freq: np.ndarray) -> np.ndarray:
+        freq = np.asarray(freq, dtype=float)
         if self.cal_element.short_state == "IDEAL":
-            return IDEAL_SHORT
+            return np.full(freq.shape, IDEAL_SHORT)
         if self.cal_element.short_state == "FILE":
-            self.cal_element.short_touchstone.gen_interpolation_s11()
-            dp = self.cal_element.short_touchstone.s_freq("11", freq)
-            return complex(dp.re, dp.im)
+            return self.cal_element.gamma_file("short", freq)
         logger.debug("Using short calibration set values.")
         cal_element = self.cal_element
-        Zsp = complex(
-            0.0,
+        Zsp = _imag(
             2.0
             * math.pi
             * freq
@@ -401,28 +781,24 @@ class Calibration:
                 + cal_element.short_l1 * freq
                 + cal_element.short_l2 * freq**2
                 + cal_element.short_l3 * freq**3
-            ),
+            )
         )
         # Referencing https://arxiv.org/pdf/1606.02446.pdf (18) - (21)
         return (
             (Zsp / 50.0 - 1.0)
             / (Zsp / 50.0 + 1.0)
-            * cmath.exp(
-                complex(0.0, -4.0 * math.pi * freq * cal_element.short_length)
-            )
+            * np.exp(_imag(-4.0 * math.pi * freq * cal_element.short_length))
         )
 
-    def gamma_open(self, freq: int) -> complex:
+    def gamma_open(self, freq: np.ndarray) -> np.ndarray:
+        freq = np.asarray(freq, dtype=float)
         if self.cal_element.open_state == "IDEAL":
-            return IDEAL_OPEN
+            return np.full(freq.shape, IDEAL_OPEN)
         if self.cal_element.open_state == "FILE":
-            self.cal_element.open_touchstone.gen_interpolation_s11()
-            dp = self.cal_element.open_touchstone.s_freq("11", freq)
-            return complex(dp.re, dp.im)
+            return self.cal_element.gamma_file("open", freq)
         logger.debug("Using open calibration set values.")
         cal_element = self.cal_element
-        Zop = complex(
-            0.0,
+        Zop = _imag(
             2.0
             * math.pi
             * freq
@@ -431,115 +807,109 @@ class Calibration:
                 + cal_element.open_c1 * freq
                 + cal_element.open_c2 * freq**2
                 + cal_element.open_c3 * freq**3
-            ),
+            )
         )
-        return ((1.0 - 50.0 * Zop) / (1.0 + 50.0 * Zop)) * cmath.exp(
-            complex(0.0, -4.0 * math.pi * freq * cal_element.open_length)
+        return ((1.0 - 50.0 * Zop) / (1.0 + 50.0 * Zop)) * np.exp(
+            _imag(-4.0 * math.pi * freq * cal_element.open_length)
         )
 
-    def gamma_load(self, freq: int) -> complex:
+    def gamma_load(self, freq: np.ndarray) -> np.ndarray:
+        freq = np.asarray(freq, dtype=float)
         if self.cal_element.load_state == "IDEAL":
-            return IDEAL_LOAD
+            return np.full(freq.shape, IDEAL_LOAD)
         if self.cal_element.load_state == "FILE":
-            self.cal_element.load_touchstone.gen_interpolation_s11()
-            dp = self.cal_element.load_touchstone.s_freq("11", freq)
-            return complex(dp.re, dp.im)
+            return self.cal_element.gamma_file("load", freq)
         logger.debug("Using load calibration set values.")
         cal_element = self.cal_element
-        Zl = complex(cal_element.load_r, 0.0)
+        Zl = np.full(freq.shape, complex(cal_element.load_r, 0.0))
         if cal_element.load_c > 0.0:
-            Zl = cal_element.load_r / complex(
-                1.0,
-                2.0 * cal_element.load_r * math.pi * freq * cal_element.load_c,
+            Zl = cal_element.load_r / (
+                1.0
+                + _imag(
+                    2.0
+                    * cal_element.load_r
+                    * math.pi
+                    * freq
+                    * cal_element.load_c
+                )
             )
         if cal_element.load_l > 0.0:
-            Zl = Zl + complex(0.0, 2 * math.pi * freq * cal_element.load_l)
+            Zl = Zl + _imag(2 * math.pi * freq * cal_element.load_l)
         return (
             (Zl / 50.0 - 1.0)
             / (Zl / 50.0 + 1.0)
-            * cmath.exp(
-                complex(0.0, -4 * math.pi * freq * cal_element.load_length)
-            )
+            * np.exp(_imag(-4 * math.pi * freq * cal_element.load_length))
         )
 
-    def gamma_through(self, freq: int) -> complex:
+    def gamma_through(self, freq: np.ndarray) -> np.ndarray:
+        freq = np.asarray(freq, dtype=float)
         if self.cal_element.through_is_ideal:
-            return IDEAL_THROUGH
+            return np.full(freq.shape, IDEAL_THROUGH)
         logger.debug("Using through calibration set values.")
         cal_element = self.cal_element
-        return cmath.exp(
-            complex(0.0, -2.0 * math.pi * cal_element.through_length * freq)
-        )
+        return np.exp(_imag(-2.0 * math.pi * cal_element.through_length * freq))
 
     def gen_interpolation(self):
-        (freq, e00, e11, delta_e, e10e01, e30, e22, e10e32) = zip(
-            *[
-                (
-                    c.freq,
-                    c.e00,
-                    c.e11,
-                    c.delta_e,
-                    c.e10e01,
-                    c.e30,
-                    c.e22,
-                    c.e10e32,
+        caldata = list(self.dataset.values())
+        self._set_terms(
+            np.array([c.freq for c in caldata], dtype=np.int64),
+            {
+                name: np.array(
+                    [getattr(c, name) for c in caldata], dtype=complex
                 )
-                for c in self.dataset.values()
-            ],
-            strict=False,
+                for name in ERROR_TERMS
+            },
         )
 
+    def _set_terms(self, freq: np.ndarray, terms: dict[str, np.ndarray]):
         self.interp = {
-            "e00": interp1d(
-                freq,
-                e00,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(e00[0], e00[-1]),
-            ),
-            "e11": interp1d(
-                freq,
-                e11,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(e11[0], e11[-1]),
-            ),
-            "delta_e": interp1d(
-                freq,
-                delta_e,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(delta_e[0], delta_e[-1]),
-            ),
-            "e10e01": interp1d(
+            name: interp1d(
                 freq,
-                e10e01,
+                values,
                 kind="slinear",
                 bounds_error=False,
-                fill_value=(e10e01[0], e10e01[-1]),
-            ),
-            "e30": interp1d(
-                freq,
-                e30,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(e30[0], e30[-1]),
-            ),
-            "e22": interp1d(
-                freq,
-                e22,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(e22[0], e22[-1]),
-            ),
-            "e10e32": interp1d(
-                freq,
-                e10e32,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(e10e32[0], e10e32[-1]),
-            ),
+                fill_value=(values[0], values[-1]),
+            )
+            for name, values in terms.items()
         }
+        self._terms_freq = freq
+        self._terms = terms
+        self._grid_terms = {}
+
+    def error_terms(self, freq: np.ndarray) -> dict[str, np.ndarray]:
+        """error terms interpolated to the frequency grid freq
+
+        Results are cached per grid until the calibration is recalculated,
+        so repeated sweeps over the same range skip the interpolation.
+        Grids made of calibration frequencies only are looked up directly.
+        """
+        freq = np.asarray(freq, dtype=np.int64)
+        key = freq.tobytes()
+        cache = self._grid_terms
+        if (terms := cache.pop(key, None)) is None:
+            terms = self._lookup_terms(freq)
+            if terms is None:
+                terms = {name: self.interp[name](freq) for name in ERROR_TERMS}
+            for values in terms.values():
+                values.flags.writeable = False
+            while cache and (
+                sum(len(t["e00"]) for t in cache.values()) + len(freq)
+                > GRID_CACHE_POINTS
+            ):
+                del cache[next(iter(cache))]
+        cache[key] = terms  # (re)insert as most recently used
+        return terms
+
+    def _lookup_terms(self, freq: np.ndarray) -> dict[str, np.ndarray] | None:
+        if np.array_equal(freq, self._terms_freq):
+            return dict(self._terms)
+        if not len(self._terms_freq):
+            return None
+        idx = np.searchsorted(self._terms_freq, freq)
+        np.clip(idx, 0, len(self._terms_freq) - 1, out=idx)
+        if not np.array_equal(self._terms_freq[idx], freq):
+            return None
+        return {name: values[idx] for name, values in self._terms.items()}
 
     def correct11(self, dp: Datapoint):
         i = self.interp
@@ -557,15 +927,152 @@ class Calibration:
         )
         return Datapoint(dp.freq, s21.real, s21.imag)
 
+    def correct11_array(self, freq: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """correct11 for a whole segment of s11 values at once"""
+        t = self.error_terms(freq)
+        return (z - t["e00"]) / ((z * t["e11"]) - t["delta_e"])
+
+    def correct21_array(
+        self, freq: np.ndarray, z: np.ndarray, z11: np.ndarray
+    ) -> np.ndarray:
+        """correct21 for a whole segment of s21 values and their raw s11"""
+        t = self.error_terms(freq)
+        s21 = (z - t["e30"]) / t["e10e32"]
+        return s21 * (t["e10e01"] / (t["e11"] * z11 - t["delta_e"]))
+
     def save(self, filename: str):
         self.dataset.notes = "\n".join(self.notes)
         if not self.isValid1Port():
             raise ValueError("Not a valid calibration")
         with open(filename, mode="w", encoding="utf-8") as calfile:
-            calfile.write(str(self.dataset))
+            self.dataset.write(calfile)
 
     def load(self, filename):
         self.source = os.path.basename(filename)
-        with open(filename, encoding="utf-8") as calfile:
-            self.dataset = CalDataSet().from_str(calfile.read())
-            self.notes = self.dataset.notes.splitlines()
+        with open(filename, "rb") as calfile:
+            content = calfile.read()
+        self.filename = filename
+        self._cache_source = hashlib.sha256(content).hexdigest()
+        self._cache = read_cache(f"{filename}.npz", self._cache_source)
+        self._element = ""
+        if self._cache:
+            logger.debug("Loading calibration from %s.npz", filename)
+            self.dataset = CalDataSet().from_arrays(
+                self._cache["freq"], self._cache
+            )
+            self.dataset.notes = str(self._cache["notes"])
+        else:
+            self.dataset = CalDataSet().from_str(content.decode("utf-8"))
+        self.notes = self.dataset.notes.splitlines()
+
+    def copy(self) -> "Calibration":
+        """copy with its own standards and measured data
+
+        The copy can be changed and calculated in the background while
+        this one is still used for corrections.
+        """
+        result = copy.copy(self)
+        result.dataset = self.dataset.copy()
+        result.cal_element = replace(self.cal_element)
+        result.notes = list(self.notes)
+        result._grid_terms = dict(self._grid_terms)
+        return result
+
+    def nbytes(self) -> int:
+        """estimated memory use"""
+        return len(self.dataset.data) * CAL_POINT_BYTES + sum(
+            values.nbytes
+            for terms in self._grid_terms.values()
+            for values in terms.values()
+        )
+
+
+class CalibrationLibrary:
+    """keeps the last used, fully calculated calibrations in memory
+
+    Entries are dropped least recently used first if there are more than
+    size of them or they use more than max_bytes in total.
+    """
+
+    def __init__(self, size: int = 8, max_bytes: int = 256 * 2**20) -> None:
+        self.size = size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[
+            tuple[str, str], tuple[tuple[int, int], Calibration]
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, filename: str, cal_element: CalElement) -> Calibration:
+        """calibration of filename calculated for the given standards
+
+        Returns a copy, changes to it don't alter the library entry.
+        Raises ValueError if the calibration can't be calculated.
+        """
+        filename = os.path.abspath(filename)
+        key = (filename, cal_element.fingerprint())
+        stat = os.stat(filename)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_current(key, stamp, *entry):
+                logger.debug("Using calibration %s from library", filename)
+                self._entries.move_to_end(key)
+                return entry[1].copy()
+        calibration = Calibration()
+        calibration.load(filename)
+        calibration.cal_element = replace(cal_element)
+        calibration.calc_corrections()
+        with self._lock:
+            self._entries[key] = (stamp, calibration)
+            self._entries.move_to_end(key)
+            self._evict()
+        return calibration.copy()
+
+    def preload(
+        self, filenames: Iterable[str], cal_element: CalElement
+    ) -> threading.Thread:
+        """load and calculate calibrations in a background thread"""
+        cal_element = replace(cal_element)
+        filenames = list(filenames)
+
+        def run():
+            for filename in filenames:
+                try:
+                    self.get(filename, cal_element)
+                except (OSError, ValueError) as exc:
+                    logger.warning("Unable to preload %s: %s", filename, exc)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _is_current(
+        key: tuple[str, str],
+        stamp: tuple[int, int],
+        entry_stamp: tuple[int, int],
+        calibration: Calibration,
+    ) -> bool:
+        # the file or the calibration itself may have been changed since
+        return (
+            stamp == entry_stamp
+            and calibration.isCalculated
+            and calibration.filename == key[0]
+            and calibration.cal_element.fingerprint() == key[1]
+        )
+
+    def _evict(self) -> None:
+        total = sum(cal.nbytes() for _, cal in self._entries.values())
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.size or total > self.max_bytes
+        ):
+            (filename, _), (_, calibration) = self._entries.popitem(last=False)
+            total -= calibration.nbytes()
+            logger.debug("Dropped calibration %s from library", filename)
@@ -21,7 +21,7 @@ import math
 
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
+from ..RFTools import SweepData, as_sweep_data
 from .Chart import Chart
 from .LogMag import LogMagChart
 
@@ -32,30 +32,30 @@ class CombinedLogMagChart(LogMagChart):
     def __init__(self, name: str = ""):
         super().__init__(name)
 
-        self.data11: list[Datapoint] = []
-        self.data21: list[Datapoint] = []
+        self.data11: SweepData = SweepData()
+        self.data21: SweepData = SweepData()
 
-        self.reference11: list[Datapoint] = []
-        self.reference21: list[Datapoint] = []
+        self.reference11: SweepData = SweepData()
+        self.reference21: SweepData = SweepData()
 
     def setCombinedData(self, data11, data21):
-        self.data11 = data11
-        self.data21 = data21
+        self.data11 = as_sweep_data(data11)
+        self.data21 = as_sweep_data(data21)
         self.update()
 
     def setCombinedReference(self, data11, data21):
-        self.reference11 = data11
-        self.reference21 = data21
+        self.reference11 = as_sweep_data(data11)
+        self.reference21 = as_sweep_data(data21)
         self.update()
 
     def resetReference(self):
-        self.reference11 = []
-        self.reference21 = []
+        self.reference11 = SweepData()
+        self.reference21 = SweepData()
         self.update()
 
     def resetDisplayLimits(self):
-        self.reference11 = []
-        self.reference21 = []
+        self.reference11 = SweepData()
+        self.reference21 = SweepData()
         self.update()
 
     def drawChart(self, qp: QtGui.QPainter):
@@ -158,25 +158,10 @@ class CombinedLogMagChart(LogMagChart):
             maxValue = self.maxDisplayValue
             minValue = self.minDisplayValue
         else:
-            # Find scaling
-            min_val = 100.0
-            max_val = -100.0
-            for d in self.data11 + self.data21:
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                max_val = max(max_val, logmag)
-                min_val = min(min_val, logmag)
-
-            for d in self.reference11 + self.reference21:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                max_val = max(max_val, logmag)
-                min_val = min(min_val, logmag)
-
+            min_val, max_val = self.logmag_range(
+                (self.data11, self.data21),
+                (self.reference11, self.reference21),
+            )
             minValue = 10 * math.floor(min_val / 10)
             maxValue = 10 * math.ceil(max_val / 10)
 
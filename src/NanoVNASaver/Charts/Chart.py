@@ -26,7 +26,7 @@ from PySide6.QtGui import QAction, QColor, QColorConstants
 
 from ..Defaults import get_app_config
 from ..Marker.Widget import Marker
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData, as_sweep_data
 
 logger = logging.getLogger(__name__)
 
@@ -137,8 +137,8 @@ class Chart(QtWidgets.QWidget):
 
         self.draggedMarker: Marker | None = None
 
-        self.data: list[Datapoint] = []
-        self.reference: list[Datapoint] = []
+        self.data: SweepData = SweepData()
+        self.reference: SweepData = SweepData()
 
         self.markers: list[Marker] = []
         self.swrMarkers: set[float] = set()
@@ -156,15 +156,15 @@ class Chart(QtWidgets.QWidget):
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
 
     def setReference(self, data) -> None:
-        self.reference = data
+        self.reference = as_sweep_data(data)
         self.update()
 
     def resetReference(self) -> None:
-        self.reference = []
+        self.reference = SweepData()
         self.update()
 
     def setData(self, data) -> None:
-        self.data = data
+        self.data = as_sweep_data(data)
         self.update()
 
     def setMarkers(self, markers) -> None:
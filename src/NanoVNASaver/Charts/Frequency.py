@@ -18,6 +18,7 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import math
+from collections.abc import Callable
 
 import numpy as np
 from PySide6 import QtGui, QtWidgets
@@ -30,7 +31,7 @@ from ..Formatting import (
     parse_frequency,
     parse_value,
 )
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from ..SITools import Format, Value
 from .Chart import Chart, ChartPosition
 
@@ -369,16 +370,26 @@ class FrequencyChart(Chart):
             )
         return math.floor(self.width() / 2)
 
-    def getYPosition(self, d: Datapoint) -> int:
+    def getYPositionFromValue(self, value: float) -> int:
         try:
             return self.topMargin + round(
-                (self.maxValue - self.value_function(d))
-                / self.span
-                * self.dim.height
+                (self.maxValue - value) / self.span * self.dim.height
             )
         except ValueError:
             return self.topMargin
 
+    def getYPosition(self, d: Datapoint) -> int:
+        return self.getYPositionFromValue(self.value_function(d))
+
+    def getYPositions(self, data: SweepData) -> list[int]:
+        """y positions of a whole trace
+
+        value_function gets the SweepData, so the values come from the
+        sweep's cache instead of being calculated point by point.
+        """
+        values = np.broadcast_to(self.value_function(data), (len(data),))
+        return [self.getYPositionFromValue(v) for v in values.tolist()]
+
     def frequencyAtPosition(self, x, limit=True) -> int:
         """
         Calculates the frequency at a given X-position
@@ -496,7 +507,7 @@ class FrequencyChart(Chart):
             self.drawDragbog(qp)
         qp.end()
 
-    def _data_oob(self, data: list[Datapoint]) -> bool:
+    def _data_oob(self, data: SweepData) -> bool:
         return data[0].freq > self.fstop or self.data[-1].freq < self.fstart
 
     def _check_frequency_boundaries(self, qp: QtGui.QPainter):
@@ -603,18 +614,26 @@ class FrequencyChart(Chart):
         max_value = self.maxDisplayValue / 10e11
         if self.fixedValues:
             return (min_value, max_value)
-        for d in self.data:
-            val = self.value_function(d)
-            min_value = min(min_value, val)
-            max_value = max(max_value, val)
-        for d in self.reference:  # Also check min/max for the reference sweep
-            if d.freq < self.fstart or d.freq > self.fstop:
-                continue
-            val = self.value_function(d)
-            min_value = min(min_value, val)
-            max_value = max(max_value, val)
+        values = np.concatenate(
+            (
+                np.broadcast_to(
+                    self.value_function(self.data), (len(self.data),)
+                ),
+                # Also check min/max for the reference sweep
+                self.in_span(self.reference, self.value_function),
+            )
+        )
+        values = values[~np.isnan(values)]
+        if values.size:
+            min_value = min(min_value, float(values.min()))
+            max_value = max(max_value, float(values.max()))
         return (min_value, max_value)
 
+    def in_span(self, data: SweepData, value_function: Callable) -> np.ndarray:
+        """values of the points of data within the displayed span"""
+        mask = (data.freq >= self.fstart) & (data.freq <= self.fstop)
+        return np.broadcast_to(value_function(data), (len(data),))[mask]
+
     def drawFrequencyTicks(self, qp):
         fspan = self.fstop - self.fstart
         qp.setPen(Chart.color.text)
@@ -679,27 +698,28 @@ class FrequencyChart(Chart):
     def drawData(
         self,
         qp: QtGui.QPainter,
-        data: list[Datapoint],
+        data: SweepData,
         color: QtGui.QColor,
         y_function=None,
     ):
         if y_function is None:
-            y_function = self.getYPosition
+            y_pos = self.getYPositions(data)
+        else:
+            y_pos = [y_function(d) for d in data]
+        x_pos = [self.getXPosition(d) for d in data]
         pen = QtGui.QPen(color)
         pen.setWidth(self.dim.point)
         line_pen = QtGui.QPen(color)
         line_pen.setWidth(self.dim.line)
         qp.setPen(pen)
-        for i, d in enumerate(data):
-            x = self.getXPosition(d)
-            y = y_function(d)
+        for i, (x, y) in enumerate(zip(x_pos, y_pos, strict=True)):
             if y is None:
                 continue
             if self.isPlotable(x, y):
                 qp.drawPoint(int(x), int(y))
             if self.flag.draw_lines and i > 0:
-                prevx = self.getXPosition(data[i - 1])
-                prevy = y_function(data[i - 1])
+                prevx = x_pos[i - 1]
+                prevy = y_pos[i - 1]
                 if prevy is None:
                     continue
                 qp.setPen(line_pen)
@@ -717,14 +737,17 @@ class FrequencyChart(Chart):
     def drawMarkers(self, qp, data=None, y_function=None):
         if data is None:
             data = self.data
-        if y_function is None:
-            y_function = self.getYPosition
+        y_pos = self.getYPositions(data) if y_function is None else []
         highlighter = QtGui.QPen(QtGui.QColor(20, 0, 255))
         highlighter.setWidth(1)
         for m in self.markers:
             if m.location != -1 and m.location < len(data):
                 x = self.getXPosition(data[m.location])
-                y = y_function(data[m.location])
+                y = (
+                    y_pos[m.location]
+                    if y_function is None
+                    else y_function(data[m.location])
+                )
                 if self.isPlotable(x, y):
                     self.drawMarker(
                         x, y, qp, m.color, self.markers.index(m) + 1
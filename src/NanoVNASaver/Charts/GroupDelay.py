@@ -22,7 +22,7 @@ import math
 import numpy as np
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData, as_sweep_data
 from .Chart import Chart
 from .Frequency import FrequencyChart
 
@@ -60,11 +60,11 @@ class GroupDelayChart(FrequencyChart):
         return new_chart
 
     def setReference(self, data):
-        self.reference = data
+        self.reference = as_sweep_data(data)
         self.calculateGroupDelay()
 
     def setData(self, data):
-        self.data = data
+        self.data = as_sweep_data(data)
         self.calculateGroupDelay()
 
     def calculateGroupDelay(self):
@@ -72,28 +72,21 @@ class GroupDelayChart(FrequencyChart):
         self.groupDelayReference = self.calc_data(self.reference)
         self.update()
 
-    def calc_data(self, data: list[Datapoint]):
+    def calc_data(self, data: SweepData):
         data_len = len(data)
         if data_len <= 1:
             return []
-        unwrapped = np.degrees(np.unwrap([d.phase for d in data]))
-        delay_data = []
-        for i, d in enumerate(data):
-            # TODO: Replace with call to RFTools.groupDelay
-            if i == 0:
-                phase_change = unwrapped[1] - unwrapped[i]
-                freq_change = data[1].freq - d.freq
-            elif i == data_len - 1:
-                phase_change = unwrapped[-1] - unwrapped[-2]
-                freq_change = d.freq - data[-2].freq
-            else:
-                phase_change = unwrapped[i + 1] - unwrapped[i - 1]
-                freq_change = data[i + 1].freq - data[i - 1].freq
+        unwrapped = np.degrees(data.unwrappedPhase)
+        idx = np.arange(data_len)
+        idx0 = np.maximum(idx - 1, 0)
+        idx1 = np.minimum(idx + 1, data_len - 1)
+        phase_change = unwrapped[idx1] - unwrapped[idx0]
+        freq_change = data.freq[idx1] - data.freq[idx0]
+        with np.errstate(divide="ignore", invalid="ignore"):
             delay = (-phase_change / (freq_change * 360)) * 10e8
-            if not self.reflective:
-                delay /= 2
-            delay_data.append(delay)
-        return delay_data
+        if not self.reflective:
+            delay /= 2
+        return delay.tolist()
 
     def drawValues(self, qp: QtGui.QPainter):
         if len(self.data) == 0 and len(self.reference) == 0:
@@ -168,7 +161,7 @@ class GroupDelayChart(FrequencyChart):
         self,
         qp: QtGui.QPainter,
         color: QtGui.QColor,
-        data: list[Datapoint],
+        data: SweepData,
         delay: list[Datapoint],
     ):
         pen = QtGui.QPen(color)
@@ -207,6 +200,14 @@ class GroupDelayChart(FrequencyChart):
                 delay = 0
         return self.getYPositionFromDelay(delay)
 
+    def getYPositions(self, data: SweepData) -> list[int]:
+        delay = (
+            self.groupDelayReference
+            if data is self.reference
+            else self.groupDelay
+        )
+        return [self.getYPositionFromDelay(d) for d in delay]
+
     def getYPositionFromDelay(self, delay: Datapoint) -> int:
         return self.topMargin + int(
             (self.maxDelay - delay) / self.span * self.dim.height
@@ -18,11 +18,13 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import math
+from collections.abc import Iterable
 from dataclasses import dataclass
 
+import numpy as np
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from ..SITools import log_floor_125
 from .Chart import Chart
 from .Frequency import FrequencyChart
@@ -61,6 +63,7 @@ class LogMagChart(FrequencyChart):
         self.span: float = 1.0
 
         self.isInverted: bool = False
+        self.value_function = self.logMag
 
     def drawValues(self, qp: QtGui.QPainter) -> None:
         if len(self.data) == 0 and len(self.reference) == 0:
@@ -83,31 +86,29 @@ class LogMagChart(FrequencyChart):
             maxValue = self.maxDisplayValue
             minValue = self.minDisplayValue
         else:
-            # Find scaling
-            min_val = 100.0
-            max_val = -100.0
-            for d in self.data:
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                max_val = max(max_val, logmag)
-                min_val = min(min_val, logmag)
-
-            # Also check min/max for the reference sweep
-            for d in self.reference:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                logmag = self.logMag(d)
-                if math.isinf(logmag):
-                    continue
-                max_val = max(max_val, logmag)
-                min_val = min(min_val, logmag)
+            min_val, max_val = self.logmag_range(
+                (self.data,), (self.reference,)
+            )
             minValue = 10 * math.floor(min_val / 10)
             maxValue = 10 * math.ceil(max_val / 10)
 
         self.minValue = minValue
         self.maxValue = maxValue
 
+    def logmag_range(
+        self, traces: Iterable[SweepData], references: Iterable[SweepData]
+    ) -> tuple[float, float]:
+        """min and max of the finite values, at least -100 to 100 dB"""
+        values = np.concatenate(
+            [self.logMag(data) for data in traces]
+            # Also check min/max for the reference sweep
+            + [self.in_span(data, self.logMag) for data in references]
+        )
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return 100.0, -100.0
+        return min(100.0, float(values.min())), max(-100.0, float(values.max()))
+
     def draw_grid(self, qp):
         self.span = (self.maxValue - self.minValue) or 0.01
         ticks = span2ticks(self.span, self.minValue)
@@ -156,12 +157,11 @@ class LogMagChart(FrequencyChart):
             qp.drawLine(self.leftMargin, y, self.leftMargin + self.dim.width, y)
             qp.drawText(self.leftMargin + 3, y - 1, f"VSWR: {vswr}")
 
-    def getYPosition(self, d: Datapoint) -> int:
-        logMag = self.logMag(d)
-        if math.isinf(logMag):
+    def getYPositionFromValue(self, logmag: float) -> int:
+        if math.isinf(logmag):
             return self.topMargin
         return self.topMargin + int(
-            (self.maxValue - logMag) / self.span * self.dim.height
+            (self.maxValue - logmag) / self.span * self.dim.height
         )
 
     def valueAtPosition(self, y) -> list[float]:
@@ -169,7 +169,7 @@ class LogMagChart(FrequencyChart):
         val = -1 * ((absy / self.dim.height * self.span) - self.maxValue)
         return [val]
 
-    def logMag(self, p: Datapoint) -> float:
+    def logMag(self, p: Datapoint | SweepData) -> float | np.ndarray:
         return -p.gain if self.isInverted else p.gain
 
     def copy(self) -> "LogMagChart":
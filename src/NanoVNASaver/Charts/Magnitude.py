@@ -19,9 +19,10 @@
 import logging
 import math
 
+import numpy as np
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from .Chart import Chart
 from .Frequency import FrequencyChart
 
@@ -39,6 +40,7 @@ class MagnitudeChart(FrequencyChart):
         self.y_action_automatic.setChecked(False)
 
         self.minValue = 0
+        self.value_function = self.magnitude
 
     def drawValues(self, qp: QtGui.QPainter):
         if not self.data and not self.reference:
@@ -57,16 +59,17 @@ class MagnitudeChart(FrequencyChart):
             # Find scaling
             min_value = 100
             max_value = 0
-            for d in self.data:
-                mag = self.magnitude(d)
-                max_value = max(max_value, mag)
-                min_value = min(min_value, mag)
-            # Also check min/max for the reference sweep
-            for d in self.reference:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                max_value = max(max_value, mag)
-                min_value = min(min_value, mag)
+            mags = np.concatenate(
+                (
+                    self.magnitude(self.data),
+                    # Also check min/max for the reference sweep
+                    self.in_span(self.reference, self.magnitude),
+                )
+            )
+            mags = mags[~np.isnan(mags)]
+            if mags.size:
+                max_value = max(max_value, float(mags.max()))
+                min_value = min(min_value, float(mags.min()))
             min_value = 10 * math.floor(min_value / 10)
             max_value = 10 * math.ceil(max_value / 10)
 
@@ -120,8 +123,7 @@ class MagnitudeChart(FrequencyChart):
         self.drawData(qp, self.reference, Chart.color.reference)
         self.drawMarkers(qp)
 
-    def getYPosition(self, d: Datapoint) -> int:
-        mag = self.magnitude(d)
+    def getYPositionFromValue(self, mag: float) -> int:
         return self.topMargin + int(
             (self.maxValue - mag) / self.span * self.dim.height
         )
@@ -132,8 +134,8 @@ class MagnitudeChart(FrequencyChart):
         return [val]
 
     @staticmethod
-    def magnitude(p: Datapoint) -> float:
-        return math.sqrt(p.re**2 + p.im**2)
+    def magnitude(p: Datapoint | SweepData) -> float | np.ndarray:
+        return np.sqrt(p.re**2 + p.im**2)
 
     def copy(self):
         new_chart = super().copy()
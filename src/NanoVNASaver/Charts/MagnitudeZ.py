@@ -19,9 +19,10 @@
 import logging
 import math
 
+import numpy as np
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from ..SITools import Format, Value, round_ceil, round_floor
 from .Chart import Chart
 from .Frequency import FrequencyChart
@@ -40,6 +41,7 @@ class MagnitudeZChart(FrequencyChart):
         self.minValue = 0
         self.maxValue = 1
         self.span = 1
+        self.value_function = self.magnitude
 
     def drawValues(self, qp: QtGui.QPainter):
         if not self.data and not self.reference:
@@ -62,21 +64,17 @@ class MagnitudeZChart(FrequencyChart):
             # Find scaling
             self.minValue = 100
             self.maxValue = 0
-            for d in self.data:
-                mag = self.magnitude(d)
-                if math.isinf(mag):  # Avoid infinite scales
-                    continue
-                self.maxValue = max(self.maxValue, mag)
-                self.minValue = min(self.minValue, mag)
-            # Also check min/max for the reference sweep
-            for d in self.reference:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                mag = self.magnitude(d)
-                if math.isinf(mag):  # Avoid infinite scales
-                    continue
-                self.maxValue = max(self.maxValue, mag)
-                self.minValue = min(self.minValue, mag)
+            mags = np.concatenate(
+                (
+                    self.magnitude(self.data),
+                    # Also check min/max for the reference sweep
+                    self.in_span(self.reference, self.magnitude),
+                )
+            )
+            mags = mags[np.isfinite(mags)]  # Avoid infinite scales
+            if mags.size:
+                self.maxValue = max(self.maxValue, float(mags.max()))
+                self.minValue = min(self.minValue, float(mags.min()))
 
             self.minValue = round_floor(self.minValue, 2)
             if self.logarithmicY and self.minValue <= 0:
@@ -110,8 +108,7 @@ class MagnitudeZChart(FrequencyChart):
         self.drawData(qp, self.reference, Chart.color.reference)
         self.drawMarkers(qp)
 
-    def getYPosition(self, d: Datapoint) -> int:
-        mag = self.magnitude(d)
+    def getYPositionFromValue(self, mag: float) -> int:
         if self.logarithmicY and mag == 0:
             return self.topMargin - self.dim.height
         if math.isfinite(mag):
@@ -138,9 +135,13 @@ class MagnitudeZChart(FrequencyChart):
             val = self.maxValue - (absy / self.dim.height * self.span)
         return [val]
 
+    def magnitude(self, p: Datapoint | SweepData) -> float | np.ndarray:
+        imp = self.impedance(p)
+        return np.hypot(imp.real, imp.imag)
+
     @staticmethod
-    def magnitude(p: Datapoint) -> float:
-        return abs(p.impedance())
+    def impedance(p: Datapoint | SweepData) -> complex | np.ndarray:
+        return p.impedance()
 
     def logarithmicYAllowed(self) -> bool:
         return True
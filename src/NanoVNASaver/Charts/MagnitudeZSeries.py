@@ -18,7 +18,9 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 
-from ..RFTools import Datapoint
+import numpy as np
+
+from ..RFTools import Datapoint, SweepData
 from .MagnitudeZ import MagnitudeZChart
 
 logger = logging.getLogger(__name__)
@@ -26,5 +28,5 @@ logger = logging.getLogger(__name__)
 
 class MagnitudeZSeriesChart(MagnitudeZChart):
     @staticmethod
-    def magnitude(p: Datapoint) -> float:
-        return abs(p.seriesImpedance())
+    def impedance(p: Datapoint | SweepData) -> complex | np.ndarray:
+        return p.seriesImpedance()
@@ -19,10 +19,11 @@
 import logging
 import math
 
+import numpy as np
 from PySide6 import QtGui
 
 from ..Marker.Widget import Marker
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from ..SITools import Format, Value
 from .Chart import Chart
 from .Frequency import FrequencyChart
@@ -94,27 +95,20 @@ class PermeabilityChart(FrequencyChart):
         else:
             min_val = 1000.0
             max_val = -1000.0
-            for d in self.data:
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                re = re * 10e6 / d.freq
-                im = im * 10e6 / d.freq
-                max_val = max(max_val, re)
-                max_val = max(max_val, im)
-                min_val = min(min_val, re)
-                min_val = min(min_val, im)
             # Also check min/max for the reference sweep
-            for d in self.reference:
-                if d.freq < self.fstart or d.freq > self.fstop:
-                    continue
-                imp = d.impedance()
-                re, im = imp.real, imp.imag
-                re = re * 10e6 / d.freq
-                im = im * 10e6 / d.freq
-                max_val = max(max_val, re)
-                max_val = max(max_val, im)
-                min_val = min(min_val, re)
-                min_val = min(min_val, im)
+            in_span = (self.reference.freq >= self.fstart) & (
+                self.reference.freq <= self.fstop
+            )
+            values = np.concatenate(
+                (
+                    *self.permeability(self.data),
+                    *(v[in_span] for v in self.permeability(self.reference)),
+                )
+            )
+            values = values[~np.isnan(values)]
+            if values.size:
+                max_val = max(max_val, float(values.max()))
+                min_val = min(min_val, float(values.min()))
 
         if self.logarithmicY:
             min_val = max(0.01, min_val)
@@ -165,10 +159,10 @@ class PermeabilityChart(FrequencyChart):
         secondary_pen.setWidth(self.dim.point)
         line_pen.setWidth(self.dim.line)
 
-        for i, data in enumerate(self.data):
-            x = self.getXPosition(data)
-            y_re = self.getReYPosition(data)
-            y_im = self.getImYPosition(data)
+        x_pos, re_pos, im_pos = self._positions(self.data)
+        for i, (x, y_re, y_im) in enumerate(
+            zip(x_pos, re_pos, im_pos, strict=True)
+        ):
             qp.setPen(primary_pen)
             if self.isPlotable(x, y_re):
                 qp.drawPoint(x, y_re)
@@ -176,9 +170,9 @@ class PermeabilityChart(FrequencyChart):
             if self.isPlotable(x, y_im):
                 qp.drawPoint(x, y_im)
             if self.flag.draw_lines and i > 0:
-                prev_x = self.getXPosition(self.data[i - 1])
-                prev_y_re = self.getReYPosition(self.data[i - 1])
-                prev_y_im = self.getImYPosition(self.data[i - 1])
+                prev_x = x_pos[i - 1]
+                prev_y_re = re_pos[i - 1]
+                prev_y_im = im_pos[i - 1]
 
                 # Real part first
                 line_pen.setColor(Chart.color.sweep)
@@ -233,12 +227,13 @@ class PermeabilityChart(FrequencyChart):
                 14,
             )
 
+        x_pos, re_pos, im_pos = self._positions(self.reference)
         for i, reference in enumerate(self.reference):
             if reference.freq < self.fstart or reference.freq > self.fstop:
                 continue
-            x = self.getXPosition(reference)
-            y_re = self.getReYPosition(reference)
-            y_im = self.getImYPosition(reference)
+            x = x_pos[i]
+            y_re = re_pos[i]
+            y_im = im_pos[i]
             qp.setPen(primary_pen)
             if self.isPlotable(x, y_re):
                 qp.drawPoint(x, y_re)
@@ -246,9 +241,9 @@ class PermeabilityChart(FrequencyChart):
             if self.isPlotable(x, y_im):
                 qp.drawPoint(x, y_im)
             if self.flag.draw_lines and i > 0:
-                prev_x = self.getXPosition(self.reference[i - 1])
-                prev_y_re = self.getReYPosition(self.reference[i - 1])
-                prev_y_im = self.getImYPosition(self.reference[i - 1])
+                prev_x = x_pos[i - 1]
+                prev_y_re = re_pos[i - 1]
+                prev_y_im = im_pos[i - 1]
 
                 line_pen.setColor(Chart.color.reference)
                 qp.setPen(line_pen)
@@ -290,38 +285,45 @@ class PermeabilityChart(FrequencyChart):
                 self.drawMarker(x, y_re, qp, m.color, self.markers.index(m) + 1)
                 self.drawMarker(x, y_im, qp, m.color, self.markers.index(m) + 1)
 
-    def getImYPosition(self, d: Datapoint) -> int:
-        im = d.impedance().imag
-        im = im * 10e6 / d.freq
-        if self.logarithmicY:
-            min_val = self.max - self.span
-            if self.max > 0 and min_val > 0 and im > 0:
-                span = math.log(self.max) - math.log(min_val)
-            else:
-                return -1
-            return int(
-                self.topMargin
-                + (math.log(self.max) - math.log(im)) / span * self.dim.height
-            )
-        return int(
-            self.topMargin + (self.max - im) / self.span * self.dim.height
+    @staticmethod
+    def permeability(
+        p: Datapoint | SweepData,
+    ) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
+        imp = p.impedance()
+        return imp.real * 10e6 / p.freq, imp.imag * 10e6 / p.freq
+
+    def _positions(
+        self, data: SweepData
+    ) -> tuple[list[int], list[int], list[int]]:
+        """x, real and imaginary y positions of a whole trace"""
+        re, im = self.permeability(data)
+        return (
+            [self.getXPosition(d) for d in data],
+            [self.getYPositionFromValue(v) for v in re.tolist()],
+            [self.getYPositionFromValue(v) for v in im.tolist()],
         )
 
+    def getImYPosition(self, d: Datapoint) -> int:
+        return self.getYPositionFromValue(self.permeability(d)[1])
+
     def getReYPosition(self, d: Datapoint) -> int:
-        re = d.impedance().real
-        re = re * 10e6 / d.freq
+        return self.getYPositionFromValue(self.permeability(d)[0])
+
+    def getYPositionFromValue(self, value: float) -> int:
         if self.logarithmicY:
             min_val = self.max - self.span
-            if self.max > 0 and min_val > 0 and re > 0:
+            if self.max > 0 and min_val > 0 and value > 0:
                 span = math.log(self.max) - math.log(min_val)
             else:
                 return -1
             return int(
                 self.topMargin
-                + (math.log(self.max) - math.log(re)) / span * self.dim.height
+                + (math.log(self.max) - math.log(value))
+                / span
+                * self.dim.height
             )
         return int(
-            self.topMargin + (self.max - re) / self.span * self.dim.height
+            self.topMargin + (self.max - value) / self.span * self.dim.height
         )
 
     def valueAtPosition(self, y) -> list[float]:
@@ -22,7 +22,7 @@ import math
 import numpy as np
 from PySide6.QtGui import QAction, QPainter, QPen
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from .Chart import Chart
 from .Frequency import FrequencyChart
 
@@ -67,10 +67,8 @@ class PhaseChart(FrequencyChart):
             return
 
         if self.unwrap:
-            rawData = [d.phase for d in self.data]
-            rawReference = [d.phase for d in self.reference]
-            self.unwrappedData = np.degrees(np.unwrap(rawData))
-            self.unwrappedReference = np.degrees(np.unwrap(rawReference))
+            self.unwrappedData = np.degrees(self.data.unwrappedPhase)
+            self.unwrappedReference = np.degrees(self.reference.unwrappedPhase)
 
         if self.fixedValues:
             minAngle = self.minDisplayValue
@@ -143,6 +141,16 @@ class PhaseChart(FrequencyChart):
             angle = self.unwrappedReference[self.reference.index(d)]
         else:
             angle = math.degrees(d.phase)
+        return self.getYPositionFromValue(angle)
+
+    def getYPositions(self, data: SweepData) -> list[int]:
+        phase = data.unwrappedPhase if self.unwrap else data.phase
+        return [
+            self.getYPositionFromValue(angle)
+            for angle in np.degrees(phase).tolist()
+        ]
+
+    def getYPositionFromValue(self, angle: float) -> int:
         return self.topMargin + int(
             (self.maxAngle - angle) / self.span * self.dim.height
         )
@@ -19,9 +19,9 @@
 import logging
 import math
 
+import numpy as np
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
 from .Chart import Chart
 from .Frequency import FrequencyChart
 
@@ -41,6 +41,7 @@ class QualityFactorChart(FrequencyChart):
         self.span = 0
         self.minDisplayValue = 0
         self.maxDisplayValue = 100
+        self.value_function = lambda x: x.qFactor()
 
     def drawChart(self, qp: QtGui.QPainter):
         ROUND_ONE_DIGIT = 20
@@ -52,9 +53,11 @@ class QualityFactorChart(FrequencyChart):
             maxQ = float(self.maxDisplayValue)
         else:
             maxQ = 0.0
-            for d in self.data:
-                Q = d.qFactor()
-                maxQ = max(maxQ, Q)
+            if self.data:
+                q = self.data.qFactor()
+                q = q[~np.isnan(q)]
+                if q.size:
+                    maxQ = max(maxQ, float(q.max()))
             scale = 0
             if maxQ > 0:
                 scale = max(scale, math.floor(math.log10(maxQ)))
@@ -124,10 +127,9 @@ class QualityFactorChart(FrequencyChart):
         self.drawData(qp, self.reference, Chart.color.reference)
         self.drawMarkers(qp)
 
-    def getYPosition(self, d: Datapoint) -> int:
-        Q = d.qFactor()
+    def getYPositionFromValue(self, q: float) -> int:
         return self.topMargin + int(
-            (self.maxQ - Q) / self.span * self.dim.height
+            (self.maxQ - q) / self.span * self.dim.height
         )
 
     def valueAtPosition(self, y) -> list[float]:
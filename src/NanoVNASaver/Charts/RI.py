@@ -19,11 +19,12 @@
 import logging
 import math
 
+import numpy as np
 from PySide6 import QtGui, QtWidgets
 
 from ..Formatting import format_frequency_chart
 from ..Marker.Widget import Marker
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from ..SITools import Format, Value
 from .Chart import Chart, ChartPosition
 from .Frequency import FrequencyChart
@@ -172,13 +173,25 @@ class RealImaginaryChart(FrequencyChart):
             y,
         )
 
+    def _positions(
+        self, data: SweepData
+    ) -> tuple[list[int], list[int], list[int]]:
+        """x, real and imaginary y positions of a whole trace"""
+        values = np.broadcast_to(self.value(data), (len(data),))
+        return (
+            [self.getXPosition(d) for d in data],
+            [self.getReYPositionFromValue(re) for re in values.real.tolist()],
+            [self.getImYPositionFromValue(im) for im in values.imag.tolist()],
+        )
+
     def _draw_ref_data(self, qp, line_pen, primary_pen, secondary_pen):
+        x_pos, re_pos, im_pos = self._positions(self.reference)
         for i, reference in enumerate(self.reference):
             if reference.freq < self.fstart or reference.freq > self.fstop:
                 continue
-            x = self.getXPosition(reference)
-            y_re = self.getReYPosition(reference)
-            y_im = self.getImYPosition(reference)
+            x = x_pos[i]
+            y_re = re_pos[i]
+            y_im = im_pos[i]
             qp.setPen(primary_pen)
             if self.isPlotable(x, y_re):
                 qp.drawPoint(x, y_re)
@@ -186,9 +199,9 @@ class RealImaginaryChart(FrequencyChart):
             if self.isPlotable(x, y_im):
                 qp.drawPoint(x, y_im)
             if self.flag.draw_lines and i > 0:
-                prev_x = self.getXPosition(self.reference[i - 1])
-                prev_y_re = self.getReYPosition(self.reference[i - 1])
-                prev_y_im = self.getImYPosition(self.reference[i - 1])
+                prev_x = x_pos[i - 1]
+                prev_y_re = re_pos[i - 1]
+                prev_y_im = im_pos[i - 1]
 
                 # Real part first
                 line_pen.setColor(Chart.color.reference)
@@ -199,10 +212,10 @@ class RealImaginaryChart(FrequencyChart):
                 self._draw_line(qp, line_pen, (x, y_im), (prev_x, prev_y_im))
 
     def _draw_data(self, qp, line_pen, primary_pen, secondary_pen) -> None:
-        for i, data in enumerate(self.data):
-            x = self.getXPosition(data)
-            y_re = self.getReYPosition(data)
-            y_im = self.getImYPosition(data)
+        x_pos, re_pos, im_pos = self._positions(self.data)
+        for i, (x, y_re, y_im) in enumerate(
+            zip(x_pos, re_pos, im_pos, strict=True)
+        ):
             qp.setPen(primary_pen)
             if self.isPlotable(x, y_re):
                 qp.drawPoint(x, y_re)
@@ -210,9 +223,9 @@ class RealImaginaryChart(FrequencyChart):
             if self.isPlotable(x, y_im):
                 qp.drawPoint(x, y_im)
             if self.flag.draw_lines and i > 0:
-                prev_x = self.getXPosition(self.data[i - 1])
-                prev_y_re = self.getReYPosition(self.data[i - 1])
-                prev_y_im = self.getImYPosition(self.data[i - 1])
+                prev_x = x_pos[i - 1]
+                prev_y_re = re_pos[i - 1]
+                prev_y_im = im_pos[i - 1]
 
                 # Real part first
                 line_pen.setColor(Chart.color.sweep)
@@ -281,27 +294,22 @@ class RealImaginaryChart(FrequencyChart):
         min_imag = 1000
         max_real = 0
         max_imag = -1000
-        for d in self.data:
-            imp = self.value(d)
-            re, im = imp.real, imp.imag
-            if math.isinf(re):  # Avoid infinite scales
-                continue
-            max_real = max(max_real, re)
-            min_real = min(min_real, re)
-            max_imag = max(max_imag, im)
-            min_imag = min(min_imag, im)
-        # Also check min/max for the reference sweep
-        for d in self.reference:
-            if d.freq < self.fstart or d.freq > self.fstop:
-                continue
-            imp = self.value(d)
-            re, im = imp.real, imp.imag
-            if math.isinf(re):  # Avoid infinite scales
-                continue
-            max_real = max(max_real, re)
-            min_real = min(min_real, re)
-            max_imag = max(max_imag, im)
-            min_imag = min(min_imag, im)
+        values = np.concatenate(
+            (
+                np.broadcast_to(self.value(self.data), (len(self.data),)),
+                # Also check min/max for the reference sweep
+                self.in_span(self.reference, self.value),
+            )
+        )
+        values = values[~np.isinf(values.real)]  # Avoid infinite scales
+        re = values.real[~np.isnan(values.real)]
+        im = values.imag[~np.isnan(values.imag)]
+        if re.size:
+            max_real = max(max_real, float(re.max()))
+            min_real = min(min_real, float(re.min()))
+        if im.size:
+            max_imag = max(max_imag, float(im.max()))
+            min_imag = min(min_imag, float(im.min()))
         # Always have at least 8 numbered horizontal lines
         max_real = math.ceil(max_real)
         min_real = math.floor(min_real)
@@ -342,14 +350,18 @@ class RealImaginaryChart(FrequencyChart):
         return min_imag, max_imag
 
     def getImYPosition(self, d: Datapoint) -> int:
-        im = self.value(d).imag
+        return self.getImYPositionFromValue(self.value(d).imag)
+
+    def getReYPosition(self, d: Datapoint) -> int:
+        return self.getReYPositionFromValue(self.value(d).real)
+
+    def getImYPositionFromValue(self, im: float) -> int:
         return int(
             self.topMargin
             + (self.max_imag - im) / self.span_imag * self.dim.height
         )
 
-    def getReYPosition(self, d: Datapoint) -> int:
-        re = self.value(d).real
+    def getReYPositionFromValue(self, re: float) -> int:
         return int(
             self.topMargin
             + (self.max_real - re) / self.span_real * self.dim.height
@@ -21,7 +21,7 @@ import math
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from .Chart import Chart
 
 logger = logging.getLogger(__name__)
@@ -57,7 +57,7 @@ class SquareChart(Chart):
         self,
         qp: QtGui.QPainter,
         color: QtGui.QColor,
-        data: list[Datapoint],
+        data: SweepData,
         fstart: int = 0,
         fstop: int = 0,
     ):
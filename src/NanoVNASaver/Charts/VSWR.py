@@ -21,7 +21,6 @@ import math
 
 from PySide6 import QtGui
 
-from ..RFTools import Datapoint
 from .Chart import Chart
 from .Frequency import FrequencyChart
 
@@ -37,6 +36,7 @@ class VSWRChart(FrequencyChart):
 
         self.maxVSWR = 3
         self.span = 2
+        self.value_function = lambda x: x.vswr
 
     def logarithmicYAllowed(self) -> bool:
         return True
@@ -68,9 +68,8 @@ class VSWRChart(FrequencyChart):
         else:
             minVSWR = 1.0
             maxVSWR = 3.0
-            for d in self.data:
-                vswr = d.vswr
-                maxVSWR = max(vswr, maxVSWR)
+            if self.data:
+                maxVSWR = max(float(self.data.vswr.max()), maxVSWR)
             try:
                 maxVSWR = min(self.maxDisplayValue, math.ceil(maxVSWR))
             except OverflowError:
@@ -161,9 +160,6 @@ class VSWRChart(FrequencyChart):
         except OverflowError:
             return self.topMargin
 
-    def getYPosition(self, d: Datapoint) -> int:
-        return self.getYPositionFromValue(d.vswr)
-
     def valueAtPosition(self, y) -> list[float]:
         absy = y - self.topMargin
         if self.logarithmicY:
@@ -131,6 +131,12 @@ class SweepConfig:
     segments: str = "1"
 
 
+@dataclass
+class CalibrationConfig:
+    library_size: int = 8
+    library_memory: int = 256  # MiB
+
+
 @dataclass
 class AppConfig:
     gui: GuiConfig = field(default_factory=GuiConfig)
@@ -141,6 +147,7 @@ class AppConfig:
     chart_colors: ChartColorsConfig = field(default_factory=ChartColorsConfig)
     markers: MarkersConfig = field(default_factory=MarkersConfig)
     sweep_settings: SweepConfig = field(default_factory=SweepConfig)
+    calibration: CalibrationConfig = field(default_factory=CalibrationConfig)
 
 
 # noinspection PyDataclass
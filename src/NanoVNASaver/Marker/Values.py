@@ -19,7 +19,7 @@
 
 from typing import NamedTuple
 
-from ..RFTools import Datapoint
+from ..RFTools import SweepData, as_sweep_data
 
 
 class Label(NamedTuple):
@@ -73,26 +73,16 @@ class Value:
 
     def __init__(self) -> None:
         self.freq: int = 0
-        self.s11: list[Datapoint] = []
-        self.s21: list[Datapoint] = []
+        self.s11: SweepData = SweepData()
+        self.s21: SweepData = SweepData()
 
-    def store(self, index: int, s11: list[Datapoint], s21: list[Datapoint]):
-        # handle boundaries
-        if index == 0:
-            index = 1
-            s11 = [s11[0], *s11]
-            if s21:
-                s21 = [s21[0], *s21]
-        if index == len(s11):
-            s11 += [
-                s11[-1],
-            ]
-            if s21:
-                s21 += [
-                    s21[-1],
-                ]
-
-        self.freq = s11[1].freq
-        self.s11 = s11[index - 1 : index + 2]
-        if s21:
-            self.s21 = s21[index - 1 : index + 2]
+    def store(self, index: int, s11: SweepData, s21: SweepData):
+        # handle boundaries by repeating the outermost points
+        s11 = as_sweep_data(s11)
+        s21 = as_sweep_data(s21)
+        last = len(s11) - 1
+        idx = [max(index - 1, 0), min(index, last), min(index + 1, last)]
+        self.s11 = s11[idx]
+        self.freq = self.s11[1].freq
+        if len(s21) == len(s11):
+            self.s21 = s21[idx]
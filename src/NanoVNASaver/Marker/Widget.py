@@ -276,7 +276,7 @@ class Marker(QtCore.QObject, Value):
     def getRow(self):
         return QtWidgets.QLabel(self.name), self.layout
 
-    def findLocation(self, data: list[RFTools.Datapoint]):
+    def findLocation(self, data: RFTools.SweepData):
         self.location = -1
         self.frequencyInput.nextFrequency = -1
         self.frequencyInput.previousFrequency = -1
@@ -320,9 +320,7 @@ class Marker(QtCore.QObject, Value):
         for v in self.label.values():
             v.setText("")
 
-    def updateLabels(
-        self, s11: list[RFTools.Datapoint], s21: list[RFTools.Datapoint]
-    ):
+    def updateLabels(self, s11: RFTools.SweepData, s21: RFTools.SweepData):
         if not s11:
             return
         if self.location == -1:  # initial position
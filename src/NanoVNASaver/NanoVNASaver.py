@@ -21,12 +21,13 @@ import logging
 import threading
 from time import localtime, strftime
 
+import numpy as np
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import QObject
 from PySide6.QtWidgets import QWidget
 
 from .About import VERSION
-from .Calibration import Calibration
+from .Calibration import Calibration, CalibrationLibrary, CorrectionTable
 from .Charts import (
     CapacitanceChart,
     CombinedLogMagChart,
@@ -60,14 +61,16 @@ from .Hardware.Hardware import Interface
 from .Hardware.VNA import VNA
 from .Marker.Delta import DeltaMarker
 from .Marker.Widget import Marker
-from .RFTools import corr_att_data
+from .RFTools import SweepData, as_sweep_data
 from .Settings.Bands import BandsModel
 from .Settings.Sweep import Sweep
+from .SweepArchive import SweepArchive
 from .SweepWorker import SweepWorker
 from .Touchstone import Touchstone
 from .Windows import (
     AboutWindow,
     AnalysisWindow,
+    BatchImportWindow,
     CalibrationWindow,
     DeviceSettingsWindow,
     DisplaySettingsWindow,
@@ -94,6 +97,7 @@ class NanoVNASaver(QWidget):
         super().__init__()
         self.communicate = Communicate()
         self.s21att = 0.0
+        self.s21table: CorrectionTable | None = None
         self.setWindowIcon(get_window_icon())
         # TODO APP_SETTINGS should be used instead app.setting\
         self.settings: AppSettings = APP_SETTINGS
@@ -118,6 +122,10 @@ class NanoVNASaver(QWidget):
         self.vna: VNA = VNA(self.interface)
 
         self.calibration: Calibration = Calibration()
+        self.calibration_library = CalibrationLibrary(
+            app_config.calibration.library_size,
+            app_config.calibration.library_memory * 2**20,
+        )
         self.sweep_control = SweepControl(self)
         self.marker_control = MarkerControl(self)
         self.serial_control = SerialControl(self)
@@ -132,6 +140,8 @@ class NanoVNASaver(QWidget):
         self.ref_data: Touchstone = Touchstone()
 
         self.sweepSource = ""
+        # completed sweeps are recorded here while set
+        self.sweep_archive: SweepArchive | None = None
         self.referenceSource = ""
 
         logger.debug("Building user interface")
@@ -263,6 +273,7 @@ class NanoVNASaver(QWidget):
         self.windows: dict[str, QtWidgets.QDialog] = {
             "about": AboutWindow(self),
             "analysis": AnalysisWindow(self),
+            "batch": BatchImportWindow(self),
             "calibration": CalibrationWindow(self),
             "device_settings": DeviceSettingsWindow(self),
             "file": FilesWindow(self),
@@ -488,12 +499,12 @@ class NanoVNASaver(QWidget):
         # https://www.pythonguis.com/tutorials/multithreading-pyqt6-applications-qthreadpool/
         # self.threadpool.start(self.worker)
 
-    def saveData(self, data, data21, source=None):
+    def saveData(
+        self, data: SweepData, data21: SweepData, source: str | None = None
+    ):
         with self.dataLock:
             self.data.s11 = data
             self.data.s21 = data21
-            if self.s21att > 0:
-                self.data.s21 = corr_att_data(self.data.s21, self.s21att)
         if source is not None:
             self.sweepSource = source
         else:
@@ -532,9 +543,11 @@ class NanoVNASaver(QWidget):
                     self.delta_marker.updateLabels()
 
     def dataUpdated(self):
+        # saveData only ever replaces the containers, so holding
+        # references is enough for a consistent snapshot
         with self.dataLock:
-            s11 = self.data.s11[:]
-            s21 = self.data.s21[:]
+            s11 = self.data.s11
+            s21 = self.data.s21
 
         for m in self.markers:
             m.resetLabels()
@@ -553,26 +566,26 @@ class NanoVNASaver(QWidget):
         self.windows["tdr"].updateTDR()
 
         if s11:
-            min_vswr = min(s11, key=lambda data: data.vswr)
+            idx = int(np.argmin(s11.vswr))
             self.s11_min_swr_label.setText(
-                f"{format_vswr(min_vswr.vswr)} @"
-                f" {format_frequency(min_vswr.freq)}"
+                f"{format_vswr(float(s11.vswr[idx]))} @"
+                f" {format_frequency(int(s11.freq[idx]))}"
             )
-            self.s11_min_rl_label.setText(format_gain(min_vswr.gain))
+            self.s11_min_rl_label.setText(format_gain(float(s11.gain[idx])))
         else:
             self.s11_min_swr_label.setText("")
             self.s11_min_rl_label.setText("")
 
         if s21:
-            min_gain = min(s21, key=lambda data: data.gain)
-            max_gain = max(s21, key=lambda data: data.gain)
+            min_idx = int(np.argmin(s21.gain))
+            max_idx = int(np.argmax(s21.gain))
             self.s21_min_gain_label.setText(
-                f"{format_gain(min_gain.gain)}"
-                f" @ {format_frequency(min_gain.freq)}"
+                f"{format_gain(float(s21.gain[min_idx]))}"
+                f" @ {format_frequency(int(s21.freq[min_idx]))}"
             )
             self.s21_max_gain_label.setText(
-                f"{format_gain(max_gain.gain)}"
-                f" @ {format_frequency(max_gain.freq)}"
+                f"{format_gain(float(s21.gain[max_idx]))}"
+                f" @ {format_frequency(int(s21.freq[max_idx]))}"
             )
         else:
             self.s21_min_gain_label.setText("")
@@ -590,8 +603,10 @@ class NanoVNASaver(QWidget):
     def setReference(self, s11=None, s21=None, source=None):
         if not s11:
             with self.dataLock:
-                s11 = self.data.s11[:]
-                s21 = self.data.s21[:]
+                s11 = self.data.s11
+                s21 = self.data.s21
+        s11 = as_sweep_data(s11)
+        s21 = as_sweep_data(s21 if s21 is not None else ())
 
         self.ref_data.s11 = s11
         for c in self.s11charts:
@@ -0,0 +1,205 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+from collections.abc import Iterable
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .Calibration import correct_delay_array
+
+if TYPE_CHECKING:
+    from .NanoVNASaver.NanoVNASaver import NanoVNASaver as vna_app
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """a post processing step for the S11 and S21 values of a segment
+
+    Stages take arrays and return new ones, the input arrays must not
+    be modified. The time spent in each stage gets recorded.
+    """
+
+    name = ""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.last: float = 0.0  # seconds spent in the latest run
+        self.total: float = 0.0
+        self.runs: int = 0
+
+    def __call__(
+        self, freq: np.ndarray, s11: np.ndarray, s21: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        start = perf_counter()
+        s11, s21 = self.process(freq, s11, s21)
+        self.last = perf_counter() - start
+        self.total += self.last
+        self.runs += 1
+        return s11, s21
+
+    def process(
+        self, freq: np.ndarray, s11: np.ndarray, s21: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def mean(self) -> float:
+        return self.total / self.runs if self.runs else 0.0
+
+    def reset_timing(self) -> None:
+        self.last = self.total = 0.0
+        self.runs = 0
+
+
+class CalibrationStage(Stage):
+    """error correction with the active calibration, expects raw S11"""
+
+    name = "calibration"
+
+    def __init__(self, app: "vna_app", enabled: bool = True) -> None:
+        super().__init__(enabled)
+        self.app = app
+
+    def process(self, freq, s11, s21):
+        # read once, a new calibration may get swapped in any time
+        calibration = self.app.calibration
+        if not calibration.isCalculated:
+            return s11, s21
+        raw11 = s11
+        if calibration.isValid1Port():
+            s11 = calibration.correct11_array(freq, raw11)
+        if calibration.isValid2Port():
+            s21 = calibration.correct21_array(freq, s21, raw11)
+        return s11, s21
+
+
+class DelayStage(Stage):
+    """offset delay set in the calibration window"""
+
+    name = "delay"
+
+    def __init__(self, app: "vna_app", enabled: bool = True) -> None:
+        super().__init__(enabled)
+        self.app = app
+
+    def process(self, freq, s11, s21):
+        delay = self.app.worker.offsetDelay
+        if delay == 0.0:
+            return s11, s21
+        return (
+            correct_delay_array(freq, s11, delay, reflect=True),
+            correct_delay_array(freq, s21, delay),
+        )
+
+
+class DeembedStage(Stage):
+    """divides S21 by the transmission of the S21 correction table"""
+
+    name = "de-embedding"
+
+    def __init__(self, app: "vna_app", enabled: bool = True) -> None:
+        super().__init__(enabled)
+        self.app = app
+
+    def process(self, freq, s11, s21):
+        if (table := self.app.s21table) is None:
+            return s11, s21
+        return s11, table.correct(freq, s21)
+
+
+class AttenuationStage(Stage):
+    """compensates the attenuator in line with the S21 input"""
+
+    name = "attenuation"
+
+    def __init__(self, app: "vna_app", enabled: bool = True) -> None:
+        super().__init__(enabled)
+        self.app = app
+
+    def process(self, freq, s11, s21):
+        if self.app.s21att <= 0:
+            return s11, s21
+        return s11, s21 * 10 ** (self.app.s21att / 20)
+
+
+class SmoothingStage(Stage):
+    """moving average over a window of points within a segment"""
+
+    name = "smoothing"
+
+    def __init__(self, window: int = 5, enabled: bool = False) -> None:
+        super().__init__(enabled)
+        self.window = window
+
+    def process(self, freq, s11, s21):
+        if self.window < 2 or len(freq) < 2:
+            return s11, s21
+        kernel = np.ones(min(self.window, len(freq)))
+        # fewer points contribute at the edges
+        norm = np.convolve(np.ones(len(freq)), kernel, "same")
+        return (
+            np.convolve(s11, kernel, "same") / norm,
+            np.convolve(s21, kernel, "same") / norm,
+        )
+
+
+class Pipeline:
+    """ordered post processing stages from raw to displayed data"""
+
+    def __init__(self, stages: Iterable[Stage]) -> None:
+        self.stages = list(stages)
+
+    @classmethod
+    def default(cls, app: "vna_app") -> "Pipeline":
+        return cls(
+            (
+                CalibrationStage(app),
+                DelayStage(app),
+                DeembedStage(app),
+                AttenuationStage(app),
+                SmoothingStage(),
+            )
+        )
+
+    def __getitem__(self, name: str) -> Stage:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self.stages)
+
+    def __call__(
+        self, freq: np.ndarray, s11: np.ndarray, s21: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        for stage in self.stages:
+            if stage.enabled:
+                s11, s21 = stage(freq, s11, s21)
+        return s11, s21
+
+    def timings(self) -> dict[str, float]:
+        """seconds spent per stage in its latest run"""
+        return {stage.name: stage.last for stage in self.stages}
+
+    def reset_timing(self) -> None:
+        for stage in self.stages:
+            stage.reset_timing()
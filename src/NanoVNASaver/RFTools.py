@@ -18,7 +18,11 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import cmath
 import math
-from typing import NamedTuple
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import NamedTuple, overload
+
+import numpy as np
+import numpy.typing as npt
 
 from .SITools import Format, clamp_value
 
@@ -84,6 +88,241 @@ class Datapoint(NamedTuple):
         return impedance_to_inductance(self.impedance(ref_impedance), self.freq)
 
 
+class SweepData(Sequence[Datapoint]):
+    """Columnar storage of a single S-parameter trace
+
+    Frequencies are kept in an int64 array, values in a complex128
+    array. Indexing and iteration yield Datapoints, so code written
+    against list[Datapoint] keeps working. Slicing returns a copy,
+    like it does for lists.
+
+    Derived values (gain, impedance, ...) are calculated for the whole
+    trace on first use and cached per reference impedance until the
+    data is modified. Modify through the methods of this class, writes
+    to the freq and z arrays directly bypass the cache invalidation.
+    """
+
+    __slots__ = ("_cache", "_cache_generation", "_generation", "freq", "z")
+
+    def __init__(
+        self,
+        freq: npt.ArrayLike = (),
+        z: npt.ArrayLike = (),
+    ) -> None:
+        self.freq: npt.NDArray[np.int64] = np.array(freq, dtype=np.int64)
+        self.z: npt.NDArray[np.complex128] = np.array(z, dtype=np.complex128)
+        if self.freq.shape != self.z.shape or self.freq.ndim != 1:
+            raise ValueError(
+                f"Shape mismatch: freq {self.freq.shape}, z {self.z.shape}"
+            )
+        self._generation = 0
+        self._cache: dict[tuple, np.ndarray] = {}
+        self._cache_generation = 0
+
+    @classmethod
+    def from_datapoints(cls, data: Iterable[Datapoint]) -> "SweepData":
+        if isinstance(data, SweepData):
+            return data.copy()
+        dps = list(data)
+        return cls(
+            np.fromiter((dp.freq for dp in dps), np.int64, len(dps)),
+            np.fromiter(
+                (complex(dp.re, dp.im) for dp in dps), np.complex128, len(dps)
+            ),
+        )
+
+    @classmethod
+    def zeros(cls, freq: npt.ArrayLike) -> "SweepData":
+        freq = np.array(freq, dtype=np.int64)
+        return cls(freq, np.zeros(freq.shape, dtype=np.complex128))
+
+    @property
+    def re(self) -> npt.NDArray[np.float64]:
+        return self.z.real
+
+    @property
+    def im(self) -> npt.NDArray[np.float64]:
+        return self.z.imag
+
+    @property
+    def generation(self) -> int:
+        """incremented on every modification of the data"""
+        return self._generation
+
+    def _derived(
+        self, key: tuple, calc: Callable[[], np.ndarray]
+    ) -> np.ndarray:
+        """return a derived array, calculated once per generation"""
+        if self._cache_generation != self._generation:
+            self._cache = {}
+            self._cache_generation = self._generation
+        if (value := self._cache.get(key)) is None:
+            value = calc()
+            # shared by all readers of this sweep, so keep it read only
+            value.flags.writeable = False
+            self._cache[key] = value
+        return value
+
+    @property
+    def phase(self) -> npt.NDArray[np.float64]:
+        return self._derived(("phase",), lambda: phase_array(self.z))
+
+    @property
+    def unwrappedPhase(self) -> npt.NDArray[np.float64]:
+        return self._derived(("unwrapped",), lambda: np.unwrap(self.phase))
+
+    @property
+    def gain(self) -> npt.NDArray[np.float64]:
+        return self._derived(("gain",), lambda: gain_array(self.z))
+
+    @property
+    def vswr(self) -> npt.NDArray[np.float64]:
+        return self._derived(("vswr",), lambda: vswr_array(self.z))
+
+    @property
+    def wavelength(self) -> npt.NDArray[np.float64]:
+        return self._derived(
+            ("wavelength",), lambda: wavelength_array(self.freq)
+        )
+
+    def impedance(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.complex128]:
+        return self._derived(
+            ("impedance", ref_impedance),
+            lambda: gamma_to_impedance_array(self.z, ref_impedance),
+        )
+
+    def shuntImpedance(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.complex128]:
+        return self._derived(
+            ("shunt", ref_impedance),
+            lambda: shunt_impedance_array(self.z, ref_impedance),
+        )
+
+    def seriesImpedance(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.complex128]:
+        return self._derived(
+            ("series", ref_impedance),
+            lambda: series_impedance_array(self.z, ref_impedance),
+        )
+
+    def parallelImpedance(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.complex128]:
+        """parallel equivalent of the impedance"""
+        return self._derived(
+            ("parallel", ref_impedance),
+            lambda: serial_to_parallel_array(self.impedance(ref_impedance)),
+        )
+
+    def qFactor(self, ref_impedance: float = 50) -> npt.NDArray[np.float64]:
+        return self._derived(
+            ("q", ref_impedance),
+            lambda: _q_factor(self.impedance(ref_impedance)),
+        )
+
+    def capacitiveEquivalent(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.float64]:
+        return self._derived(
+            ("capacitance", ref_impedance),
+            lambda: impedance_to_capacitance_array(
+                self.impedance(ref_impedance), self.freq
+            ),
+        )
+
+    def inductiveEquivalent(
+        self, ref_impedance: float = 50
+    ) -> npt.NDArray[np.float64]:
+        return self._derived(
+            ("inductance", ref_impedance),
+            lambda: impedance_to_inductance_array(
+                self.impedance(ref_impedance), self.freq
+            ),
+        )
+
+    def groupDelay(self) -> npt.NDArray[np.float64]:
+        return self._derived(
+            ("group_delay",),
+            lambda: _group_delay_of_phase(self.freq, self.phase),
+        )
+
+    def __len__(self) -> int:
+        return self.freq.size
+
+    @overload
+    def __getitem__(self, index: int) -> Datapoint: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "SweepData": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            z = complex(self.z[index])
+            return Datapoint(int(self.freq[index]), z.real, z.imag)
+        return SweepData(self.freq[index], self.z[index])
+
+    def __setitem__(self, index: int, dp: Datapoint) -> None:
+        self.freq[index] = dp.freq
+        self.z[index] = complex(dp.re, dp.im)
+        self._generation += 1
+
+    def __iter__(self) -> Iterator[Datapoint]:
+        return map(
+            Datapoint,
+            self.freq.tolist(),
+            self.z.real.tolist(),
+            self.z.imag.tolist(),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SweepData):
+            return np.array_equal(self.freq, other.freq) and np.array_equal(
+                self.z, other.z
+            )
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SweepData({len(self)} points)"
+
+    def copy(self) -> "SweepData":
+        return SweepData(self.freq, self.z)
+
+    def concat(self, other: "SweepData") -> "SweepData":
+        return SweepData(
+            np.concatenate((self.freq, other.freq)),
+            np.concatenate((self.z, other.z)),
+        )
+
+    def sort(self) -> None:
+        """stable in place sort by frequency"""
+        order = np.argsort(self.freq, kind="stable")
+        self.freq = self.freq[order]
+        self.z = self.z[order]
+        self._generation += 1
+
+    def update(self, offset: int, other: "SweepData") -> None:
+        """overwrite a segment starting at offset in place"""
+        end = offset + len(other)
+        self.freq[offset:end] = other.freq
+        self.z[offset:end] = other.z
+        self._generation += 1
+
+
+def as_sweep_data(data: Iterable[Datapoint]) -> SweepData:
+    """return data as SweepData, converting only if needed"""
+    return (
+        data if isinstance(data, SweepData) else SweepData.from_datapoints(data)
+    )
+
+
 def gamma_to_impedance(gamma: complex, ref_impedance: float = 50) -> complex:
     """Calculate impedance from gamma"""
     try:
@@ -92,7 +331,7 @@ def gamma_to_impedance(gamma: complex, ref_impedance: float = 50) -> complex:
         return math.inf
 
 
-def groupDelay(data: list[Datapoint], index: int) -> float:
+def groupDelay(data: Sequence[Datapoint], index: int) -> float:
     idx0 = clamp_value(index - 1, 0, len(data) - 1)
     idx1 = clamp_value(index + 1, 0, len(data) - 1)
     delta_angle = data[idx1].phase - data[idx0].phase
@@ -145,13 +384,246 @@ def serial_to_parallel(z: complex) -> complex:
     return complex(z_sq_sum / z.real, z_sq_sum / z.imag)
 
 
-def corr_att_data(data: list[Datapoint], att: float) -> list[Datapoint]:
+# Array versions of the functions above. They take scalars or numpy
+# arrays and return arrays of the broadcast shape. Edge cases yield the
+# same inf / zero values as the scalar functions instead of raising.
+
+
+def _complex(
+    re: npt.ArrayLike, im: npt.ArrayLike
+) -> npt.NDArray[np.complex128]:
+    """combine real and imag parts without mixing inf into the other one"""
+    re, im = np.broadcast_arrays(
+        np.asarray(re, dtype=np.float64), np.asarray(im, dtype=np.float64)
+    )
+    result = np.empty(re.shape, dtype=np.complex128)
+    result.real = re
+    result.imag = im
+    return result
+
+
+def _divide(a: npt.ArrayLike, b: npt.ArrayLike) -> npt.NDArray[np.complex128]:
+    """complex division using the same algorithm as Python's complex type
+
+    numpy multiplies by the reciprocal, which differs in the last bit
+    """
+    a, b = np.broadcast_arrays(
+        np.asarray(a, dtype=np.complex128), np.asarray(b, dtype=np.complex128)
+    )
+    big_re = np.abs(b.real) >= np.abs(b.imag)
+    with np.errstate(all="ignore"):
+        ratio = np.where(big_re, b.imag / b.real, b.real / b.imag)
+        denom = np.where(
+            big_re, b.real + b.imag * ratio, b.real * ratio + b.imag
+        )
+        return _complex(
+            np.where(big_re, a.real + a.imag * ratio, a.real * ratio + a.imag)
+            / denom,
+            np.where(big_re, a.imag - a.real * ratio, a.imag * ratio - a.real)
+            / denom,
+        )
+
+
+def _libm(
+    func: Callable[..., float], *args: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """func applied elementwise to the broadcast args
+
+    The SIMD loops of numpy's log10, arctan2 and square differ from the
+    C library functions used by the scalar versions in the last bit.
+    Mapping the math function keeps both identical.
+    """
+    arrays = np.broadcast_arrays(
+        *(np.asarray(arg, dtype=np.float64) for arg in args)
+    )
+    shape = arrays[0].shape
+    return np.fromiter(
+        map(func, *(a.ravel().tolist() for a in arrays)),
+        np.float64,
+        arrays[0].size,
+    ).reshape(shape)
+
+
+def _square(x: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """x**2 as calculated by Python floats"""
+    return _libm(math.pow, x, 2.0)
+
+
+def _magnitude(gamma: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    # np.abs on complex uses its own SIMD loop, hypot matches abs(complex)
+    gamma = np.asarray(gamma, dtype=np.complex128)
+    return np.hypot(gamma.real, gamma.imag)
+
+
+def phase_array(gamma: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """return the phase of gamma"""
+    gamma = np.asarray(gamma, dtype=np.complex128)
+    return _libm(math.atan2, gamma.imag, gamma.real)
+
+
+def gain_array(gamma: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """return the gain of gamma in dB"""
+    mag = _magnitude(gamma)
+    gain = np.full(mag.shape, -np.inf)
+    positive = mag > 0
+    gain[positive] = 20 * _libm(math.log10, mag[positive])
+    return gain
+
+
+def vswr_array(gamma: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """return the vswr of gamma"""
+    mag = _magnitude(gamma)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mag < 1, (1 + mag) / (1 - mag), np.inf)
+
+
+def wavelength_array(freq: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """return the free space wavelength of freq"""
+    freq = np.asarray(freq)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(freq != 0, 299792458 / freq, np.inf)
+
+
+def gamma_to_impedance_array(
+    gamma: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate impedance from gamma"""
+    gamma = np.asarray(gamma, dtype=np.complex128)
+    with np.errstate(all="ignore"):
+        z = _divide(-gamma - 1, gamma - 1) * ref_impedance
+    return np.where(gamma == 1, np.inf, z)
+
+
+def shunt_impedance_array(
+    gamma: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate shunt (through) impedance from s21"""
+    gamma = np.asarray(gamma, dtype=np.complex128)
+    with np.errstate(all="ignore"):
+        z = _divide(0.5 * ref_impedance * gamma, 1 - gamma)
+    return np.where(gamma == 1, np.inf, z)
+
+
+def series_impedance_array(
+    gamma: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate series (through) impedance from s21"""
+    gamma = np.asarray(gamma, dtype=np.complex128)
+    with np.errstate(all="ignore"):
+        z = _divide(2 * ref_impedance * (1 - gamma), gamma)
+    return np.where(gamma == 0, np.inf, z)
+
+
+def q_factor_array(
+    gamma: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.float64]:
+    """Calculate the quality factor, -1 for a pure resistance of 0"""
+    return _q_factor(gamma_to_impedance_array(gamma, ref_impedance))
+
+
+def _q_factor(imp: npt.NDArray[np.complex128]) -> npt.NDArray[np.float64]:
+    with np.errstate(all="ignore"):
+        return np.where(imp.real == 0, -1.0, np.abs(imp.imag / imp.real))
+
+
+def _group_delay(
+    delta_angle: npt.ArrayLike, delta_freq: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    delta_angle = np.asarray(delta_angle, dtype=np.float64)
+    delta_freq = np.asarray(delta_freq)
+    with np.errstate(all="ignore"):
+        return np.where(
+            delta_freq == 0, 0.0, -delta_angle / math.tau / delta_freq
+        )
+
+
+def group_delay_array(
+    freq: npt.ArrayLike, gamma: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """Calculate group delay of every point from its neighbours"""
+    return _group_delay_of_phase(np.asarray(freq), phase_array(gamma))
+
+
+def _group_delay_of_phase(
+    freq: npt.NDArray, phase: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    if phase.size == 0:
+        return np.zeros(0)
+    idx = np.arange(phase.size)
+    idx0 = np.maximum(idx - 1, 0)
+    idx1 = np.minimum(idx + 1, phase.size - 1)
+    return _group_delay(phase[idx1] - phase[idx0], freq[idx1] - freq[idx0])
+
+
+def impedance_to_capacitance_array(
+    z: npt.ArrayLike, freq: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """Calculate capacitive equivalent for reactance"""
+    z = np.asarray(z, dtype=np.complex128)
+    freq = np.asarray(freq)
+    with np.errstate(all="ignore"):
+        cap = -(1 / (freq * 2 * np.pi * z.imag))
+    return np.where(freq == 0, -np.inf, np.where(z.imag == 0, np.inf, cap))
+
+
+def impedance_to_inductance_array(
+    z: npt.ArrayLike, freq: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """Calculate inductive equivalent for reactance"""
+    z = np.asarray(z, dtype=np.complex128)
+    freq = np.asarray(freq)
+    with np.errstate(all="ignore"):
+        return np.where(freq == 0, 0.0, z.imag * 1 / (freq * 2 * np.pi))
+
+
+def impedance_to_norm_array(
+    z: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate normalized z from impedance"""
+    return _divide(z, ref_impedance)
+
+
+def norm_to_impedance_array(
+    z: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate impedance from normalized z"""
+    with np.errstate(all="ignore"):
+        return np.asarray(z, dtype=np.complex128) * ref_impedance
+
+
+def parallel_to_serial_array(z: npt.ArrayLike) -> npt.NDArray[np.complex128]:
+    """Convert parallel impedance to serial impedance equivalent"""
+    z = np.asarray(z, dtype=np.complex128)
+    re_sq, im_sq = _square(z.real), _square(z.imag)
+    z_sq_sum = re_sq + im_sq
+    z_sq_sum = np.where(z_sq_sum == 0, 10.0e-30, z_sq_sum)
+    with np.errstate(all="ignore"):
+        return _complex(z.real * im_sq / z_sq_sum, re_sq * z.imag / z_sq_sum)
+
+
+def reflection_coefficient_array(
+    z: npt.ArrayLike, ref_impedance: float = 50
+) -> npt.NDArray[np.complex128]:
+    """Calculate reflection coefficient for z"""
+    z = np.asarray(z, dtype=np.complex128)
+    return _divide(z - ref_impedance, z + ref_impedance)
+
+
+def serial_to_parallel_array(z: npt.ArrayLike) -> npt.NDArray[np.complex128]:
+    """Convert serial impedance to parallel impedance equivalent"""
+    z = np.asarray(z, dtype=np.complex128)
+    z_sq_sum = _square(z.real) + _square(z.imag)
+    inf = np.copysign(np.inf, z_sq_sum)
+    with np.errstate(all="ignore"):
+        return _complex(
+            np.where(z.real == 0, inf, z_sq_sum / z.real),
+            np.where(z.imag == 0, inf, z_sq_sum / z.imag),
+        )
+
+
+def corr_att_data(data: Sequence[Datapoint], att: float) -> SweepData:
     """Correct the ratio for a given attenuation on s21 input"""
+    data = as_sweep_data(data)
     if att <= 0:
         return data
-    att = 10 ** (att / 20)
-    ndata = []
-    for dp in data:
-        corrected = dp.z * att
-        ndata.append(Datapoint(dp.freq, corrected.real, corrected.imag))
-    return ndata
+    return SweepData(data.freq, data.z * 10 ** (att / 20))
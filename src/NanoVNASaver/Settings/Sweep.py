@@ -31,11 +31,28 @@ class SweepMode(Enum):
     AVERAGE = 2
 
 
+class AverageMethod(Enum):
+    # mean after discarding the samples farthest from it
+    TRUNCATED_MEAN = 0
+    MEDIAN = 1
+    SIGMA_CLIPPED = 2
+    # streaming, updated after every read in constant memory
+    RUNNING_MEAN = 3
+    # streaming, continued across sweeps
+    EXPONENTIAL = 4
+    # running mean, stops reading once the noise target is met
+    ADAPTIVE = 5
+
+
 class Properties(NamedTuple):
     name: str = ""
     mode: "SweepMode" = SweepMode.SINGLE
     averages: tuple[int, int] = (3, 0)
     logarithmic: bool = False
+    average_method: "AverageMethod" = AverageMethod.TRUNCATED_MEAN
+    # standard error of the mean per point adaptive averaging stops at,
+    # linear or in dB
+    noise_target: tuple[float, bool] = (0.001, False)
 
 
 class Sweep:
@@ -153,6 +170,16 @@ class Sweep:
                 averages=(amount, truncates)
             )
 
+    def set_average_method(self, method: "AverageMethod") -> None:
+        with self._lock:
+            self._properties = self.properties._replace(average_method=method)
+
+    def set_noise_target(self, target: float, in_db: bool) -> None:
+        with self._lock:
+            self._properties = self.properties._replace(
+                noise_target=(target, in_db)
+            )
+
     def set_logarithmic(self, logarithmic: bool) -> None:
         with self._lock:
             self._properties = self.properties._replace(logarithmic=logarithmic)
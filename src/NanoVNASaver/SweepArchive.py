@@ -0,0 +1,269 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
+import threading
+from time import localtime, strftime, time
+from typing import NamedTuple
+
+import numpy as np
+
+from .RFTools import SweepData
+from .Settings.Sweep import AverageMethod, Properties, Sweep, SweepMode
+from .Touchstone import Touchstone
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MAGIC = b"NVSARC01"
+INDEX_MAGIC = b"NVSIDX01"
+INDEX_SUFFIX = ".idx"
+
+# one fixed size record per sweep, entry i is at i * itemsize
+INDEX_DTYPE = np.dtype(
+    [
+        ("time", "<f8"),
+        # byte offset of the sweep in the data file
+        ("offset", "<i8"),
+        ("points", "<i8"),
+        ("start", "<i8"),
+        ("end", "<i8"),
+        ("segment_points", "<i4"),
+        ("segments", "<i4"),
+        ("mode", "<i4"),
+        ("averages", "<i4"),
+        ("truncates", "<i4"),
+        ("logarithmic", "?"),
+        ("average_method", "<i4"),
+        ("name", "S64"),
+        ("calibration", "S64"),
+        ("calibration_checksum", "S64"),
+    ]
+)
+# a sweep is stored as freq, s11 and s21 of all its points
+FREQ_DTYPE = np.dtype("<i8")
+VALUE_DTYPE = np.dtype("<c16")
+POINT_SIZE = FREQ_DTYPE.itemsize + 2 * VALUE_DTYPE.itemsize
+
+
+class ArchiveEntry(NamedTuple):
+    time: float
+    sweep: Sweep
+    calibration: str
+    calibration_checksum: str
+    s11: SweepData
+    s21: SweepData
+
+    def touchstone(self, filename: str = "") -> Touchstone:
+        ts = Touchstone(filename)
+        ts.s11 = self.s11
+        ts.s21 = self.s21
+        return ts
+
+
+def _map(filename: str, dtype: np.dtype, offset: int) -> np.ndarray:
+    """read only memory map of filename after offset bytes"""
+    if os.path.getsize(filename) - offset < dtype.itemsize:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", offset=offset)
+
+
+def _decode(value: bytes) -> str:
+    return value.decode("utf-8", errors="replace")
+
+
+def _encode(value: str) -> bytes:
+    """utf-8 value cut to the 64 bytes of the index fields"""
+    return value.encode("utf-8")[:64].decode("utf-8", "ignore").encode()
+
+
+class SweepArchive:
+    """append only archive of sweeps
+
+    The sweeps are stored packed in the data file filename. A separate
+    index file filename.idx holds one fixed size record per sweep with
+    its time, sweep settings, calibration and position in the data file.
+    Both files are memory mapped for reading, so entries are accessed
+    in constant time without loading the archive. Appending is safe from
+    another thread while entries are read.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.index_filename = f"{filename}{INDEX_SUFFIX}"
+        self._lock = threading.Lock()
+        self._open(self.filename, ARCHIVE_MAGIC)
+        self._open(self.index_filename, INDEX_MAGIC)
+        # drop a partially written record, e.g. after a crash
+        size = os.path.getsize(self.index_filename) - len(INDEX_MAGIC)
+        if size % INDEX_DTYPE.itemsize:
+            logger.warning("Dropping incomplete record of %s", filename)
+            os.truncate(
+                self.index_filename,
+                len(INDEX_MAGIC) + size - size % INDEX_DTYPE.itemsize,
+            )
+        self._len = size // INDEX_DTYPE.itemsize
+        self._index = np.empty(0, dtype=INDEX_DTYPE)
+        self._data = np.empty(0, dtype=np.uint8)
+
+    @staticmethod
+    def _open(filename: str, magic: bytes) -> None:
+        """create filename or check it is of the expected format"""
+        with open(filename, "ab+") as file:
+            file.seek(0)
+            head = file.read(len(magic))
+            if not head:
+                file.write(magic)
+            elif head != magic:
+                raise ValueError(f"Not a sweep archive: {filename}")
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i: int) -> ArchiveEntry:
+        return self.entry(i)
+
+    def _record(self, i: int) -> np.void:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(f"No entry {i} in {self.filename}")
+        if i >= len(self._index):
+            # grown since mapped
+            self._index = _map(
+                self.index_filename, INDEX_DTYPE, len(INDEX_MAGIC)
+            )
+        return self._index[i]
+
+    def times(self) -> np.ndarray:
+        """timestamps of all entries"""
+        with self._lock:
+            if self._len and self._len > len(self._index):
+                self._record(self._len - 1)
+            return np.array(self._index["time"][: self._len])
+
+    def entry(self, i: int) -> ArchiveEntry:
+        with self._lock:
+            record = self._record(i)
+            offset, points = int(record["offset"]), int(record["points"])
+            end = offset + points * POINT_SIZE
+            if end > len(self._data):
+                self._data = _map(self.filename, np.dtype(np.uint8), 0)
+            data = self._data[offset:end]
+        freq_end = points * FREQ_DTYPE.itemsize
+        s11_end = freq_end + points * VALUE_DTYPE.itemsize
+        freq = data[:freq_end].view(FREQ_DTYPE)
+        sweep = Sweep(
+            int(record["start"]),
+            int(record["end"]),
+            int(record["segment_points"]),
+            int(record["segments"]),
+            Properties(
+                _decode(record["name"]),
+                SweepMode(int(record["mode"])),
+                (int(record["averages"]), int(record["truncates"])),
+                bool(record["logarithmic"]),
+                AverageMethod(int(record["average_method"])),
+            ),
+        )
+        return ArchiveEntry(
+            float(record["time"]),
+            sweep,
+            _decode(record["calibration"]),
+            _decode(record["calibration_checksum"]),
+            SweepData(freq, data[freq_end:s11_end].view(VALUE_DTYPE)),
+            SweepData(freq, data[s11_end:].view(VALUE_DTYPE)),
+        )
+
+    def find(self, start: float = 0.0, end: float = float("inf")) -> list[int]:
+        """numbers of the entries recorded from start to end"""
+        times = self.times()
+        return np.flatnonzero((times >= start) & (times <= end)).tolist()
+
+    def append(  # noqa: PLR0913
+        self,
+        s11: SweepData,
+        s21: SweepData,
+        sweep: Sweep,
+        *,
+        calibration: str = "",
+        calibration_checksum: str = "",
+        timestamp: float | None = None,
+    ) -> int:
+        """add a sweep and return its entry number"""
+        if len(s21) != len(s11):
+            s21 = SweepData.zeros(s11.freq)
+        properties = sweep.properties
+        record = np.array(
+            (
+                time() if timestamp is None else timestamp,
+                0,
+                len(s11),
+                sweep.start,
+                sweep.end,
+                sweep.points,
+                sweep.segments,
+                properties.mode.value,
+                properties.averages[0],
+                properties.averages[1],
+                properties.logarithmic,
+                properties.average_method.value,
+                _encode(properties.name),
+                _encode(calibration),
+                _encode(calibration_checksum),
+            ),
+            dtype=INDEX_DTYPE,
+        )
+        with self._lock:
+            # the data goes first, an index record is only written
+            # for a complete sweep
+            with open(self.filename, "ab") as datafile:
+                record["offset"] = datafile.tell()
+                datafile.write(s11.freq.astype(FREQ_DTYPE).tobytes())
+                datafile.write(s11.z.astype(VALUE_DTYPE).tobytes())
+                datafile.write(s21.z.astype(VALUE_DTYPE).tobytes())
+            with open(self.index_filename, "ab") as indexfile:
+                indexfile.write(record.tobytes())
+            self._len += 1
+            return self._len - 1
+
+    def export(self, i: int, filename: str, nr_params: int = 4) -> None:
+        """save entry i as Touchstone file"""
+        self.entry(i).touchstone(filename).save(nr_params)
+
+    def export_range(
+        self,
+        directory: str,
+        start: float = 0.0,
+        end: float = float("inf"),
+        suffix: str = ".s2p",
+    ) -> list[str]:
+        """save the entries recorded from start to end as Touchstone files
+
+        Returns the names of the written files.
+        """
+        nr_params = 1 if suffix.startswith(".s1p") else 4
+        filenames = []
+        for i in self.find(start, end):
+            entry = self.entry(i)
+            name = entry.sweep.properties.name or "nanovna"
+            stamp = strftime("%Y%m%d-%H%M%S", localtime(entry.time))
+            filename = os.path.join(directory, f"{name}_{stamp}_{i}{suffix}")
+            entry.touchstone(filename).save(nr_params)
+            filenames.append(filename)
+        return filenames
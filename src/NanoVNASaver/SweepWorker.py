@@ -17,16 +17,20 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+import queue
+import threading
+from collections.abc import Callable
+from functools import partial
 from time import sleep
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 import numpy as np
 from PySide6.QtCore import QObject, QThread, Signal, Slot
 
-from .Calibration import correct_delay
 from .Hardware.VNA import VNA
-from .RFTools import Datapoint
-from .Settings.Sweep import Sweep, SweepMode
+from .Processing import Pipeline
+from .RFTools import SweepData, as_sweep_data
+from .Settings.Sweep import AverageMethod, Sweep, SweepMode
 
 if TYPE_CHECKING:
     from .NanoVNASaver.NanoVNASaver import NanoVNASaver as vna_app
@@ -36,6 +40,33 @@ logger = logging.getLogger(__name__)
 VALUE_MAX: float = 9.5
 RETRIES_RECONNECT: int = 5
 RETRIES_MAX: int = 10
+# segments read ahead of the processing
+PIPELINE_DEPTH: int = 2
+# samples farther from the mean are dropped by sigma clipped averaging
+SIGMA_CLIP: float = 2.0
+# averaging methods which update their estimate with every read
+STREAMING_METHODS = (
+    AverageMethod.RUNNING_MEAN,
+    AverageMethod.EXPONENTIAL,
+    AverageMethod.ADAPTIVE,
+)
+# reads before adaptive averaging trusts its variance estimate
+ADAPTIVE_MIN_READS: int = 3
+# a point this far from the midpoint of its neighbours, and GLITCH_RATIO
+# times farther than they are apart, or this far from the previous sweep
+# is re-measured
+GLITCH_JUMP: float = 0.5
+GLITCH_RATIO: float = 4.0
+# more points of a segment jumping is a changed device under test
+GLITCH_CHANGED_MAX: float = 0.1
+
+
+class SegmentNoise(NamedTuple):
+    reads: int
+    # largest standard error of the mean of the segment points
+    s11: float
+    s21: float
+    in_db: bool = False
 
 
 def truncate(values: list[list[complex]], count: int) -> list[list[complex]]:
@@ -45,15 +76,121 @@ def truncate(values: list[list[complex]], count: int) -> list[list[complex]]:
     if count < 1 or keep < 1:
         logger.info("Not doing illegal truncate")
         return values
-    truncated = []
-    for valueset in np.swapaxes(values, 0, 1).tolist():
-        avg = complex(np.average(valueset))
-
-        def cmp_fn(v: complex, avg=avg) -> float:
-            return float(abs(avg - v))
-
-        truncated.append(sorted(valueset, key=cmp_fn)[:keep])
-    return np.swapaxes(truncated, 0, 1).tolist()
+    return truncate_array(
+        np.asarray(values, dtype=np.complex128), count
+    ).tolist()
+
+
+def truncate_array(values: np.ndarray, count: int) -> np.ndarray:
+    """keep the samples per point closest to their mean, closest first
+
+    values has one row per sample. count samples are dropped from each
+    point, the order of the rows kept is by distance to the mean.
+    """
+    # one row per point, reduced along it like a list of its samples
+    samples = np.ascontiguousarray(values.T)
+    avg = samples.mean(axis=1)
+    diff = avg[:, np.newaxis] - samples
+    # hypot matches abs(complex)
+    dist = np.hypot(diff.real, diff.imag)
+    order = np.argsort(dist, axis=1, kind="stable")[:, : len(values) - count]
+    # row wise like the lists, so averaging them gives the same sums
+    return np.ascontiguousarray(np.take_along_axis(samples, order, axis=1).T)
+
+
+def median_array(values: np.ndarray) -> np.ndarray:
+    """median of the real and imaginary parts of the samples per point"""
+    result = np.empty(values.shape[1:], dtype=np.complex128)
+    result.real = np.median(values.real, axis=0)
+    result.imag = np.median(values.imag, axis=0)
+    return result
+
+
+def sigma_clipped_array(
+    values: np.ndarray, sigma: float = SIGMA_CLIP, iterations: int = 3
+) -> np.ndarray:
+    """mean of the samples per point closer than sigma standard deviations
+
+    Outliers are dropped repeatedly, up to iterations times. The sample
+    closest to the mean is always kept.
+    """
+    keep = np.ones(values.shape, dtype=bool)
+    for _ in range(iterations):
+        count = keep.sum(axis=0)
+        mean = np.where(keep, values, 0).sum(axis=0) / count
+        dist = np.abs(values - mean)
+        std = np.sqrt(np.where(keep, dist**2, 0).sum(axis=0) / count)
+        clipped = keep & (dist <= sigma * std)
+        if np.array_equal(clipped, keep):
+            break
+        keep = clipped
+    return np.where(keep, values, 0).sum(axis=0) / keep.sum(axis=0)
+
+
+def average_array(
+    values: np.ndarray, method: AverageMethod, truncates: int = 0
+) -> np.ndarray:
+    """average of the samples per point, values has one row per sample"""
+    if method == AverageMethod.MEDIAN:
+        return median_array(values)
+    if method == AverageMethod.SIGMA_CLIPPED:
+        return sigma_clipped_array(values)
+    if truncates > 0 and len(values) > 1:
+        logger.debug("Truncating %d values by %d", len(values), truncates)
+        if truncates < len(values):
+            values = truncate_array(values, truncates)
+        else:
+            logger.info("Not doing illegal truncate")
+    return np.average(values, axis=0)
+
+
+def standard_error(
+    mean: np.ndarray, sum_sq: np.ndarray, reads: int, in_db: bool = False
+) -> np.ndarray:
+    """standard error of the mean per point
+
+    sum_sq is the sum of the squared distances of the reads from their
+    mean. In dB the error is relative to the magnitude of the mean.
+    """
+    if reads < 2:
+        return np.full(mean.shape, np.inf)
+    error = np.sqrt(sum_sq / ((reads - 1) * reads))
+    if in_db:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            error = 20 / np.log(10) * error / np.abs(mean)
+    return error
+
+
+def out_of_range(values: np.ndarray) -> np.ndarray:
+    """mask of the values not finite or larger than VALUE_MAX"""
+    with np.errstate(invalid="ignore"):
+        return ~np.isfinite(values) | (np.abs(values) > VALUE_MAX)
+
+
+def find_glitches(
+    values: np.ndarray, previous: np.ndarray | None = None
+) -> np.ndarray:
+    """mask of the implausible points of a segment
+
+    Points are implausible if out of range, if they spike away from
+    both neighbours, or if they jumped away from the previous sweep.
+    Jumps from the previous sweep are ignored if too many points jumped
+    or the point was not measured before.
+    """
+    glitches = out_of_range(values)
+    with np.errstate(invalid="ignore"):
+        if len(values) > 2:
+            spike = np.abs(values[1:-1] - (values[:-2] + values[2:]) / 2)
+            glitches[1:-1] |= (spike > GLITCH_JUMP) & (
+                spike > GLITCH_RATIO * np.abs(values[:-2] - values[2:])
+            )
+        if previous is not None and len(previous) == len(values):
+            jumped = (np.abs(values - previous) > GLITCH_JUMP) & (
+                previous != 0
+            )
+            if np.count_nonzero(jumped) <= GLITCH_CHANGED_MAX * len(values):
+                glitches |= jumped
+    return glitches
 
 
 class WorkerSignals(QObject):
@@ -70,14 +207,22 @@ class SweepWorker(QThread):
         self.app = app
         self.sweep = Sweep()
         self.percentage: float = 0.0
-        self.data11: list[Datapoint] = []
-        self.data21: list[Datapoint] = []
-        self.rawData11: list[Datapoint] = []
-        self.rawData21: list[Datapoint] = []
+        self.data11: SweepData = SweepData()
+        self.data21: SweepData = SweepData()
+        self.rawData11: SweepData = SweepData()
+        self.rawData21: SweepData = SweepData()
+        # guards the data above against calibration changes mid sweep
+        self.dataLock = threading.Lock()
+        # exponential averages of the segments by frequency range
+        self._estimates: dict[tuple[int, int], np.ndarray] = {}
+        # noise achieved by the streaming averages by frequency range
+        self.segment_noise: dict[tuple[int, int], SegmentNoise] = {}
         self.init_data()
         self.error_message: str = ""
         self.offsetDelay: float = 0.0
+        self.pipeline = Pipeline.default(app)
         self._terminate: bool = False
+        self._processing_error: Exception | None = None
 
     @Slot()
     def quit(self) -> None:
@@ -134,32 +279,93 @@ class SweepWorker(QThread):
         )
         logger.info("%d averages", averages)
 
-        while True:
-            for i in range(sweep.segments):
-                logger.debug("Sweep segment no %d", i)
-                if self._terminate:
-                    logger.debug("Stopping sweeping as signalled")
+        # the device is read here while the segments read before are
+        # processed and published by the processing thread
+        tasks: queue.Queue[Callable[[], None] | None] = queue.Queue(
+            maxsize=PIPELINE_DEPTH
+        )
+        self._processing_error = None
+        processing = threading.Thread(
+            target=self._process_segments,
+            args=(tasks,),
+            name="SweepProcessing",
+        )
+        processing.start()
+        try:
+            while True:
+                for i in range(sweep.segments):
+                    logger.debug("Sweep segment no %d", i)
+                    if self._terminate:
+                        logger.debug("Stopping sweeping as signalled")
+                        break
+                    start, stop = sweep.get_index_range(i)
+
+                    freq, values11, values21 = self.read_averaged_segment(
+                        start,
+                        stop,
+                        averages,
+                        partial(self._publish_estimate, tasks, i),
+                    )
+                    self.percentage = (i + 1) * 100 / sweep.segments
+                    self._queue_task(
+                        tasks,
+                        partial(self.update_data, freq, values11, values21, i),
+                    )
+                if not self._terminate:
+                    self._queue_task(tasks, self.archive_sweep)
+                if (
+                    sweep.properties.mode != SweepMode.CONTINOUS
+                    or self._terminate
+                ):
                     break
-                start, stop = sweep.get_index_range(i)
+        finally:
+            tasks.put(None)
+            processing.join()
+        if self._processing_error is not None:
+            raise self._processing_error
+
+    def _queue_task(
+        self, tasks: "queue.Queue[Callable[[], None] | None]", task: Callable
+    ) -> None:
+        """hand a task to the processing thread, blocks if it lags behind"""
+        if self._processing_error is not None:
+            raise self._processing_error
+        tasks.put(task)
 
-                freq, values11, values21 = self.read_averaged_segment(
-                    start, stop, averages
-                )
-                self.percentage = (i + 1) * 100 / sweep.segments
-                self.update_data(freq, values11, values21, i)
-            if sweep.properties.mode != SweepMode.CONTINOUS or self._terminate:
-                break
+    def _publish_estimate(
+        self,
+        tasks: "queue.Queue[Callable[[], None] | None]",
+        index: int,
+        freq: list[int],
+        values11: list[complex],
+        values21: list[complex],
+    ) -> None:
+        """publish an intermediate estimate of segment index"""
+        self._queue_task(
+            tasks, partial(self.update_data, freq, values11, values21, index)
+        )
+
+    def _process_segments(
+        self, tasks: "queue.Queue[Callable[[], None] | None]"
+    ) -> None:
+        while (task := tasks.get()) is not None:
+            # after a failure the remaining tasks are only drained
+            if self._processing_error is not None:
+                continue
+            try:
+                task()
+            except Exception as exc:  # pylint: disable=broad-except
+                self._processing_error = exc
 
     def init_data(self) -> None:
-        self.data11 = []
-        self.data21 = []
-        self.rawData11 = []
-        self.rawData21 = []
-        for freq in self.sweep.get_frequencies():
-            self.data11.append(Datapoint(freq, 0.0, 0.0))
-            self.data21.append(Datapoint(freq, 0.0, 0.0))
-            self.rawData11.append(Datapoint(freq, 0.0, 0.0))
-            self.rawData21.append(Datapoint(freq, 0.0, 0.0))
+        freq = np.fromiter(self.sweep.get_frequencies(), dtype=np.int64)
+        self._estimates = {}
+        self.segment_noise = {}
+        with self.dataLock:
+            self.data11 = SweepData.zeros(freq)
+            self.data21 = SweepData.zeros(freq)
+            self.rawData11 = SweepData.zeros(freq)
+            self.rawData21 = SweepData.zeros(freq)
         logger.debug("Init data length: %s", len(self.data11))
 
     def update_data(
@@ -175,70 +381,110 @@ class SweepWorker(QThread):
         )
         offset = self.sweep.points * index
 
-        raw_data11 = [
-            Datapoint(freq, values11[i].real, values11[i].imag)
-            for i, freq in enumerate(frequencies)
-        ]
-        raw_data21 = [
-            Datapoint(freq, values21[i].real, values21[i].imag)
-            for i, freq in enumerate(frequencies)
-        ]
-
-        data11, data21 = self.applyCalibration(raw_data11, raw_data21)
-        logger.debug("update Freqs: %s, Offset: %s", len(frequencies), offset)
-        for i in range(len(frequencies)):
-            self.data11[offset + i] = data11[i]
-            self.data21[offset + i] = data21[i]
-            self.rawData11[offset + i] = raw_data11[i]
-            self.rawData21[offset + i] = raw_data21[i]
+        raw_data11 = SweepData(frequencies, values11)
+        raw_data21 = SweepData(frequencies, values21)
 
-        logger.debug(
-            "Saving data to application (%d and %d points)",
-            len(self.data11),
-            len(self.data21),
-        )
-        self.app.saveData(self.data11, self.data21)
+        with self.dataLock:
+            data11, data21 = self.applyCalibration(raw_data11, raw_data21)
+            logger.debug(
+                "update Freqs: %s, Offset: %s", len(frequencies), offset
+            )
+            self.data11.update(offset, data11)
+            self.data21.update(offset, data21)
+            self.rawData11.update(offset, raw_data11)
+            self.rawData21.update(offset, raw_data21)
+
+            logger.debug(
+                "Saving data to application (%d and %d points)",
+                len(self.data11),
+                len(self.data21),
+            )
+            # hand out snapshots, the worker keeps updating its own arrays
+            self.app.saveData(self.data11.copy(), self.data21.copy())
         logger.debug('Sending "updated" signal')
         self.signals.updated.emit()
 
-    def applyCalibration(
-        self, raw_data11: list[Datapoint], raw_data21: list[Datapoint]
-    ) -> tuple[list[Datapoint], list[Datapoint]]:
-        data11: list[Datapoint] = []
-        data21: list[Datapoint] = []
-
-        if not self.app.calibration.isCalculated:
-            data11 = raw_data11.copy()
-            data21 = raw_data21.copy()
-        elif self.app.calibration.isValid1Port():
-            data11.extend(
-                self.app.calibration.correct11(dp) for dp in raw_data11
+    def archive_sweep(self) -> None:
+        """append the completed sweep to the sweep archive, if recording"""
+        archive = self.app.sweep_archive
+        if archive is None:
+            return
+        calibration = self.app.calibration
+        with self.dataLock:
+            data11 = self.data11.copy()
+            data21 = self.data21.copy()
+        try:
+            entry = archive.append(
+                data11,
+                data21,
+                self.sweep,
+                calibration=(
+                    calibration.source if calibration.isCalculated else ""
+                ),
+                calibration_checksum=(
+                    calibration.checksum if calibration.isCalculated else ""
+                ),
             )
-        else:
-            data11 = raw_data11.copy()
-
-        if self.app.calibration.isValid2Port():
-            for counter, dp in enumerate(raw_data21):
-                dp11 = raw_data11[counter]
-                data21.append(self.app.calibration.correct21(dp, dp11))
-        else:
-            data21 = raw_data21
-
-        if self.offsetDelay != 0.0:
-            data11 = [
-                correct_delay(dp, self.offsetDelay, reflect=True)
-                for dp in data11
-            ]
-            data21 = [correct_delay(dp, self.offsetDelay) for dp in data21]
+        except OSError as exc:
+            logger.error("Unable to archive sweep: %s", exc)
+            return
+        logger.debug("Archived sweep %d in %s", entry, archive.filename)
+
+    def reapply_calibration(self) -> None:
+        """process the whole raw sweep again after calibration changes
+
+        Safe to call while sweeping, segments corrected with the previous
+        calibration are never saved after this.
+        """
+        with self.dataLock:
+            if len(self.rawData11) == 0:
+                return
+            logger.debug("Applying calibration to existing sweep data.")
+            self.data11, self.data21 = self.applyCalibration(
+                self.rawData11, self.rawData21
+            )
+            logger.debug("Saving and displaying corrected data.")
+            self.app.saveData(
+                self.data11.copy(), self.data21.copy(), self.app.sweepSource
+            )
+        self.signals.updated.emit()
 
+    def applyCalibration(
+        self, raw_data11: SweepData, raw_data21: SweepData
+    ) -> tuple[SweepData, SweepData]:
+        raw_data11 = as_sweep_data(raw_data11)
+        raw_data21 = as_sweep_data(raw_data21)
+        s11, s21 = self.pipeline(raw_data11.freq, raw_data11.z, raw_data21.z)
+        data11 = SweepData(raw_data11.freq, s11)
+        data21 = SweepData(raw_data21.freq, s21)
+        logger.debug(
+            "Processing times: %s",
+            ", ".join(
+                f"{name} {1000 * last:.2f}ms"
+                for name, last in self.pipeline.timings().items()
+            ),
+        )
         return data11, data21
 
     def read_averaged_segment(
-        self, start: int, stop: int, averages: int = 1
+        self,
+        start: int,
+        stop: int,
+        averages: int = 1,
+        publish: Callable[[list[int], list[complex], list[complex]], None]
+        | None = None,
     ) -> tuple[list[int], list[complex], list[complex]]:
+        """read and average a segment
+
+        Streaming averaging methods call publish with the estimate after
+        every read but the last one, which gets returned.
+        """
         logger.info(
             "Reading from %d to %d. Averaging %d values", start, stop, averages
         )
+        method = self.sweep.properties.average_method
+        if method in STREAMING_METHODS:
+            return self.read_streaming_segment(start, stop, averages, publish)
 
         freq: list[int] = []
         values11: list[list[complex]] = []
@@ -252,19 +498,7 @@ class SweepWorker(QThread):
                 logger.warning("Stop during average. Discarding sweep result.")
                 return [], [], []
             logger.debug("Reading average no %d / %d", i + 1, averages)
-            retries = RETRIES_RECONNECT
-            tmp_11: list[complex] = []
-            tmp_21: list[complex] = []
-            while retries and not tmp_11:
-                if retries < RETRIES_RECONNECT:
-                    logger.warning("retry readSegment(%s,%s)", start, stop)
-                    sleep(0.5)
-                retries -= 1
-                freq, tmp_11, tmp_21 = self.read_segment(start, stop)
-
-            if not tmp_11:
-                raise IOError("Invalid data during sweep")
-
+            freq, tmp_11, tmp_21 = self.read_segment_retrying(start, stop)
             values11.append(tmp_11)
             values21.append(tmp_21)
             self.percentage += 100 / (self.sweep.segments * averages)
@@ -274,20 +508,126 @@ class SweepWorker(QThread):
             raise IOError("Invalid data during sweep")
 
         truncates = self.sweep.properties.averages[1]
-        if truncates > 0 and averages > 1:
-            logger.debug("Truncating %d values by %d", len(values11), truncates)
-            values11 = truncate(values11, truncates)
-            values21 = truncate(values21, truncates)
-
-        logger.debug("Averaging %d values", len(values11[0]))
+        logger.debug("Averaging %d values by %s", len(values11), method.name)
         return (
             freq,
-            np.average(values11, axis=0).tolist(),
-            np.average(values21, axis=0).tolist(),
+            average_array(np.array(values11), method, truncates).tolist(),
+            average_array(np.array(values21), method, truncates).tolist(),
         )
 
+    def read_streaming_segment(
+        self,
+        start: int,
+        stop: int,
+        averages: int = 1,
+        publish: Callable[[list[int], list[complex], list[complex]], None]
+        | None = None,
+    ) -> tuple[list[int], list[complex], list[complex]]:
+        """average the reads of a segment incrementally in constant memory
+
+        The running mean averages the reads of this segment. The
+        exponential average continues from the estimate of the previous
+        sweep, weighting each read by 2 / (n + 1) for n averages set.
+        Adaptive averaging is a running mean which stops before averages
+        reads once the standard error of every point meets the noise
+        target.
+        """
+        properties = self.sweep.properties
+        method = properties.average_method
+        target, in_db = properties.noise_target
+        # s11 and s21 as rows
+        estimate: np.ndarray | None = None
+        if method == AverageMethod.EXPONENTIAL:
+            estimate = self._estimates.get((start, stop))
+        alpha = 2 / (properties.averages[0] + 1)
+
+        freq: list[int] = []
+        sum_sq = np.zeros(0)
+        reads = 0
+        for i in range(averages):
+            if self._terminate:
+                logger.debug("Stopping averaging as signalled.")
+                break
+            logger.debug("Reading average no %d / %d", i + 1, averages)
+            freq, tmp_11, tmp_21 = self.read_segment_retrying(start, stop)
+            values = np.array((tmp_11, tmp_21), dtype=np.complex128)
+            reads += 1
+            self.percentage += 100 / (self.sweep.segments * averages)
+            if estimate is None or estimate.shape != values.shape:
+                estimate = values
+                sum_sq = np.zeros(values.shape)
+            elif method == AverageMethod.EXPONENTIAL:
+                estimate = estimate + alpha * (values - estimate)
+            else:
+                # Welford's update of the mean and the squared distances
+                delta = values - estimate
+                estimate = estimate + delta / reads
+                sum_sq += (reads - 1) / reads * (delta.real**2 + delta.imag**2)
+            if (
+                method == AverageMethod.ADAPTIVE
+                and reads >= ADAPTIVE_MIN_READS
+                and np.max(standard_error(estimate, sum_sq, reads, in_db))
+                <= target
+            ):
+                logger.debug("Noise target met after %d reads", reads)
+                self.percentage += (
+                    100 * (averages - reads) / (self.sweep.segments * averages)
+                )
+                self.signals.updated.emit()
+                break
+            self.signals.updated.emit()
+            if publish is not None and i < averages - 1:
+                publish(freq, estimate[0].tolist(), estimate[1].tolist())
+
+        if not reads:
+            logger.warning("Stop before reading. Discarding sweep result.")
+            return [], [], []
+        if method == AverageMethod.EXPONENTIAL:
+            self._estimates[(start, stop)] = estimate
+        else:
+            noise = standard_error(estimate, sum_sq, reads, in_db)
+            self.segment_noise[(start, stop)] = SegmentNoise(
+                reads, float(np.max(noise[0])), float(np.max(noise[1])), in_db
+            )
+            logger.info(
+                "Noise of %d to %d after %d reads: %s",
+                start,
+                stop,
+                reads,
+                self.segment_noise[(start, stop)],
+            )
+        return freq, estimate[0].tolist(), estimate[1].tolist()
+
+    def read_segment_retrying(
+        self, start: int, stop: int
+    ) -> tuple[list[int], list[complex], list[complex]]:
+        retries = RETRIES_RECONNECT
+        freq: list[int] = []
+        tmp_11: list[complex] = []
+        tmp_21: list[complex] = []
+        while retries and not tmp_11:
+            if retries < RETRIES_RECONNECT:
+                logger.warning("retry readSegment(%s,%s)", start, stop)
+                sleep(0.5)
+            retries -= 1
+            freq, tmp_11, tmp_21 = self.read_segment(start, stop)
+
+        if not tmp_11:
+            raise IOError("Invalid data during sweep")
+        return freq, tmp_11, tmp_21
+
     def read_segment(
         self, start: int, stop: int
+    ) -> tuple[list[int], list[complex], list[complex]]:
+        frequencies, values11, values21 = self.read_sweep(start, stop)
+        if frequencies and self.app.vna.validateInput:
+            values11, values21 = self.remeasure_glitches(
+                frequencies, values11, values21
+            )
+        return frequencies, values11, values21
+
+    def read_sweep(
+        self, start: int, stop: int
     ) -> tuple[list[int], list[complex], list[complex]]:
         logger.debug("Setting sweep range to %d to %d", start, stop)
         self.app.vna.setSweep(start, stop)
@@ -302,6 +642,114 @@ class SweepWorker(QThread):
             values11 = values21 = []
         return frequencies, values11, values21
 
+    def remeasure_glitches(
+        self,
+        frequencies: list[int],
+        values11: list[complex],
+        values21: list[complex],
+    ) -> tuple[list[complex], list[complex]]:
+        """re-measure the implausible points of a segment
+
+        A re-read point is kept if it is plausible now or reads the same
+        as before, like a real feature of the device under test. Points
+        still out of range after RETRIES_RECONNECT attempts fail the
+        sweep.
+        """
+        freq = np.array(frequencies, dtype=np.int64)
+        s11 = np.array(values11, dtype=np.complex128)
+        s21 = np.array(values21, dtype=np.complex128)
+        previous11, previous21 = self.previous_values(freq)
+        suspect = find_glitches(s11, previous11) | find_glitches(
+            s21, previous21
+        )
+        if not suspect.any():
+            return values11, values21
+        zero_span = False
+        for _ in range(RETRIES_RECONNECT):
+            if not suspect.any():
+                break
+            idx = np.flatnonzero(suspect)
+            logger.warning(
+                "Re-measuring %d implausible points from %d to %d",
+                len(idx),
+                freq[0],
+                freq[-1],
+            )
+            zero_span |= len(idx) == 1
+            new11, new21 = self.remeasure(freq, idx)
+            with np.errstate(invalid="ignore"):
+                agree = (np.abs(new11 - s11[idx]) <= GLITCH_JUMP) & (
+                    np.abs(new21 - s21[idx]) <= GLITCH_JUMP
+                )
+            s11[idx] = new11
+            s21[idx] = new21
+            glitches = find_glitches(s11, previous11) | find_glitches(
+                s21, previous21
+            )
+            suspect[idx] = (
+                (glitches[idx] & ~agree)
+                | out_of_range(new11)
+                | out_of_range(new21)
+            )
+        if zero_span:
+            # leave the device sweeping the segment
+            self.app.vna.setSweep(int(freq[0]), int(freq[-1]))
+        if (out_of_range(s11) | out_of_range(s21)).any():
+            logger.critical(
+                "Tried and failed to re-measure implausible points %s times."
+                " Giving up.",
+                RETRIES_RECONNECT,
+            )
+            raise IOError(
+                "Data outside expected valid ranges.\n\n"
+                "You can disable data validation on the"
+                " device settings screen."
+            )
+        if suspect.any():
+            logger.info("Keeping %d unsteady points", np.count_nonzero(suspect))
+        return s11.tolist(), s21.tolist()
+
+    def remeasure(
+        self, freq: np.ndarray, idx: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """s11 and s21 of the points idx of freq read again
+
+        The devices read a fixed number of points per sweep, so a single
+        point is read by a zero span sweep and more points by one sweep
+        of the whole segment.
+        """
+        if len(idx) == 1:
+            point = int(freq[idx[0]])
+            logger.debug("Setting sweep range to %d", point)
+            self.app.vna.setSweep(point, point)
+            values11 = self.read_data("data 0")
+            values21 = self.read_data("data 1")
+            if values11 and len(values11) == len(values21):
+                return (
+                    median_array(np.array(values11))[np.newaxis],
+                    median_array(np.array(values21))[np.newaxis],
+                )
+        else:
+            _, values11, values21 = self.read_sweep(
+                int(freq[0]), int(freq[-1])
+            )
+            if len(values11) == len(freq):
+                return np.array(values11)[idx], np.array(values21)[idx]
+        return np.full(len(idx), np.nan), np.full(len(idx), np.nan)
+
+    def previous_values(
+        self, freq: np.ndarray
+    ) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """raw s11 and s21 of the last sweep at freq, if measured there"""
+        with self.dataLock:
+            if not len(self.rawData11):
+                return None, None
+            idx = np.searchsorted(self.rawData11.freq, freq)
+            idx = np.minimum(idx, len(self.rawData11) - 1)
+            if not np.array_equal(self.rawData11.freq[idx], freq):
+                return None, None
+            return self.rawData11.z[idx], self.rawData21.z[idx]
+
     def read_data(self, data) -> list[complex]:
         logger.debug("Reading %s", data)
 
@@ -312,12 +760,7 @@ class SweepWorker(QThread):
             try:
                 result = vna.readValues(data)
                 logger.debug("Read %d values", len(result))
-                if vna.validateInput and any(
-                    abs(v) > VALUE_MAX for v in result
-                ):
-                    logger.error("Got a non plausible data: (%s)", data)
-                else:
-                    return result
+                return result
             except ValueError as exc:
                 logger.exception(
                     "An exception occurred reading %s: %s", data, exc
@@ -333,10 +776,7 @@ class SweepWorker(QThread):
         )
         raise IOError(
             f"Failed reading {data} {RETRIES_MAX} times.\n"
-            f"Data outside expected valid ranges,"
-            f" or in an unexpected format.\n\n"
-            f"You can disable data validation on the"
-            f"device settings screen."
+            f"Data in an unexpected format."
         )
 
     def gui_error(self, message: str) -> None:
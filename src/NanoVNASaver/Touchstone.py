@@ -16,19 +16,48 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
-import cmath
+import bz2
+import gzip
 import io
 import logging
-import math
-from operator import attrgetter
-from typing import Callable, ClassVar, List
+import lzma
+from collections.abc import Iterable, Sequence
+from itertools import islice, repeat
+from typing import Callable, ClassVar, TextIO
 
+import numpy as np
+import numpy.typing as npt
 from scipy.interpolate import interp1d
 
-from .RFTools import Datapoint
+from .RFTools import Datapoint, SweepData, as_sweep_data
 
 logger = logging.getLogger(__name__)
 
+# compressed files are recognized by the suffix after .s1p/.s2p
+COMPRESSION: dict[str, Callable[..., TextIO]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def open_file(filename: str, mode: str = "r") -> TextIO:
+    """open a touchstone file as text, compressed ones decoded on the fly"""
+    for suffix, opener in COMPRESSION.items():
+        if filename.lower().endswith(suffix):
+            return opener(filename, f"{mode}t", encoding="utf-8")
+    return open(filename, mode, encoding="utf-8")
+
+
+def file_patterns(*extensions: str) -> str:
+    """file dialog patterns for extensions and their compressed variants"""
+    return " ".join(
+        f"*.{ext}{suffix}"
+        for ext in extensions
+        for suffix in ("", *COMPRESSION)
+    )
+
 
 class Options:
     # Fun fact: In Touchstone 1.1 spec all params are optional unordered.
@@ -97,64 +126,77 @@ class Options:
 
 class Touchstone:
     FIELD_ORDER = ("11", "21", "12", "22")
+    READ_CHUNK = 16384
+    WRITE_CHUNK = 4096
 
     def __init__(self, filename: str = ""):
         self.filename = filename
-        self.sdata: List[List[Datapoint]] = [
-            [],
-            [],
-            [],
-            [],
+        self.sdata: list[SweepData] = [
+            SweepData(),
+            SweepData(),
+            SweepData(),
+            SweepData(),
         ]  # at max 4 data pairs
         self.comments: list[str] = []
         self.opts = Options()
-        self._interp: dict[str, dict[str, Callable]] = {}
+        self._interp: dict[str, tuple[SweepData, int, Callable]] = {}
 
     @property
-    def s11(self) -> list[Datapoint]:
+    def s11(self) -> SweepData:
         return self.s("11")
 
     @s11.setter
-    def s11(self, value: list[Datapoint]):
-        self.sdata[0] = value
+    def s11(self, value: Sequence[Datapoint]):
+        self.sdata[0] = as_sweep_data(value)
 
     @property
-    def s12(self) -> list[Datapoint]:
+    def s12(self) -> SweepData:
         return self.s("12")
 
     @s12.setter
-    def s12(self, value: list[Datapoint]):
-        self.sdata[2] = value
+    def s12(self, value: Sequence[Datapoint]):
+        self.sdata[2] = as_sweep_data(value)
 
     @property
-    def s21(self) -> list[Datapoint]:
+    def s21(self) -> SweepData:
         return self.s("21")
 
     @s21.setter
-    def s21(self, value: list[Datapoint]):
-        self.sdata[1] = value
+    def s21(self, value: Sequence[Datapoint]):
+        self.sdata[1] = as_sweep_data(value)
 
     @property
-    def s22(self) -> list[Datapoint]:
+    def s22(self) -> SweepData:
         return self.s("22")
 
     @s22.setter
-    def s22(self, value: list[Datapoint]):
-        self.sdata[3] = value
+    def s22(self, value: Sequence[Datapoint]):
+        self.sdata[3] = as_sweep_data(value)
 
     @property
     def r(self) -> int:
         return self.opts.resistance
 
-    def s(self, name: str) -> list[Datapoint]:
+    def s(self, name: str) -> SweepData:
         return self.sdata[Touchstone.FIELD_ORDER.index(name)]
 
     def s_freq(self, name: str, freq: int) -> Datapoint:
-        return Datapoint(
-            freq,
-            float(self._interp[name]["real"](freq)),
-            float(self._interp[name]["imag"](freq)),
-        )
+        z = complex(self._interpolator(name)(freq))
+        return Datapoint(freq, z.real, z.imag)
+
+    def resample(self, freq: npt.ArrayLike) -> list[SweepData]:
+        """Returns all s-parameters interpolated at the frequencies in freq
+
+        The result is in sdata order. Parameters without data stay empty,
+        values outside the data range are held at the nearest end point.
+        """
+        freq = np.asarray(freq, dtype=np.int64)
+        return [
+            SweepData(freq, self._interpolator(name)(freq))
+            if len(self.s(name))
+            else SweepData()
+            for name in Touchstone.FIELD_ORDER
+        ]
 
     def swap(self):
         self.sdata = [self.s22, self.s12, self.s21, self.s11]
@@ -167,57 +209,28 @@ class Touchstone:
 
     def gen_interpolation(self):
         for i in Touchstone.FIELD_ORDER:
-            freq = []
-            real = []
-            imag = []
-
-            for dp in self.s(i):
-                freq.append(dp.freq)
-                real.append(dp.re)
-                imag.append(dp.im)
-
-            self._interp[i] = {
-                "real": interp1d(
-                    freq,
-                    real,
-                    kind="slinear",
-                    bounds_error=False,
-                    fill_value=(real[0], real[-1]),
-                ),
-                "imag": interp1d(
-                    freq,
-                    imag,
-                    kind="slinear",
-                    bounds_error=False,
-                    fill_value=(imag[0], imag[-1]),
-                ),
-            }
+            if len(self.s(i)):
+                self._interpolator(i)
 
     def gen_interpolation_s11(self):
-        freq = []
-        real = []
-        imag = []
-        for dp in self.s("11"):
-            freq.append(dp.freq)
-            real.append(dp.re)
-            imag.append(dp.im)
-
-        self._interp["11"] = {
-            "real": interp1d(
-                freq,
-                real,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(real[0], real[-1]),
-            ),
-            "imag": interp1d(
-                freq,
-                imag,
-                kind="slinear",
-                bounds_error=False,
-                fill_value=(imag[0], imag[-1]),
-            ),
-        }
+        self._interpolator("11")
+
+    def _interpolator(self, name: str) -> Callable:
+        """interpolator of parameter name, rebuilt after its data changed"""
+        data = self.s(name)
+        if (cached := self._interp.get(name)) is not None:
+            cached_data, generation, interp = cached
+            if cached_data is data and generation == data.generation:
+                return interp
+        interp = interp1d(
+            data.freq,
+            data.z,
+            kind="slinear",
+            bounds_error=False,
+            fill_value=(data.z[0], data.z[-1]),
+        )
+        self._interp[name] = (data, data.generation, interp)
+        return interp
 
     def _parse_comments(self, fp) -> str:
         for ln in fp:
@@ -229,82 +242,170 @@ class Touchstone:
             return line
         return ""
 
-    def _append_line_data(self, freq: int, data: list[str]):
-        data_list = iter(self.sdata)
-        vals = iter(data)
-        for v in vals:
-            if self.opts.format == "ri":
-                next(data_list).append(
-                    Datapoint(freq, float(v), float(next(vals)))
-                )
-            if self.opts.format == "ma":
-                z = cmath.rect(float(v), math.radians(float(next(vals))))
-                next(data_list).append(Datapoint(freq, z.real, z.imag))
-            if self.opts.format == "db":
-                z = cmath.rect(
-                    10 ** (float(v) / 20), math.radians(float(next(vals)))
-                )
-                next(data_list).append(Datapoint(freq, z.real, z.imag))
+    def _append_data(self, freqs: Sequence[int], values: np.ndarray):
+        if not len(freqs):
+            return
+        first, second = values[:, 0::2], values[:, 1::2]
+        if self.opts.format == "ri":
+            z = first + 1j * second
+        else:
+            mag = 10 ** (first / 20) if self.opts.format == "db" else first
+            z = mag * np.exp(1j * np.radians(second))
+        for i in range(z.shape[1]):
+            self.sdata[i] = self.sdata[i].concat(SweepData(freqs, z[:, i]))
 
     def load(self):
         logger.info("Attempting to open file %s", self.filename)
         try:
-            with open(self.filename, encoding="utf-8") as infile:
-                self.loads(infile.read())
-        except IOError as e:
+            with open_file(self.filename, "r") as infile:
+                self.read(infile)
+        except (IOError, EOFError, lzma.LZMAError) as e:
             logger.exception("Failed to open %s: %s", self.filename, e)
 
     def loads(self, s: str):
         """Parse touchstone 1.1 string input
         appends to existing sdata if Touchstone object exists
         """
+        with io.StringIO(s) as file:
+            self.read(file)
+
+    def read(self, fp: TextIO):
+        """Parse touchstone 1.1 input from fp in chunks of lines
+        appends to existing sdata if Touchstone object exists
+        """
         try:
-            self._loads(s)
+            self._read(fp)
         except TypeError as e:
             logger.exception("Failed to parse %s: %s", self.filename, e)
 
-    def _loads(self, s: str):
-        need_reorder = False
-        with io.StringIO(s) as file:
-            opts_line = self._parse_comments(file)
-            self.opts.parse(opts_line)
+    def _read(self, fp: TextIO):
+        opts_line = self._parse_comments(fp)
+        self.opts.parse(opts_line)
 
-            prev_freq = 0.0
-            prev_len = 0
-            for ln in file:
+        prev_freq = 0
+        width = 0
+        need_reorder = False
+        freqs: list[np.ndarray] = []
+        values: list[np.ndarray] = []
+        while lines := list(islice(fp, self.READ_CHUNK)):
+            try:
+                chunk = self._parse_bulk(lines, prev_freq, width)
+            except ValueError:
+                logger.debug("Bulk parsing failed, parsing line by line")
+                # reports what's wrong or handles what numpy doesn't parse
+                chunk = self._parse_lines(lines, prev_freq, width)
+            chunk_freqs, chunk_values, unordered = chunk
+            need_reorder |= unordered
+            if len(chunk_freqs):
+                prev_freq = int(chunk_freqs[-1])
+                width = chunk_values.shape[1]
+                freqs.append(chunk_freqs)
+                values.append(chunk_values)
+        # data is only added once the whole input is parsed
+        if freqs:
+            self._append_data(np.concatenate(freqs), np.concatenate(values))
+        if need_reorder:
+            logger.warning("Reordering data")
+            for datalist in self.sdata:
+                datalist.sort()
+
+    def _parse_bulk(
+        self, lines: list[str], prev_freq: int, width: int
+    ) -> tuple[np.ndarray, np.ndarray, bool]:
+        """parse the data lines as one block of numbers
+
+        Raises ValueError before changing anything if the data isn't
+        well formed or has another number of pairs than width.
+        """
+        data: list[str] = []
+        # comment lines after the header with the number of rows before
+        comments: list[tuple[int, str]] = []
+        if any("!" in ln for ln in lines):
+            for ln in lines:
                 line = ln.strip()
-                # ignore empty lines (even if not specified)
-                if line == "":
+                if not line:
                     continue
-                # accept comment lines after header
-                if line.startswith("!"):
-                    logger.warning("Comment after header: %s", line)
-                    self.comments.append(line)
+                if line[0] == "!":
+                    comments.append((len(data), line))
                     continue
+                data.append(line)
+            values = (
+                np.loadtxt(data, dtype=float, comments="!", ndmin=2)
+                if data
+                else np.empty((0, 1))
+            )
+        else:
+            values = (
+                np.loadtxt(lines, dtype=float, comments=None, ndmin=2)
+                if any(ln.strip() for ln in lines)
+                else np.empty((0, 1))
+            )
+        if values.shape[1] % 2 != 1:
+            raise ValueError("Data values aren't pairs")
+        if len(values) and width and values.shape[1] - 1 != width:
+            raise ValueError("Inconsistent number of pairs")
+        freqs = np.round(values[:, 0] * self.opts.factor).astype(np.int64)
+        unordered = np.flatnonzero(
+            freqs <= np.concatenate(([prev_freq], freqs[:-1]))
+        ).tolist()
+        if unordered and not data:
+            data = [line for ln in lines if (line := ln.strip())]
+
+        # report in file order, as the line by line parser does
+        for _, is_data, line in sorted(
+            [(row, False, line) for row, line in comments]
+            + [(row, True, data[row]) for row in unordered],
+            key=lambda event: event[:2],
+        ):
+            if is_data:
+                logger.warning("Frequency not ascending: %s", line)
+            else:
+                logger.warning("Comment after header: %s", line)
+                self.comments.append(line)
+        return freqs, values[:, 1:], bool(unordered)
 
-                # ignore comments at data end
-                data = line.split("!")[0].split()
-                freq, data = round(float(data[0]) * self.opts.factor), data[1:]
-                data_len = len(data)
-                if data_len % 2 != 0:
-                    raise TypeError("Data values aren't pairs: " + line)
-
-                # consistency checks
-                if freq <= prev_freq:
-                    logger.warning("Frequency not ascending: %s", line)
-                    need_reorder = True
-                prev_freq = freq
-
-                if prev_len == 0:
-                    prev_len = data_len
-                elif data_len != prev_len:
-                    raise TypeError(f"Inconsistent number of pairs: {line}")
-
-                self._append_line_data(freq, data)
-            if need_reorder:
-                logger.warning("Reordering data")
-                for datalist in self.sdata:
-                    datalist.sort(key=attrgetter("freq"))
+    def _parse_lines(
+        self, lines: list[str], prev_freq: int, prev_len: int
+    ) -> tuple[np.ndarray, np.ndarray, bool]:
+        need_reorder = False
+        freqs: list[int] = []
+        rows: list[list[float]] = []
+        for ln in lines:
+            line = ln.strip()
+            # ignore empty lines (even if not specified)
+            if line == "":
+                continue
+            # accept comment lines after header
+            if line.startswith("!"):
+                logger.warning("Comment after header: %s", line)
+                self.comments.append(line)
+                continue
+
+            # ignore comments at data end
+            data = line.split("!")[0].split()
+            freq, data = round(float(data[0]) * self.opts.factor), data[1:]
+            data_len = len(data)
+            if data_len % 2 != 0:
+                raise TypeError("Data values aren't pairs: " + line)
+
+            # consistency checks
+            if freq <= prev_freq:
+                logger.warning("Frequency not ascending: %s", line)
+                need_reorder = True
+            prev_freq = freq
+
+            if prev_len == 0:
+                prev_len = data_len
+            elif data_len != prev_len:
+                raise TypeError(f"Inconsistent number of pairs: {line}")
+
+            freqs.append(freq)
+            rows.append([float(v) for v in data])
+        return (
+            np.array(freqs, dtype=np.int64),
+            np.array(rows, dtype=np.float64).reshape(len(rows), prev_len),
+            need_reorder,
+        )
 
     def save(self, nr_params: int = 1):
         """Save touchstone data to file.
@@ -314,24 +415,53 @@ class Touchstone:
         """
 
         logger.info("Attempting to open file %s for writing", self.filename)
-        with open(self.filename, "w", encoding="utf-8") as outfile:
-            outfile.write(self.saves(nr_params))
+        with open_file(self.filename, "w") as outfile:
+            self.write(outfile, nr_params)
 
     def saves(self, nr_params: int = 1) -> str:
         """Returns touchstone data as string.
 
+        Args:
+            nr_params: Number of s-parameters. 1 for s1p, 4 for s2p
+        """
+        buffer = io.StringIO()
+        self.write(buffer, nr_params)
+        return buffer.getvalue()
+
+    def write(self, fp: TextIO, nr_params: int = 1):
+        """Write touchstone data to fp in chunks of rows.
+
+        Parameters without data are written as zero columns.
+
         Args:
             nr_params: Number of s-parameters. 1 for s1p, 4 for s2p
         """
         assert nr_params in {1, 4}
 
-        ts_str = "# HZ S RI R 50\n"
-        for i, dp_s11 in enumerate(self.s11):
-            ts_str += f"{dp_s11.freq} {dp_s11.re} {dp_s11.im}"
-            for j in range(1, nr_params):
-                dp = self.sdata[j][i]
-                if dp.freq != dp_s11.freq:
-                    raise LookupError("Frequencies of sdata not correlated")
-                ts_str += f" {dp.re} {dp.im}"
-            ts_str += "\n"
-        return ts_str
+        freq = self.s11.freq
+        for data in self.sdata[1:nr_params]:
+            if len(data) and not np.array_equal(data.freq, freq):
+                raise LookupError("Frequencies of sdata not correlated")
+
+        fp.write("# HZ S RI R 50\n")
+        for start in range(0, len(freq), self.WRITE_CHUNK):
+            chunk = slice(start, start + self.WRITE_CHUNK)
+            chunk_freq = freq[chunk].tolist()
+            columns: list[Iterable] = [chunk_freq]
+            for data in self.sdata[:nr_params]:
+                if len(data):
+                    columns.append(data.re[chunk].tolist())
+                    columns.append(data.im[chunk].tolist())
+                else:
+                    columns.extend(
+                        (
+                            repeat(0.0, len(chunk_freq)),
+                            repeat(0.0, len(chunk_freq)),
+                        )
+                    )
+            fp.write(
+                "".join(
+                    f"{' '.join(map(str, row))}\n"
+                    for row in zip(*columns, strict=True)
+                )
+            )
@@ -0,0 +1,230 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import glob
+import logging
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import NamedTuple
+
+import numpy as np
+
+from .RFTools import SweepData, gain_array, vswr_array
+from .Touchstone import COMPRESSION, Touchstone
+
+logger = logging.getLogger(__name__)
+
+TOUCHSTONE_SUFFIXES = tuple(
+    f".s{ports}p{suffix}" for ports in (1, 2) for suffix in ("", *COMPRESSION)
+)
+
+
+class FileSummary(NamedTuple):
+    filename: str
+    points: int
+    min_vswr: float
+    min_vswr_freq: int
+    min_gain: float
+    max_gain: float
+
+
+def find_files(pattern: str) -> list[str]:
+    """Touchstone files in directory pattern or matching the glob pattern"""
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name)
+            for name in os.listdir(pattern)
+            if name.lower().endswith(TOUCHSTONE_SUFFIXES)
+        )
+    return sorted(glob.glob(pattern))
+
+
+def load_arrays(filename: str) -> tuple[str, np.ndarray, np.ndarray, str]:
+    """frequencies and s11, s21 values of a Touchstone file
+
+    Runs in the worker processes, so only arrays and strings are returned.
+    The values have no s21 row for one port files. The last element is
+    the error message if the file was unusable.
+    """
+    empty = np.empty(0, np.int64), np.empty((2, 0))
+    ts = Touchstone(filename)
+    try:
+        ts.load()
+    except (ValueError, TypeError, OSError) as e:
+        return filename, *empty, str(e)
+    if not len(ts.s11):
+        return filename, *empty, "No data"
+    if len(ts.s21) != len(ts.s11):
+        return filename, ts.s11.freq, ts.s11.z[np.newaxis], ""
+    return filename, ts.s11.freq, np.stack((ts.s11.z, ts.s21.z)), ""
+
+
+def _interp(freq: np.ndarray, xp: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """z resampled to freq, values outside xp held at the end points"""
+    result = np.empty(len(freq), dtype=np.complex128)
+    result.real = np.interp(freq, xp, z.real)
+    result.imag = np.interp(freq, xp, z.imag)
+    return result
+
+
+@dataclass
+class BatchResult:
+    """s11 and s21 of many files on the frequency grid of the first one
+
+    s11 and s21 are 2-D arrays with one row per loaded file. The s21 rows
+    of files without s21 are zero and has_s21 is False for them.
+    """
+
+    filenames: list[str]
+    freq: np.ndarray
+    s11: np.ndarray
+    s21: np.ndarray
+    has_s21: np.ndarray
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    @property
+    def files_per_second(self) -> float:
+        files = len(self.filenames) + len(self.failed)
+        return files / self.elapsed if self.elapsed > 0 else 0.0
+
+    def sweep_data(self, i: int) -> tuple[SweepData, SweepData]:
+        """s11 and s21 of the file number i"""
+        return (
+            SweepData(self.freq, self.s11[i]),
+            SweepData(self.freq, self.s21[i]),
+        )
+
+    def mean(self) -> tuple[SweepData, SweepData]:
+        """complex mean of s11 and s21 over all files"""
+        s21 = self.s21[self.has_s21]
+        return (
+            SweepData(self.freq, self.s11.mean(axis=0)),
+            SweepData(
+                self.freq,
+                s21.mean(axis=0) if len(s21) else np.zeros(len(self.freq)),
+            ),
+        )
+
+    def gain_statistics(self) -> dict[str, np.ndarray]:
+        """per frequency mean, std, min and max of the s21 gain in dB
+
+        Only files with s21 are included, without any they are nan.
+        """
+        if not self.has_s21.any():
+            return dict.fromkeys(
+                ("mean", "std", "min", "max"), np.full(len(self.freq), np.nan)
+            )
+        gain = gain_array(self.s21[self.has_s21])
+        return {
+            "mean": gain.mean(axis=0),
+            "std": gain.std(axis=0),
+            "min": gain.min(axis=0),
+            "max": gain.max(axis=0),
+        }
+
+    def summary(self) -> list[FileSummary]:
+        if not len(self):
+            return []
+        vswr = vswr_array(self.s11)
+        idx = np.argmin(vswr, axis=1)
+        # nan for the files without s21
+        gain = np.full(self.s21.shape, np.nan)
+        gain[self.has_s21] = gain_array(self.s21[self.has_s21])
+        rows = np.arange(len(self))
+        return [
+            FileSummary(*values)
+            for values in zip(
+                self.filenames,
+                [len(self.freq)] * len(self),
+                vswr[rows, idx].tolist(),
+                self.freq[idx].tolist(),
+                gain.min(axis=1).tolist(),
+                gain.max(axis=1).tolist(),
+                strict=True,
+            )
+        ]
+
+
+def load_batch(
+    filenames: Sequence[str],
+    workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> BatchResult:
+    """parse filenames in a pool of worker processes
+
+    Files with another frequency grid than the first one are resampled
+    onto its grid. progress gets called with the number of files done
+    and the total number.
+    """
+    start = perf_counter()
+    loaded: list[str] = []
+    failed: list[tuple[str, str]] = []
+    freq = np.empty(0, dtype=np.int64)
+    rows11: list[np.ndarray] = []
+    rows21: list[np.ndarray] = []
+    has_s21: list[bool] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            load_arrays,
+            filenames,
+            chunksize=max(1, len(filenames) // (4 * (os.cpu_count() or 1))),
+        )
+        for done, (filename, file_freq, values, error) in enumerate(
+            results, 1
+        ):
+            if error:
+                logger.warning("Skipping %s: %s", filename, error)
+                failed.append((filename, error))
+            else:
+                if not loaded:
+                    freq = file_freq
+                rows = (
+                    values
+                    if np.array_equal(file_freq, freq)
+                    else [_interp(freq, file_freq, row) for row in values]
+                )
+                rows11.append(rows[0])
+                rows21.append(rows[1] if len(rows) > 1 else np.zeros(len(freq)))
+                has_s21.append(len(rows) > 1)
+                loaded.append(filename)
+            if progress is not None:
+                progress(done, len(filenames))
+    empty = np.empty((0, len(freq)), dtype=np.complex128)
+    result = BatchResult(
+        loaded,
+        freq,
+        np.array(rows11, dtype=np.complex128) if rows11 else empty,
+        np.array(rows21, dtype=np.complex128) if rows21 else empty,
+        np.array(has_s21, dtype=bool),
+        failed,
+        perf_counter() - start,
+    )
+    logger.info(
+        "Loaded %d files in %.2fs (%.1f files/s)",
+        len(result) + len(failed),
+        result.elapsed,
+        result.files_per_second,
+    )
+    return result
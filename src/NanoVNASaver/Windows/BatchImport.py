@@ -0,0 +1,212 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
+from math import isfinite
+from typing import TYPE_CHECKING
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from ..Formatting import format_frequency, format_gain, format_vswr
+from ..Touchstone import file_patterns
+from ..TouchstoneBatch import BatchResult, find_files, load_batch
+from .Defaults import make_scrollable
+from .ui import get_window_icon
+
+if TYPE_CHECKING:
+    from ..NanoVNASaver.NanoVNASaver import NanoVNASaver as vna_app
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = ("File", "Points", "Min VSWR", "@", "Min S21", "Max S21")
+
+
+class BatchSignals(QtCore.QObject):
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+
+class BatchTask(QtCore.QRunnable):
+    """loads the files of a batch in the thread pool"""
+
+    def __init__(self, filenames: list[str]):
+        super().__init__()
+        self.filenames = filenames
+        self.signals = BatchSignals()
+
+    def run(self):
+        try:
+            result = load_batch(
+                self.filenames, progress=self.signals.progress.emit
+            )
+        except (OSError, BrokenProcessPool) as exc:
+            # e.g. a worker process killed for lack of memory
+            logger.exception("Batch import failed: %s", exc)
+            self.signals.failed.emit(str(exc) or type(exc).__name__)
+            return
+        self.signals.finished.emit(result)
+
+
+class BatchImportWindow(QtWidgets.QWidget):
+    def __init__(self, app: "vna_app"):
+        super().__init__()
+        self.app = app
+        self.result: BatchResult | None = None
+        self._task: BatchTask | None = None
+
+        self.setWindowTitle("Batch import")
+        self.setWindowIcon(get_window_icon())
+        self.setMinimumWidth(600)
+        QtGui.QShortcut(QtCore.Qt.Key.Key_Escape, self, self.hide)
+
+        layout = QtWidgets.QVBoxLayout()
+        make_scrollable(self, layout)
+
+        load_box = QtWidgets.QGroupBox("Load files")
+        load_layout = QtWidgets.QFormLayout(load_box)
+        btn_load_directory = QtWidgets.QPushButton("Load directory ...")
+        btn_load_directory.clicked.connect(self.loadDirectory)
+        btn_load_files = QtWidgets.QPushButton("Load files ...")
+        btn_load_files.clicked.connect(self.loadFiles)
+        self.pattern_input = QtWidgets.QLineEdit()
+        self.pattern_input.setPlaceholderText("/path/to/batch/*.s2p")
+        self.pattern_input.returnPressed.connect(self.loadPattern)
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.status_label = QtWidgets.QLabel("No files loaded")
+        load_layout.addRow(btn_load_directory)
+        load_layout.addRow(btn_load_files)
+        load_layout.addRow("Glob pattern", self.pattern_input)
+        load_layout.addRow(self.progress_bar)
+        load_layout.addRow(self.status_label)
+        layout.addWidget(load_box)
+
+        summary_box = QtWidgets.QGroupBox("Summary")
+        summary_layout = QtWidgets.QVBoxLayout(summary_box)
+        self.summary_table = QtWidgets.QTableWidget(0, len(SUMMARY_COLUMNS))
+        self.summary_table.setHorizontalHeaderLabels(SUMMARY_COLUMNS)
+        self.summary_table.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        self.summary_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.summary_table.setSortingEnabled(True)
+        self.summary_table.horizontalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.ResizeToContents
+        )
+        summary_layout.addWidget(self.summary_table)
+        btn_layout = QtWidgets.QHBoxLayout()
+        btn_mean_reference = QtWidgets.QPushButton("Mean as reference")
+        btn_mean_reference.clicked.connect(self.setMeanReference)
+        btn_selected_reference = QtWidgets.QPushButton("Selected as reference")
+        btn_selected_reference.clicked.connect(self.setSelectedReference)
+        btn_layout.addWidget(btn_mean_reference)
+        btn_layout.addWidget(btn_selected_reference)
+        summary_layout.addLayout(btn_layout)
+        layout.addWidget(summary_box)
+
+    def loadDirectory(self):
+        directory = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Load Touchstone files from"
+        )
+        if directory != "":
+            self.load(find_files(directory))
+
+    def loadFiles(self):
+        filenames, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            filter=f"Touchstone Files ({file_patterns('s1p', 's2p')});;"
+            "All files (*.*)"
+        )
+        if filenames:
+            self.load(filenames)
+
+    def loadPattern(self):
+        if pattern := self.pattern_input.text().strip():
+            self.load(find_files(pattern))
+
+    def load(self, filenames: list[str]):
+        if not filenames:
+            self.status_label.setText("No Touchstone files found")
+            return
+        if self._task is not None:
+            logger.debug("Batch import already running")
+            return
+        self.status_label.setText(f"Loading {len(filenames)} files ...")
+        self.progress_bar.setValue(0)
+        self._task = BatchTask(filenames)
+        self._task.signals.progress.connect(self.updateProgress)
+        self._task.signals.finished.connect(self.loaded)
+        self._task.signals.failed.connect(self.loadFailed)
+        self.app.threadpool.start(self._task)
+
+    def updateProgress(self, done: int, total: int):
+        self.progress_bar.setValue(int(100 * done / total))
+
+    def loadFailed(self, message: str):
+        self._task = None
+        self.status_label.setText("Batch import failed")
+        self.app.showError(f"Batch import failed: {message}")
+
+    def loaded(self, result: BatchResult):
+        self._task = None
+        self.result = result
+        self.status_label.setText(
+            f"{len(result)} files in {result.elapsed:.2f}s"
+            f" ({result.files_per_second:.1f} files/s)"
+            + (f", {len(result.failed)} failed" if result.failed else "")
+        )
+        self.updateSummary()
+
+    def updateSummary(self):
+        table = self.summary_table
+        table.setSortingEnabled(False)
+        summary = self.result.summary() if self.result else []
+        table.setRowCount(len(summary))
+        for row, line in enumerate(summary):
+            items = (
+                os.path.basename(line.filename),
+                str(line.points),
+                format_vswr(line.min_vswr),
+                format_frequency(line.min_vswr_freq),
+                # no gain for files without s21
+                format_gain(line.min_gain) if isfinite(line.min_gain) else "-",
+                format_gain(line.max_gain) if isfinite(line.max_gain) else "-",
+            )
+            for column, text in enumerate(items):
+                item = QtWidgets.QTableWidgetItem(text)
+                # keeps the file of the row when sorted
+                item.setData(QtCore.Qt.ItemDataRole.UserRole, row)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+
+    def setMeanReference(self):
+        if not self.result or not len(self.result):
+            return
+        s11, s21 = self.result.mean()
+        self.app.setReference(s11, s21, f"mean of {len(self.result)} files")
+
+    def setSelectedReference(self):
+        if not self.result or not (items := self.summary_table.selectedItems()):
+            return
+        row = items[0].data(QtCore.Qt.ItemDataRole.UserRole)
+        self.app.setReference(
+            *self.result.sweep_data(row), self.result.filenames[row]
+        )
@@ -22,9 +22,9 @@ from functools import partial
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..Calibration import Calibration
+from ..Calibration import CalElement, Calibration
 from ..Settings.Sweep import SweepMode
-from ..Touchstone import Touchstone
+from ..Touchstone import Touchstone, file_patterns
 from .Defaults import make_scrollable
 from .ui import get_window_icon
 
@@ -42,6 +42,28 @@ def getFloatValue(text: str) -> float:
         return 0.0
 
 
+class CalculationSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object, str)
+
+
+class CalculationTask(QtCore.QRunnable):
+    """calculates error terms in the thread pool"""
+
+    def __init__(self, calibration: Calibration):
+        super().__init__()
+        self.calibration = calibration
+        self.signals = CalculationSignals()
+
+    def run(self):
+        try:
+            self.calibration.calc_corrections()
+        except ValueError as exc:
+            self.signals.failed.emit(self.calibration, str(exc))
+            return
+        self.signals.finished.emit(self.calibration)
+
+
 class CalibrationWindow(QtWidgets.QWidget):
     next_step = -1
 
@@ -49,6 +71,9 @@ class CalibrationWindow(QtWidgets.QWidget):
         super().__init__()
         self.app = app
 
+        # calculation running in background, older ones get discarded
+        self._calculation: CalculationTask | None = None
+
         self.setMinimumWidth(450)
         self.setWindowTitle("Calibration")
         self.setWindowIcon(get_window_icon())
@@ -525,6 +550,7 @@ class CalibrationWindow(QtWidgets.QWidget):
         self.listCalibrationStandards()
 
     def reset(self):
+        self._calculation = None
         self.app.calibration = Calibration()
         for label in self.cal_label.values():
             label.setText("Uncalibrated")
@@ -535,46 +561,15 @@ class CalibrationWindow(QtWidgets.QWidget):
         self.open_touchstone = None
         self.load_touchstone = None
 
-        if len(self.app.worker.rawData11) > 0:
-            # There's raw data, so we can get corrected data
-            logger.debug("Saving and displaying raw data.")
-            self.app.saveData(
-                self.app.worker.rawData11,
-                self.app.worker.rawData21,
-                self.app.sweepSource,
-            )
-            self.app.worker.signals.updated.emit()
+        self.app.worker.reapply_calibration()
         self.app.sweep_control.update_text()
 
     def setOffsetDelay(self, value: float):
         logger.debug("New offset delay value: %f ps", value)
         self.app.worker.offsetDelay = value / 1e12
-        if len(self.app.worker.rawData11) > 0:
-            # There's raw data, so we can get corrected data
-            logger.debug("Applying new offset to existing sweep data.")
-            (
-                self.app.worker.data11,
-                self.app.worker.data21,
-            ) = self.app.worker.applyCalibration(
-                self.app.worker.rawData11, self.app.worker.rawData21
-            )
-            logger.debug("Saving and displaying corrected data.")
-            self.app.saveData(
-                self.app.worker.data11,
-                self.app.worker.data21,
-                self.app.sweepSource,
-            )
-            self.app.worker.signals.updated.emit()
+        self.app.worker.reapply_calibration()
 
     def calculate(self):
-        cal_element = self.app.calibration.cal_element
-        if self.app.sweep_control.btn_stop.isEnabled():
-            self.app.showError(
-                "Unable to apply calibration while a sweep is running."
-                " Please stop the sweep and try again."
-            )
-            return
-
         if not self.app.calibration.isValid1Port():
             self.app.showError(
                 "Not enough data to apply calibration."
@@ -582,6 +577,57 @@ class CalibrationWindow(QtWidgets.QWidget):
             )
             return
 
+        # calculate a copy off the GUI thread, a running sweep keeps
+        # using the current calibration until the new one gets swapped in
+        calibration = self.app.calibration.copy()
+        self.update_cal_element(calibration.cal_element)
+
+        logger.debug("Attempting calibration calculation.")
+        self._calculation = CalculationTask(calibration)
+        self._calculation.signals.finished.connect(self.calculated)
+        self._calculation.signals.failed.connect(self.calculation_failed)
+        self.calibration_status_label.setText("Calculating calibration...")
+        self.app.threadpool.start(self._calculation)
+
+    def calculated(self, calibration: Calibration):
+        if (
+            self._calculation is None
+            or self._calculation.calibration is not calibration
+        ):
+            logger.debug("Discarding outdated calibration calculation.")
+            return
+        self._calculation = None
+        self.app.calibration = calibration
+        self.calibration_status_label.setText(
+            _format_cal_label(calibration.size(), "Application calibration")
+        )
+        if self.use_ideal_values.isChecked():
+            self.calibration_source_label.setText(calibration.source)
+        else:
+            self.calibration_source_label.setText(
+                f"{calibration.source} (Standards: Custom)"
+            )
+        self.app.worker.reapply_calibration()
+        self.app.sweep_control.update_text()
+
+    def calculation_failed(self, calibration: Calibration, message: str):
+        if (
+            self._calculation is None
+            or self._calculation.calibration is not calibration
+        ):
+            return
+        self._calculation = None
+        # showError here hides the calibration window,
+        # so we need to pop up our own
+        self.calibration_status_label.setText("Applying calibration failed.")
+        self.calibration_source_label.setText(calibration.source)
+        self.app.showError(
+            f"{message} Please complete SOL calibration and try again."
+        )
+        self.reset()
+
+    def update_cal_element(self, cal_element: CalElement):
+        """set calibration standards as configured in the window"""
         cal_element.short_state = "IDEAL"
         cal_element.open_state = "IDEAL"
         cal_element.load_state = "IDEAL"
@@ -657,60 +703,21 @@ class CalibrationWindow(QtWidgets.QWidget):
                 getFloatValue(self.through_length.text()) / 1.0e12
             )
 
-        logger.debug("Attempting calibration calculation.")
-        try:
-            self.app.calibration.calc_corrections()
-            self.calibration_status_label.setText(
-                _format_cal_label(
-                    self.app.calibration.size(), "Application calibration"
-                )
-            )
-            if self.use_ideal_values.isChecked():
-                self.calibration_source_label.setText(
-                    self.app.calibration.source
-                )
-            else:
-                self.calibration_source_label.setText(
-                    f"{self.app.calibration.source} (Standards: Custom)"
-                )
-
-            if self.app.worker.rawData11:
-                # There's raw data, so we can get corrected data
-                logger.debug("Applying calibration to existing sweep data.")
-                (
-                    self.app.worker.data11,
-                    self.app.worker.data21,
-                ) = self.app.worker.applyCalibration(
-                    self.app.worker.rawData11, self.app.worker.rawData21
-                )
-                logger.debug("Saving and displaying corrected data.")
-                self.app.saveData(
-                    self.app.worker.data11,
-                    self.app.worker.data21,
-                    self.app.sweepSource,
-                )
-                self.app.worker.signals.updated.emit()
-
-        except ValueError as e:
-            # showError here hides the calibration window,
-            # so we need to pop up our own
-            self.calibration_status_label.setText(
-                "Applying calibration failed."
-            )
-            self.calibration_source_label.setText(self.app.calibration.source)
-            self.app.showError(
-                f"{e} Please complete SOL calibration and try again."
-            )
-            self.reset()
-            return
-        self.app.sweep_control.update_text()
-
     def loadCalibration(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
             filter="Calibration Files (*.cal);;All files (*.*)"
         )
         if filename:
-            self.app.calibration.load(filename)
+            cal_element = CalElement()
+            self.update_cal_element(cal_element)
+            try:
+                self.app.calibration = self.app.calibration_library.get(
+                    filename, cal_element
+                )
+            except ValueError:
+                # incomplete calibration, calculate() tells the user why
+                self.app.calibration = Calibration()
+                self.app.calibration.load(filename)
         if not self.app.calibration.isValid1Port():
             return
         for i, name in enumerate(
@@ -1045,7 +1052,10 @@ class CalibrationWindow(QtWidgets.QWidget):
 
     def select_file_open(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Select Open S1P", "", "Touchstone Files (*.s1p)"
+            self,
+            "Select Open S1P",
+            "",
+            f"Touchstone Files ({file_patterns('s1p')})",
         )
         if filename != "":
             self.open_touchstone = Touchstone(filename)
@@ -1053,7 +1063,10 @@ class CalibrationWindow(QtWidgets.QWidget):
 
     def select_file_short(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Select Short S1P", "", "Touchstone Files (*.s1p)"
+            self,
+            "Select Short S1P",
+            "",
+            f"Touchstone Files ({file_patterns('s1p')})",
         )
         if filename != "":
             self.short_touchstone = Touchstone(filename)
@@ -1061,7 +1074,10 @@ class CalibrationWindow(QtWidgets.QWidget):
 
     def select_file_load(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Select Load S1P", "", "Touchstone Files (*.s1p)"
+            self,
+            "Select Load S1P",
+            "",
+            f"Touchstone Files ({file_patterns('s1p')})",
         )
         if filename != "":
             self.load_touchstone = Touchstone(filename)
@@ -17,12 +17,14 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+import os
 from typing import TYPE_CHECKING
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..RFTools import Datapoint
-from ..Touchstone import Touchstone
+from ..RFTools import SweepData
+from ..SweepArchive import SweepArchive
+from ..Touchstone import Touchstone, file_patterns
 from .Defaults import make_scrollable
 from .ui import get_window_icon
 
@@ -54,6 +56,11 @@ class FilesWindow(QtWidgets.QWidget):
         btn_load_reference.clicked.connect(self.loadReferenceFile)
         load_file_control_layout.addRow(btn_load_sweep)
         load_file_control_layout.addRow(btn_load_reference)
+        btn_batch_import = QtWidgets.QPushButton("Batch import ...")
+        btn_batch_import.clicked.connect(
+            lambda: self.app.display_window("batch")
+        )
+        load_file_control_layout.addRow(btn_batch_import)
 
         file_window_layout.addWidget(load_file_control_box)
 
@@ -71,6 +78,24 @@ class FilesWindow(QtWidgets.QWidget):
 
         file_window_layout.addWidget(save_file_control_box)
 
+        archive_control_box = QtWidgets.QGroupBox("Sweep archive")
+        archive_control_box.setMaximumWidth(300)
+        archive_control_layout = QtWidgets.QFormLayout(archive_control_box)
+
+        self.archive_label = QtWidgets.QLabel("Not recording")
+        archive_control_layout.addRow(self.archive_label)
+        btn_record = QtWidgets.QPushButton("Record sweeps ...")
+        btn_record.clicked.connect(self.recordArchive)
+        archive_control_layout.addRow(btn_record)
+        btn_stop_record = QtWidgets.QPushButton("Stop recording")
+        btn_stop_record.clicked.connect(self.stopArchive)
+        archive_control_layout.addRow(btn_stop_record)
+        btn_export_archive = QtWidgets.QPushButton("Export archive (S2P) ...")
+        btn_export_archive.clicked.connect(self.exportArchive)
+        archive_control_layout.addRow(btn_export_archive)
+
+        file_window_layout.addWidget(archive_control_box)
+
         btn_open_file_window = QtWidgets.QPushButton("Files ...")
         btn_open_file_window.clicked.connect(
             lambda: self.app.display_window("file")
@@ -92,12 +117,14 @@ class FilesWindow(QtWidgets.QWidget):
         if nr_params == 1:
             filedialog.setDefaultSuffix("s1p")
             filedialog.setNameFilter(
-                "Touchstone 1-Port Files (*.s1p);;All files (*.*)"
+                f"Touchstone 1-Port Files ({file_patterns('s1p')});;"
+                "All files (*.*)"
             )
         else:
             filedialog.setDefaultSuffix("s2p")
             filedialog.setNameFilter(
-                "Touchstone 2-Port Files (*.s2p);;All files (*.*)"
+                f"Touchstone 2-Port Files ({file_patterns('s2p')});;"
+                "All files (*.*)"
             )
         filedialog.setAcceptMode(QtWidgets.QFileDialog.AcceptMode.AcceptSave)
         selected = filedialog.exec()
@@ -111,19 +138,59 @@ class FilesWindow(QtWidgets.QWidget):
         ts = Touchstone(filename)
         ts.sdata[0] = self.app.data.s11
         if nr_params > 1:
+            # s12 and s22 are left empty and written as zeros
             ts.sdata[1] = self.app.data.s21
-            for dp in self.app.data.s11:
-                ts.sdata[2].append(Datapoint(dp.freq, 0, 0))
-                ts.sdata[3].append(Datapoint(dp.freq, 0, 0))
         try:
             ts.save(nr_params)
         except IOError as e:
             logger.exception("Error during file export: %s", e)
             return
 
+    def recordArchive(self):
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            filter="Sweep archive (*.nvsa);;All files (*.*)",
+            options=QtWidgets.QFileDialog.Option.DontConfirmOverwrite,
+        )
+        if filename == "":
+            return
+        try:
+            archive = SweepArchive(filename)
+        except (OSError, ValueError) as e:
+            logger.error("Unable to open sweep archive: %s", e)
+            self.app.showError(f"Unable to open sweep archive: {e}")
+            return
+        self.app.sweep_archive = archive
+        self.archive_label.setText(
+            f"Recording to {os.path.basename(filename)} ({len(archive)} sweeps)"
+        )
+
+    def stopArchive(self):
+        self.app.sweep_archive = None
+        self.archive_label.setText("Not recording")
+
+    def exportArchive(self):
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            filter="Sweep archive (*.nvsa);;All files (*.*)"
+        )
+        if filename == "":
+            return
+        directory = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Export sweeps to"
+        )
+        if directory == "":
+            return
+        try:
+            filenames = SweepArchive(filename).export_range(directory)
+        except (OSError, ValueError) as e:
+            logger.error("Unable to export sweep archive: %s", e)
+            self.app.showError(f"Unable to export sweep archive: {e}")
+            return
+        logger.info("Exported %d sweeps to %s", len(filenames), directory)
+
     def loadReferenceFile(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            filter="Touchstone Files (*.s1p *.s2p);;All files (*.*)"
+            filter=f"Touchstone Files ({file_patterns('s1p', 's2p')});;"
+            "All files (*.*)"
         )
         if filename != "":
             self.app.resetReference()
@@ -133,11 +200,12 @@ class FilesWindow(QtWidgets.QWidget):
 
     def loadSweepFile(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(
-            filter="Touchstone Files (*.s1p *.s2p);;All files (*.*)"
+            filter=f"Touchstone Files ({file_patterns('s1p', 's2p')});;"
+            "All files (*.*)"
         )
         if filename != "":
-            self.app.data.s11 = []
-            self.app.data.s21 = []
+            self.app.data.s11 = SweepData()
+            self.app.data.s21 = SweepData()
             t = Touchstone(filename)
             t.load()
             self.app.saveData(t.s11, t.s21, filename)
@@ -24,7 +24,7 @@ from PySide6.QtCore import Qt
 
 from ..Marker.Values import TYPES, default_label_ids
 from ..Marker.Widget import Marker
-from ..RFTools import Datapoint
+from ..RFTools import Datapoint, SweepData
 from .ui import get_window_icon
 
 if TYPE_CHECKING:
@@ -34,16 +34,20 @@ logger = logging.getLogger(__name__)
 
 
 class MarkerSettingsWindow(QtWidgets.QWidget):
-    EXAMPLE_DATA11: ClassVar[list[Datapoint]] = [
-        Datapoint(123000000, 0.89, -0.11),
-        Datapoint(123500000, 0.9, -0.1),
-        Datapoint(124000000, 0.91, -0.95),
-    ]
-    EXAMPLE_DATA21: ClassVar[list[Datapoint]] = [
-        Datapoint(123000000, -0.25, 0.49),
-        Datapoint(123456000, -0.3, 0.5),
-        Datapoint(124000000, -0.2, 0.5),
-    ]
+    EXAMPLE_DATA11: ClassVar[SweepData] = SweepData.from_datapoints(
+        [
+            Datapoint(123000000, 0.89, -0.11),
+            Datapoint(123500000, 0.9, -0.1),
+            Datapoint(124000000, 0.91, -0.95),
+        ]
+    )
+    EXAMPLE_DATA21: ClassVar[SweepData] = SweepData.from_datapoints(
+        [
+            Datapoint(123000000, -0.25, 0.49),
+            Datapoint(123456000, -0.3, 0.5),
+            Datapoint(124000000, -0.2, 0.5),
+        ]
+    )
 
     def __init__(self, app: "vna_app"):
         super().__init__()
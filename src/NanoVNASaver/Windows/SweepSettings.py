@@ -23,11 +23,13 @@ from typing import TYPE_CHECKING
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
+from ..Calibration import CorrectionTable
 from ..Formatting import (
     format_frequency_short,
     format_frequency_sweep,
 )
-from ..Settings.Sweep import SweepMode
+from ..Settings.Sweep import AverageMethod, SweepMode
+from ..Touchstone import file_patterns
 from .Defaults import make_scrollable
 from .ui import get_window_icon
 
@@ -58,6 +60,7 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         self._power_layout = QtWidgets.QFormLayout(self._power_box)
         layout.addWidget(self._power_box)
         layout.addWidget(self.sweep_box())
+        layout.addWidget(self.processing_box())
         self.update_band()
 
     def title_box(self):
@@ -135,9 +138,17 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         label = QtWidgets.QLabel(
             "Averaging allows discarding outlying samples to get better"
             " averages. Common values are 3/0, 5/2, 9/4 and 25/6."
+            " The median and the sigma clipped mean drop outliers"
+            " themselves and ignore the number to discard. The running"
+            " mean shows its estimate after every read. The exponential"
+            " average carries on over continuous sweeps, weighting new"
+            " reads by 2 / (measurements + 1). Adaptive averaging stops"
+            " reading a segment once the standard error of each point is"
+            " below the noise target, the number of measurements is the"
+            " most it reads."
         )
         label.setWordWrap(True)
-        label.setMinimumHeight(50)
+        label.setMinimumHeight(110)
         layout.addRow(label)
         averages = QtWidgets.QLineEdit(
             str(self.app.sweep.properties.averages[0])
@@ -155,6 +166,42 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         )
         layout.addRow("Number of measurements to average", averages)
         layout.addRow("Number to discard", truncates)
+        average_method = QtWidgets.QComboBox()
+        for text, method in (
+            ("Mean (discarding outliers)", AverageMethod.TRUNCATED_MEAN),
+            ("Median", AverageMethod.MEDIAN),
+            ("Sigma clipped mean", AverageMethod.SIGMA_CLIPPED),
+            ("Running mean (updated every read)", AverageMethod.RUNNING_MEAN),
+            ("Exponential (across sweeps)", AverageMethod.EXPONENTIAL),
+            ("Adaptive (until noise target)", AverageMethod.ADAPTIVE),
+        ):
+            average_method.addItem(text, method)
+        average_method.setCurrentIndex(
+            average_method.findData(self.app.sweep.properties.average_method)
+        )
+        average_method.currentIndexChanged.connect(
+            lambda: self.update_average_method(average_method.currentData())
+        )
+        layout.addRow("Averaging method", average_method)
+        target, in_db = self.app.sweep.properties.noise_target
+        noise_target = QtWidgets.QLineEdit(str(target))
+        noise_target.setMinimumHeight(20)
+        noise_unit = QtWidgets.QComboBox()
+        noise_unit.addItems(("linear", "dB"))
+        noise_unit.setCurrentIndex(int(in_db))
+        noise_target.editingFinished.connect(
+            lambda: self.update_noise_target(noise_target, noise_unit)
+        )
+        noise_unit.currentIndexChanged.connect(
+            lambda: self.update_noise_target(noise_target, noise_unit)
+        )
+        noise_layout = QtWidgets.QHBoxLayout()
+        noise_layout.addWidget(noise_target)
+        noise_layout.addWidget(noise_unit)
+        layout.addRow("Noise target (standard error)", noise_layout)
+        self.noise_label = QtWidgets.QLabel("-")
+        layout.addRow("Achieved noise", self.noise_label)
+        self.app.worker.signals.updated.connect(self.update_noise)
 
         # TODO: is this more a device than a sweep property?
         label = QtWidgets.QLabel(
@@ -172,6 +219,19 @@ class SweepSettingsWindow(QtWidgets.QWidget):
             lambda: self.update_attenuator(input_att)
         )
         layout.addRow("Attenuator in port CH1 (s21) in dB", input_att)
+
+        self.s21table_label = QtWidgets.QLabel("None")
+        btn_load_table = QtWidgets.QPushButton("Load ...")
+        btn_load_table.setMinimumHeight(20)
+        btn_load_table.clicked.connect(self.load_s21table)
+        btn_clear_table = QtWidgets.QPushButton("Clear")
+        btn_clear_table.setMinimumHeight(20)
+        btn_clear_table.clicked.connect(lambda: self.set_s21table(None))
+        table_layout = QtWidgets.QHBoxLayout()
+        table_layout.addWidget(self.s21table_label)
+        table_layout.addWidget(btn_load_table)
+        table_layout.addWidget(btn_clear_table)
+        layout.addRow("Frequency dependent S21 correction", table_layout)
         return box
 
     def sweep_box(self) -> "QtWidgets.QWidget":
@@ -209,6 +269,35 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         layout.addRow(btn_set_band_sweep)
         return box
 
+    def processing_box(self) -> "QtWidgets.QWidget":
+        box = QtWidgets.QGroupBox("Processing")
+        layout = QtWidgets.QFormLayout(box)
+        label = QtWidgets.QLabel(
+            "Processing stages applied to each sweep segment in this order."
+            " Times are for the latest segment or reprocessing."
+        )
+        label.setWordWrap(True)
+        layout.addRow(label)
+
+        self.stage_timings: dict[str, QtWidgets.QLabel] = {}
+        for stage in self.app.worker.pipeline:
+            checkbox = QtWidgets.QCheckBox(stage.name.capitalize())
+            checkbox.setMinimumHeight(20)
+            checkbox.setChecked(stage.enabled)
+            checkbox.toggled.connect(partial(self.update_stage, stage.name))
+            self.stage_timings[stage.name] = QtWidgets.QLabel("-")
+            layout.addRow(checkbox, self.stage_timings[stage.name])
+
+        smoothing = QtWidgets.QSpinBox()
+        smoothing.setMinimumHeight(20)
+        smoothing.setRange(2, 101)
+        smoothing.setValue(self.app.worker.pipeline["smoothing"].window)
+        smoothing.valueChanged.connect(self.update_smoothing)
+        layout.addRow("Smoothing window (points)", smoothing)
+
+        self.app.worker.signals.updated.connect(self.update_timings)
+        return box
+
     def vna_connected(self):
         while self._power_layout.rowCount():
             self._power_layout.removeRow(0)
@@ -275,6 +364,65 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         logger.debug("Attenuator %sdB inline with S21 input", att)
         value.setText(str(att))
         self.app.s21att = att
+        self.app.worker.reapply_calibration()
+
+    def load_s21table(self):
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            filter=f"S21 correction ({file_patterns('s2p')} *.csv);;"
+            "All files (*.*)"
+        )
+        if not filename:
+            return
+        try:
+            table = CorrectionTable.load(filename)
+        except (OSError, ValueError) as exc:
+            logger.error("Unable to load correction table: %s", exc)
+            self.app.showError(f"Unable to load correction table: {exc}")
+            return
+        self.set_s21table(table)
+
+    def set_s21table(self, table: CorrectionTable | None):
+        logger.debug("S21 correction table: %s", table and table.source)
+        self.s21table_label.setText(table.source if table else "None")
+        self.app.s21table = table
+        self.app.worker.reapply_calibration()
+
+    def update_stage(self, name: str, enabled: bool):
+        logger.debug("update_stage(%s, %s)", name, enabled)
+        self.app.worker.pipeline[name].enabled = enabled
+        self.app.worker.reapply_calibration()
+
+    def update_smoothing(self, window: int):
+        logger.debug("update_smoothing(%s)", window)
+        self.app.worker.pipeline["smoothing"].window = window
+        self.app.worker.reapply_calibration()
+
+    def update_timings(self):
+        if not self.isVisible():
+            return
+        for stage in self.app.worker.pipeline:
+            self.stage_timings[stage.name].setText(
+                f"{1000 * stage.last:.2f} ms"
+                f" (mean {1000 * stage.mean():.2f} ms)"
+                if stage.enabled
+                else "off"
+            )
+
+    def update_noise(self):
+        if not self.isVisible():
+            return
+        noise = self.app.worker.segment_noise.copy().values()
+        if not noise:
+            self.noise_label.setText("-")
+            return
+        unit = " dB" if any(n.in_db for n in noise) else ""
+        reads = [n.reads for n in noise]
+        self.noise_label.setText(
+            f"S11 {max(n.s11 for n in noise):.3g}{unit},"
+            f" S21 {max(n.s21 for n in noise):.3g}{unit}"
+            f" after {min(reads)} to {max(reads)} reads"
+            f" ({len(reads)} segments)"
+        )
 
     def update_averaging(
         self, averages: "QtWidgets.QLineEdit", truncs: "QtWidgets.QLineEdit"
@@ -294,6 +442,24 @@ class SweepSettingsWindow(QtWidgets.QWidget):
         truncs.setText(str(truncates))
         self.app.sweep.set_averages(amount, truncates)
 
+    def update_average_method(self, method: "AverageMethod"):
+        logger.debug("update_average_method(%s)", method)
+        self.app.sweep.set_average_method(method)
+
+    def update_noise_target(
+        self, target: "QtWidgets.QLineEdit", unit: "QtWidgets.QComboBox"
+    ):
+        try:
+            value = float(target.text())
+            assert value > 0
+        except (AssertionError, ValueError):
+            logger.warning("Illegal noise target, set default")
+            value = 0.001
+        in_db = unit.currentIndex() == 1
+        logger.debug("update_noise_target(%s, %s)", value, in_db)
+        target.setText(str(value))
+        self.app.sweep.set_noise_target(value, in_db)
+
     def update_logarithmic(self, logarithmic: bool):
         logger.debug("update_logarithmic(%s)", logarithmic)
         self.app.sweep.set_logarithmic(logarithmic)
@@ -28,7 +28,7 @@ from PySide6.QtGui import QShortcut
 from scipy.constants import speed_of_light  # type: ignore
 from scipy.signal import convolve  # type: ignore
 
-from ..RFTools import Datapoint
+from ..RFTools import SweepData
 from .Defaults import make_scrollable
 from .ui import get_window_icon
 
@@ -237,7 +237,7 @@ class TDRWindow(QtWidgets.QWidget):
             logger.info("Cannot compute cable length at 0 span")
             return
 
-        s11 = np.array([complex(d.re, d.im) for d in self.app.data.s11])
+        s11 = self.app.data.s11.z
 
         # In lowpass mode, the frequency is measured down to DC. Because the
         # impulse response is real, we can flip over the frequency data so
@@ -293,9 +293,9 @@ class TDRWindow(QtWidgets.QWidget):
         self.tdr_result_label.setText(f"{cable_len}m ({feet}ft {inches}in)")
         self.app.tdr_result_label.setText(f"{cable_len}m")
         self.td = list(td)
-        self.app.tdr_chart.data = [
-            Datapoint(0, 0.0, 0.0)
-        ]  # A bit of cheating otherwise the super().wheelEvent() exits
+        self.app.tdr_chart.data = SweepData.zeros(
+            [0]
+        )  # A bit of cheating otherwise the super().wheelEvent() exits
         # without doing anything.
         self.updated.emit()
 
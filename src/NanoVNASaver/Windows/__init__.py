@@ -1,6 +1,7 @@
 from .About import AboutWindow
 from .AnalysisWindow import AnalysisWindow
 from .Bands import BandsWindow
+from .BatchImport import BatchImportWindow
 from .CalibrationSettings import CalibrationWindow
 from .DeviceSettings import DeviceSettingsWindow
 from .DisplaySettings import DisplaySettingsWindow
@@ -14,6 +15,7 @@ __all__ = [
     "AboutWindow",
     "AnalysisWindow",
     "BandsWindow",
+    "BatchImportWindow",
     "CalibrationWindow",
     "DeviceSettingsWindow",
     "DisplaySettingsWindow",
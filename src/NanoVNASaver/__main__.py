@@ -27,6 +27,7 @@ resulting data.
 
 import argparse
 import logging
+import multiprocessing
 import sys
 
 from PySide6 import QtWidgets
@@ -57,12 +58,14 @@ def main():
     parser.add_argument(
         "-f",
         "--file",
-        help="Touchstone file to load as sweep for off device usage",
+        help="Touchstone file to load as sweep for off device usage"
+        " (may be .gz, .bz2 or .xz compressed)",
     )
     parser.add_argument(
         "-r",
         "--ref-file",
-        help="Touchstone file to load as reference for off device usage",
+        help="Touchstone file to load as reference for off device usage"
+        " (may be .gz, .bz2 or .xz compressed)",
     )
     parser.add_argument(
         "--version", action="version", version=f"NanoVNASaver {VERSION}"
@@ -125,4 +128,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # the batch import starts worker processes, also from frozen builds
+    multiprocessing.freeze_support()
     main()
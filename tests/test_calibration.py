@@ -0,0 +1,499 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.Calibration import (
+    CalDataSet,
+    CalElement,
+    Calibration,
+    CalibrationLibrary,
+    CorrectionTable,
+    correct_delay,
+    correct_delay_array,
+)
+from NanoVNASaver.RFTools import Datapoint, SweepData
+from NanoVNASaver.Settings.Sweep import Sweep
+from NanoVNASaver.Touchstone import Touchstone
+
+
+class TestCalDataSet(unittest.TestCase):
+    def test_round_trip(self):
+        for name in ("full_v2_200_300.cal", "test_2port_long.cal"):
+            with open(f"./tests/data/{name}", encoding="utf-8") as calfile:
+                text = calfile.read()
+            written = str(CalDataSet().from_str(text))
+            title, rest = text.split("\n", 1)
+            # an empty notes line gets written after the title
+            self.assertEqual(written, f"{title}\n\n{rest}")
+            self.assertEqual(str(CalDataSet().from_str(written)), written)
+
+    def test_from_str(self):
+        text = (
+            "! some note\n"
+            "100 1 2 3 4 5 6\n"
+            "# Hz ShortR ShortI OpenR OpenI LoadR LoadI\n"
+            "200 1e-5 -2E3 .3 -4. 5 6 7 8\n"
+            "300 1 2 3 4 5\n"
+            "400 1 2 3 4 5 +6\n"
+            "# Hz ShortR ShortI OpenR OpenI LoadR LoadI"
+            " ThroughR ThroughI IsolationR IsolationI\n"
+            "500 1 2 3 4 5 6 7 8 9 10\n"
+            "100 0 0 3 4 5 6 7 8 9 10 11 12\n"
+        )
+        with self.assertLogs("NanoVNASaver.Calibration", "WARNING") as log:
+            dataset = CalDataSet().from_str(text)
+        self.assertEqual(
+            [record.getMessage() for record in log.records],
+            [
+                "Caldata without having read header: 2: 100 1 2 3 4 5 6",
+                "Through data with sol header. 4: 200 1e-5 -2E3 .3 -4. 5 6 7 8",
+                "Illegal caldata. Line 5: 300 1 2 3 4 5",
+                "Illegal caldata. Line 6: 400 1 2 3 4 5 +6",
+                "Duplicate header in cal data. 7: # Hz ShortR ShortI OpenR"
+                " OpenI LoadR LoadI ThroughR ThroughI IsolationR IsolationI",
+            ],
+        )
+        self.assertEqual(dataset.notes, "some note\n")
+        self.assertEqual(dataset.frequencies(), [100, 200, 500])
+        self.assertEqual(dataset.get(100).short, 0j)
+        self.assertEqual(dataset.get(100).isolation, 11 + 12j)
+        self.assertEqual(dataset.get(200).short, 1e-5 - 2e3j)
+        self.assertEqual(dataset.get(200).open, 0.3 - 4j)
+        self.assertEqual(dataset.get(500).through, 7 + 8j)
+        self.assertEqual(dataset.get(500).thrurefl, 0j)
+        self.assertEqual(dataset.get(500).isolation, 9 + 10j)
+        self.assertEqual(dataset.size_of("short"), 2)
+        self.assertEqual(dataset.size_of("through"), 3)
+        self.assertFalse(dataset.complete1port())
+
+    def test_insert(self):
+        dataset = CalDataSet()
+        self.assertFalse(dataset.complete1port())
+        self.assertEqual((dataset.freq_min(), dataset.freq_max()), (0, 0))
+        for freq in (300, 100, 200):
+            for name in ("short", "open", "load"):
+                dataset.insert(name, Datapoint(freq, 0.5, 0.5))
+        self.assertEqual(dataset.frequencies(), [100, 200, 300])
+        self.assertEqual((dataset.freq_min(), dataset.freq_max()), (100, 300))
+        self.assertEqual(dataset.size_of("open"), 3)
+        self.assertTrue(dataset.complete1port())
+        self.assertFalse(dataset.complete2port())
+
+        # a zero value doesn't count as measured
+        dataset.insert("open", Datapoint(200, 0, 0))
+        self.assertEqual(dataset.size_of("open"), 2)
+        self.assertFalse(dataset.complete1port())
+        dataset.insert("open", Datapoint(200, 0.5, 0.5))
+        for freq in (100, 200, 300):
+            for name in ("through", "thrurefl", "isolation"):
+                dataset.insert(name, Datapoint(freq, 0.5, 0.5))
+        self.assertTrue(dataset.complete2port())
+
+        dataset.insert("short", Datapoint(400, 0.5, 0.5))
+        self.assertFalse(dataset.complete1port())
+        del dataset[400]
+        self.assertTrue(dataset.complete2port())
+        dataset[50] = dataset.get(100)
+        self.assertEqual(dataset.frequencies(), [50, 100, 200, 300])
+        self.assertEqual(dataset.size_of("isolation"), 4)
+        with self.assertRaises(KeyError):
+            dataset.insert("bogus", Datapoint(100, 1, 1))
+
+
+class TestCorrectDelay(unittest.TestCase):
+    def test_correct_delay_array(self):
+        freq = np.linspace(50e3, 3e9, 301).astype(np.int64)
+        z = np.exp(1j * np.linspace(0, 10, freq.size)) * 0.5
+        for delay in (1e-11, -3.3e-9):
+            for reflect in (False, True):
+                expected = [
+                    correct_delay(dp, delay, reflect).z
+                    for dp in SweepData(freq, z)
+                ]
+                np.testing.assert_allclose(
+                    correct_delay_array(freq, z, delay, reflect),
+                    expected,
+                    rtol=1e-12,
+                )
+        np.testing.assert_array_equal(correct_delay_array(freq, z, 0.0), z)
+
+    def test_correct_delay_array_cache(self):
+        sweep = Sweep(1000000, 900000000, 101, 40)
+        grids = [
+            np.array(list(sweep.get_frequencies()))[i * 101 : (i + 1) * 101]
+            for i in range(sweep.segments)
+        ]
+        z = np.full(101, 0.5 + 0.5j)
+        for grid in grids:
+            correct_delay_array(grid, z, 1e-10, True)
+            correct_delay_array(grid, z, 1e-10)
+        # the next sweep finds the rotations of all its segments
+        with unittest.mock.patch.object(np, "exp", wraps=np.exp) as exp:
+            for grid in grids:
+                correct_delay_array(grid, z, 1e-10, True)
+                correct_delay_array(grid, z, 1e-10)
+        exp.assert_not_called()
+
+        # another grid with the same ends and size
+        other = grids[0].copy()
+        other[1:-1] += 1
+        np.testing.assert_array_equal(
+            correct_delay_array(other, z, 1e-10),
+            z * np.exp(-2j * np.pi * other * 1e-10),
+        )
+
+
+class TestCorrectionTable(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, text: str) -> str:
+        filename = os.path.join(self.tmpdir.name, "table.csv")
+        with open(filename, "w", encoding="utf-8") as csvfile:
+            csvfile.write(text)
+        return filename
+
+    def test_load_csv(self):
+        table = CorrectionTable.load(
+            self.write_csv("# loss\nHz,dB\n1000, 6\n3000, 10\n2000, 8\n")
+        )
+        self.assertEqual(table.freq.tolist(), [1000, 2000, 3000])
+        np.testing.assert_allclose(
+            table.s21, 10 ** (-np.array([6, 8, 10]) / 20)
+        )
+        table = CorrectionTable.load(self.write_csv("1e3 0.5 0.5\n2e3 0 1\n"))
+        self.assertEqual(table.s21.tolist(), [0.5 + 0.5j, 1j])
+        for text in ("", "1000,1\n2000\n", "1000,1\nfoo,2\n", "1000,0,0\n"):
+            with self.assertRaises(ValueError):
+                CorrectionTable.load(self.write_csv(text))
+
+    def test_load_touchstone(self):
+        table = CorrectionTable.load("./tests/data/attenuator-0643_RI.s2p")
+        touchstone = Touchstone("./tests/data/attenuator-0643_RI.s2p")
+        touchstone.load()
+        np.testing.assert_array_equal(table.s21, touchstone.s21.z)
+        with self.assertRaises(ValueError):
+            CorrectionTable.load("./tests/data/valid.s1p")
+
+    def test_correct(self):
+        table = CorrectionTable([1000, 3000], [0.5, 0.25j])
+        freq = np.array([500, 1000, 2000, 3000, 4000])
+        with self.assertLogs("NanoVNASaver.Calibration", "WARNING"):
+            factors = table.factors(freq)
+        np.testing.assert_allclose(
+            factors, [2, 2, 1 / (0.25 + 0.125j), -4j, -4j]
+        )
+        self.assertIs(table.factors(freq), factors)
+        np.testing.assert_allclose(
+            table.correct(freq[1:4], np.ones(3)), factors[1:4]
+        )
+
+
+class TestCalibration(unittest.TestCase):
+    def setUp(self):
+        # work on a copy, loading creates a binary cache next to the file
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.filename = os.path.join(self.tmpdir.name, "test.cal")
+        shutil.copy("./tests/data/test_2port_long.cal", self.filename)
+        self.cal = Calibration()
+        self.cal.load(self.filename)
+        element = self.cal.cal_element
+        element.short_state = element.open_state = element.load_state = "IDEAL"
+
+    def test_calc_corrections(self):
+        self.cal.calc_corrections()
+        self.assertTrue(self.cal.isCalculated)
+        self.assertEqual(self.cal.singular, [])
+        for caldata in self.cal.dataset.values():
+            for name, ideal in (("short", -1), ("open", 1), ("load", 0)):
+                gamma = getattr(caldata, name)
+                dp = Datapoint(caldata.freq, gamma.real, gamma.imag)
+                self.assertAlmostEqual(self.cal.correct11(dp).z, ideal)
+            self.assertAlmostEqual(
+                caldata.e10e01, caldata.e00 * caldata.e11 - caldata.delta_e
+            )
+            self.assertEqual(caldata.e30, caldata.isolation)
+
+    def test_singular(self):
+        freqs = self.cal.dataset.frequencies()
+        for freq in freqs[3:6]:
+            self.cal.dataset.data[freq].open = self.cal.dataset.data[freq].short
+        self.assertRaisesRegex(
+            ValueError,
+            f"{freqs[3]}Hz, {freqs[4]}Hz, {freqs[5]}Hz",
+            self.cal.calc_corrections,
+        )
+        self.assertFalse(self.cal.isCalculated)
+        self.assertEqual(self.cal.singular, freqs[3:6])
+
+    def test_correct_array(self):
+        self.cal.calc_corrections()
+        cal_freq = np.array(self.cal.dataset.frequencies())
+        rng = np.random.default_rng(7)
+        for freq in (
+            cal_freq,
+            cal_freq[5:20],
+            np.linspace(cal_freq[0] - 1e6, cal_freq[-1] + 1e6, 57).astype(int),
+        ):
+            z11 = rng.normal(size=len(freq)) + 1j * rng.normal(size=len(freq))
+            z21 = rng.normal(size=len(freq)) + 1j * rng.normal(size=len(freq))
+            dps11 = list(SweepData(freq, z11))
+            dps21 = list(SweepData(freq, z21))
+            np.testing.assert_allclose(
+                self.cal.correct11_array(freq, z11),
+                [self.cal.correct11(dp).z for dp in dps11],
+                rtol=1e-12,
+            )
+            np.testing.assert_allclose(
+                self.cal.correct21_array(freq, z21, z11),
+                [
+                    self.cal.correct21(dp, dp11).z
+                    for dp, dp11 in zip(dps21, dps11, strict=True)
+                ],
+                rtol=1e-12,
+            )
+
+    def test_error_terms_cache(self):
+        self.cal.calc_corrections()
+        freq = np.array(self.cal.dataset.frequencies())
+        terms = self.cal.error_terms(freq)
+        self.assertIs(self.cal.error_terms(freq.copy()), terms)
+        self.assertFalse(terms["e00"].flags.writeable)
+        self.assertIsNot(self.cal.error_terms(freq[1:]), terms)
+        self.cal.calc_corrections()
+        self.assertIs(self.cal.error_terms(freq), terms)
+        self.cal.cal_element.through_length = 1e-12
+        self.cal.calc_corrections()
+        self.assertIsNot(self.cal.error_terms(freq), terms)
+
+    def test_copy(self):
+        self.cal.calc_corrections()
+        freq = np.array(self.cal.dataset.frequencies())
+        terms = self.cal.error_terms(freq)
+        cal = self.cal.copy()
+        self.assertIsNot(cal.dataset, self.cal.dataset)
+        self.assertEqual(str(cal.dataset), str(self.cal.dataset))
+        freq0 = int(freq[0])
+        self.assertIsNot(cal.dataset.get(freq0), self.cal.dataset.get(freq0))
+        through = self.cal.dataset.get(freq0).through
+        cal.insert("through", [Datapoint(freq0, 0.5, 0.0)])
+        self.assertEqual(cal.dataset.get(freq0).through, 0.5)
+        self.assertEqual(self.cal.dataset.get(freq0).through, through)
+        cal.cal_element.short_state = ""
+        cal.calc_corrections()
+        self.assertEqual(self.cal.cal_element.short_state, "IDEAL")
+        self.assertIs(self.cal.error_terms(freq), terms)
+        self.assertFalse(
+            np.array_equal(cal.error_terms(freq)["e00"], terms["e00"])
+        )
+
+    def test_standards(self):
+        freq = np.linspace(1e6, 3e9, 11).astype(int)
+        element = self.cal.cal_element
+        np.testing.assert_array_equal(self.cal.gamma_short(freq), [-1] * 11)
+        element.short_state = element.open_state = element.load_state = ""
+        element.through_is_ideal = False
+        element.through_length = 1e-11
+        for name, ideal in (("short", -1), ("open", 1), ("through", 1)):
+            gamma = getattr(self.cal, f"gamma_{name}")(freq)
+            self.assertEqual(gamma.shape, freq.shape)
+            np.testing.assert_allclose(np.abs(gamma), 1.0, rtol=1e-12)
+            self.assertAlmostEqual(gamma[0], ideal, 2)
+        self.assertAlmostEqual(self.cal.gamma_load(freq)[0], 0)
+
+    def test_standard_from_file(self):
+        ts = Touchstone("./tests/data/valid.s1p")
+        ts.load()
+        ts.gen_interpolation_s11()
+        element = self.cal.cal_element
+        element.short_state = "FILE"
+        element.short_touchstone = ts
+        freq = np.linspace(ts.min_freq(), ts.max_freq(), 23).astype(int)
+        np.testing.assert_array_equal(
+            self.cal.gamma_short(freq),
+            [ts.s_freq("11", f).z for f in freq.tolist()],
+        )
+        interp = element._interp["short"]
+        self.cal.gamma_short(freq[:3])
+        self.assertIs(element._interp["short"], interp)
+        element.short_touchstone = ts
+        self.cal.gamma_short(freq[:3])
+        self.assertIsNot(element._interp["short"], interp)
+
+    def test_binary_cache(self):
+        cache_file = f"{self.filename}.npz"
+        self.assertFalse(os.path.exists(cache_file))
+        self.cal.calc_corrections()
+        self.assertTrue(os.path.exists(cache_file))
+
+        cal = Calibration()
+        cal.load(self.filename)
+        self.assertEqual(
+            cal.dataset.frequencies(), self.cal.dataset.frequencies()
+        )
+        self.assertEqual(str(cal.dataset), str(self.cal.dataset))
+        cal.cal_element = self.cal.cal_element
+        with unittest.mock.patch.object(cal, "_calc_terms") as calc_terms:
+            cal.calc_corrections()
+        calc_terms.assert_not_called()
+        self.assertTrue(cal.isCalculated)
+        freq = cal.dataset.frequencies()
+        for name in ("e00", "e11", "delta_e", "e22", "e10e32"):
+            np.testing.assert_array_equal(
+                cal.error_terms(freq)[name], self.cal.error_terms(freq)[name]
+            )
+
+        # other standards need a recalculation
+        cal.cal_element.short_state = ""
+        with unittest.mock.patch.object(
+            cal, "_calc_terms", wraps=cal._calc_terms
+        ) as calc_terms:
+            cal.calc_corrections()
+        calc_terms.assert_called_once()
+
+        # a changed source file is parsed again
+        with open(self.filename, "a", encoding="utf-8") as calfile:
+            calfile.write("! appended note\n")
+        cal = Calibration()
+        cal.load(self.filename)
+        self.assertEqual(cal.notes, ["appended note"])
+
+    def test_broken_cache(self):
+        with open(f"{self.filename}.npz", "wb") as npz:
+            npz.write(b"garbage")
+        cal = Calibration()
+        with self.assertLogs("NanoVNASaver.Calibration", "WARNING"):
+            cal.load(self.filename)
+        self.assertEqual(str(cal.dataset), str(self.cal.dataset))
+
+
+class TestCalibrationLibrary(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.files = []
+        for name in (
+            "full_v2_200_300.cal",
+            "sol_27_30.cal",
+            "test_2port_long.cal",
+        ):
+            filename = os.path.join(self.tmpdir.name, name)
+            shutil.copy(f"./tests/data/{name}", filename)
+            self.files.append(filename)
+        self.element = CalElement()
+        self.library = CalibrationLibrary()
+
+    def assert_cached(self, filename: str, element: CalElement):
+        with unittest.mock.patch.object(
+            Calibration, "calc_corrections"
+        ) as calc_corrections:
+            self.library.get(filename, element)
+        calc_corrections.assert_not_called()
+
+    def test_get(self):
+        cal = self.library.get(self.files[0], self.element)
+        self.assertTrue(cal.isCalculated)
+        self.assertIsNot(cal.cal_element, self.element)
+        again = self.library.get(self.files[0], self.element)
+        # a copy of the library entry
+        self.assertIsNot(again, cal)
+        self.assertIsNot(again.dataset, cal.dataset)
+        self.assertEqual(str(again.dataset), str(cal.dataset))
+        self.assert_cached(self.files[0], self.element)
+
+        # other standards need their own calculation
+        element = CalElement(through_is_ideal=False, through_length=1e-12)
+        self.library.get(self.files[0], element)
+        self.assertEqual(len(self.library), 2)
+
+        # changes to the returned calibration don't alter the entry
+        cal.cal_element.short_state = ""
+        self.assert_cached(self.files[0], self.element)
+
+        # changes to the file are noticed
+        self.library.get(self.files[1], self.element)
+        with open(self.files[1], "a", encoding="utf-8") as calfile:
+            calfile.write("! appended note\n")
+        self.assertEqual(
+            self.library.get(self.files[1], self.element).notes[-1],
+            "appended note",
+        )
+
+    def test_get_insert(self):
+        cal = self.library.get(self.files[0], self.element)
+        content = str(cal.dataset)
+        freq = np.array(cal.dataset.frequencies())
+        terms = cal.error_terms(freq)
+
+        # a new calibration started from the loaded one
+        changed = cal.copy()
+        changed.insert(
+            "through", [Datapoint(int(f), 0.1, 0.2) for f in freq[:5]]
+        )
+        changed.insert("load", [Datapoint(int(freq[0]), 0.3, 0.0)])
+
+        again = self.library.get(self.files[0], self.element)
+        self.assertEqual(str(again.dataset), content)
+        for name, values in again.error_terms(freq).items():
+            np.testing.assert_array_equal(values, terms[name])
+        self.assertNotEqual(str(changed.dataset), content)
+
+    def test_invalid(self):
+        filename = os.path.join(self.tmpdir.name, "empty.cal")
+        with open(filename, "w", encoding="utf-8") as calfile:
+            calfile.write("# Calibration data for NanoVNA-Saver\n")
+        with (
+            self.assertLogs("NanoVNASaver.Calibration", "WARNING"),
+            self.assertRaises(ValueError),
+        ):
+            self.library.get(filename, self.element)
+        self.assertEqual(len(self.library), 0)
+
+    def test_evict(self):
+        self.library.size = 2
+        first = self.library.get(self.files[0], self.element)
+        self.library.get(self.files[1], self.element)
+        self.assert_cached(self.files[0], self.element)
+        self.library.get(self.files[2], self.element)
+        self.assertEqual(len(self.library), 2)
+        # files[1] was used least recently
+        self.assert_cached(self.files[0], self.element)
+
+        self.library.max_bytes = first.nbytes()
+        self.library.get(self.files[1], self.element)
+        self.assertEqual(len(self.library), 1)
+
+    def test_preload(self):
+        self.library.preload(self.files, self.element).join()
+        self.assertEqual(len(self.library), 3)
+        with unittest.mock.patch.object(
+            Calibration, "calc_corrections"
+        ) as calc_corrections:
+            for filename in self.files:
+                self.library.get(filename, self.element)
+        calc_corrections.assert_not_called()
@@ -0,0 +1,102 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.Calibration import (
+    Calibration,
+    CorrectionTable,
+    correct_delay_array,
+)
+from NanoVNASaver.Processing import Pipeline, SmoothingStage
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.app = SimpleNamespace(
+            calibration=Calibration(),
+            worker=SimpleNamespace(offsetDelay=0.0),
+            s21table=None,
+            s21att=0.0,
+        )
+        self.pipeline = Pipeline.default(self.app)
+        self.freq = np.linspace(1e6, 30e6, 101).astype(np.int64)
+        self.s11 = np.exp(1j * np.linspace(0, 3, 101)) * 0.5
+        self.s21 = np.exp(-1j * np.linspace(0, 3, 101)) * 0.25
+
+    def test_passthrough(self):
+        s11, s21 = self.pipeline(self.freq, self.s11, self.s21)
+        np.testing.assert_array_equal(s11, self.s11)
+        np.testing.assert_array_equal(s21, self.s21)
+        self.assertEqual(
+            list(self.pipeline.timings()),
+            [
+                "calibration",
+                "delay",
+                "de-embedding",
+                "attenuation",
+                "smoothing",
+            ],
+        )
+        self.assertEqual(self.pipeline["smoothing"].runs, 0)
+        self.assertEqual(self.pipeline["delay"].runs, 1)
+
+    def test_stages(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            shutil.copy("./tests/data/sol_27_30.cal", tmpdir)
+            self.app.calibration.load(f"{tmpdir}/sol_27_30.cal")
+            self.app.calibration.calc_corrections()
+        self.app.worker.offsetDelay = 1e-10
+        self.app.s21table = CorrectionTable([0, 100e6], [0.5, 0.5])
+        self.app.s21att = 20
+        s11, s21 = self.pipeline(self.freq, self.s11, self.s21)
+
+        cal = self.app.calibration
+        expected11 = correct_delay_array(
+            self.freq,
+            cal.correct11_array(self.freq, self.s11),
+            1e-10,
+            reflect=True,
+        )
+        np.testing.assert_allclose(s11, expected11)
+        expected21 = correct_delay_array(self.freq, self.s21, 1e-10) * 20
+        np.testing.assert_allclose(s21, expected21)
+        for stage in self.pipeline:
+            self.assertEqual(stage.runs, int(stage.enabled))
+            self.assertGreaterEqual(stage.total, stage.last)
+
+        self.pipeline["attenuation"].enabled = False
+        _, s21 = self.pipeline(self.freq, self.s11, self.s21)
+        np.testing.assert_allclose(s21, expected21 / 10)
+        self.pipeline.reset_timing()
+        self.assertEqual(self.pipeline["calibration"].runs, 0)
+
+    def test_smoothing(self):
+        stage = SmoothingStage(window=3, enabled=True)
+        freq = np.arange(5)
+        s11, s21 = stage(freq, np.array([0, 0, 3, 0, 0j]), np.arange(5) + 0j)
+        np.testing.assert_allclose(s11, [0, 1, 1, 1, 0])
+        np.testing.assert_allclose(s21, [0.5, 1, 2, 3, 3.5])
+        stage.window = 1
+        self.assertIs(stage(freq, s11, s21)[0], s11)
@@ -16,23 +16,33 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import cmath
 import math
 import unittest
 
+import numpy as np
+
 # Import targets to be tested
 from NanoVNASaver.RFTools import (
     Datapoint,
+    SweepData,
     clamp_value,
     corr_att_data,
     gamma_to_impedance,
+    gamma_to_impedance_array,
     groupDelay,
     impedance_to_capacitance,
+    impedance_to_capacitance_array,
     impedance_to_inductance,
     impedance_to_norm,
+    impedance_to_norm_array,
     norm_to_impedance,
     parallel_to_serial,
+    parallel_to_serial_array,
     reflection_coefficient,
+    reflection_coefficient_array,
     serial_to_parallel,
+    serial_to_parallel_array,
 )
 
 
@@ -187,3 +197,175 @@ class TestRFToolsDatapoint(unittest.TestCase):
         self.assertAlmostEqual(self.dp0.shuntImpedance(), 0)
         self.assertAlmostEqual(self.dp0.seriesImpedance(), math.inf)
         self.assertAlmostEqual(self.dp50.shuntImpedance(), math.inf)
+
+
+class TestRFToolsSweepData(unittest.TestCase):
+    def setUp(self):
+        self.dps = [
+            Datapoint(100000, 0.1091, 0.3118),
+            Datapoint(100001, 0.1091, 0.3124),
+            Datapoint(100002, 0.1091, 0.3130),
+        ]
+        self.data = SweepData.from_datapoints(self.dps)
+
+    def test_sequence(self):
+        self.assertEqual(len(self.data), 3)
+        self.assertEqual(self.data[0], self.dps[0])
+        self.assertEqual(self.data[-1], self.dps[-1])
+        self.assertIsInstance(self.data[0].freq, int)
+        self.assertEqual(list(self.data), self.dps)
+        self.assertEqual(self.data, self.dps)
+        self.assertFalse(SweepData())
+        self.assertRaises(IndexError, self.data.__getitem__, 3)
+
+    def test_slices_are_copies(self):
+        part = self.data[1:]
+        self.assertIsInstance(part, SweepData)
+        self.assertEqual(part, self.dps[1:])
+        part[0] = Datapoint(1, 0.0, 0.0)
+        self.assertEqual(self.data[1], self.dps[1])
+        self.assertEqual(
+            self.data[[0, 0, 1]], [self.dps[0]] * 2 + self.dps[1:2]
+        )
+
+    def test_update_sort(self):
+        data = SweepData.zeros([1, 2, 3, 4])
+        data.update(2, self.data[:2])
+        self.assertEqual(data[2], self.dps[0])
+        self.assertEqual(data[3], self.dps[1])
+        data.sort()
+        self.assertEqual(data.freq.tolist(), [1, 2, 100000, 100001])
+        self.assertRaises(ValueError, SweepData, [1, 2], [0j])
+
+    def test_derived_cache(self):
+        gain = self.data.gain
+        self.assertIs(self.data.gain, gain)
+        self.assertFalse(gain.flags.writeable)
+        self.assertIs(self.data.impedance(), self.data.impedance(50))
+        self.assertIsNot(self.data.impedance(75), self.data.impedance())
+        self.assertEqual(
+            self.data.parallelImpedance().tolist(),
+            [serial_to_parallel(dp.impedance()) for dp in self.dps],
+        )
+        np.testing.assert_array_equal(
+            self.data.unwrappedPhase, np.unwrap(self.data.phase)
+        )
+        generation = self.data.generation
+        self.data[0] = Datapoint(100000, 0.5, 0.0)
+        self.assertGreater(self.data.generation, generation)
+        self.assertIsNot(self.data.gain, gain)
+        self.assertEqual(self.data.gain[0], self.data[0].gain)
+        gain = self.data.gain
+        self.data.update(1, self.data[:1])
+        self.assertIsNot(self.data.gain, gain)
+        self.assertEqual(self.data.gain[1], self.data[0].gain)
+        gain = self.data.gain
+        self.data.sort()
+        self.assertIsNot(self.data.gain, gain)
+
+
+class TestRFToolsArrays(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        z = rng.uniform(-1.2, 1.2, 200) + 1j * rng.uniform(-1.2, 1.2, 200)
+        edges = [0, 1, -1, 1j, -1j, 1.1, complex(0, 1.0)]
+        self.data = SweepData(
+            np.concatenate(([0, 0], rng.integers(1, 10**9, 205))),
+            np.concatenate((edges, z)),
+        )
+        self.data.freq[2] = 0
+
+    def test_matches_datapoints(self):
+        dps = list(self.data)
+        for name in ("phase", "gain", "vswr", "wavelength"):
+            self.assertEqual(
+                getattr(self.data, name).tolist(),
+                [getattr(dp, name) for dp in dps],
+                name,
+            )
+        for name in (
+            "impedance",
+            "shuntImpedance",
+            "seriesImpedance",
+            "qFactor",
+            "capacitiveEquivalent",
+            "inductiveEquivalent",
+        ):
+            for ref in (50, 75):
+                np.testing.assert_array_equal(
+                    getattr(self.data, name)(ref),
+                    [getattr(dp, name)(ref) for dp in dps],
+                    name,
+                )
+        np.testing.assert_array_equal(
+            self.data.groupDelay(),
+            [groupDelay(dps, i) for i in range(len(dps))],
+        )
+
+    def test_matches_functions(self):
+        z = self.data.impedance()
+        for arr_fnc, fnc in (
+            (parallel_to_serial_array, parallel_to_serial),
+            (serial_to_parallel_array, serial_to_parallel),
+            (gamma_to_impedance_array, gamma_to_impedance),
+        ):
+            np.testing.assert_array_equal(
+                arr_fnc(z), [fnc(v) for v in z.tolist()], fnc.__name__
+            )
+        np.testing.assert_array_equal(
+            reflection_coefficient_array(z[1:]),
+            [reflection_coefficient(v) for v in z[1:].tolist()],
+        )
+        np.testing.assert_array_equal(
+            impedance_to_norm_array(z, 75), [v / 75 for v in z.tolist()]
+        )
+
+    def test_matches_scalar_formulas(self):
+        rng = np.random.default_rng(7)
+        z = rng.normal(size=5000) + 1j * rng.normal(size=5000)
+        z *= rng.choice([1e-3, 0.5, 1, 100], 5000)
+        values = z.tolist()
+        data = SweepData(np.arange(1, len(z) + 1), z)
+
+        def s2p(v: complex) -> complex:
+            z_sq_sum = v.real**2 + v.imag**2
+            return complex(z_sq_sum / v.real, z_sq_sum / v.imag)
+
+        def p2s(v: complex) -> complex:
+            z_sq_sum = v.real**2 + v.imag**2
+            return complex(
+                v.real * v.imag**2 / z_sq_sum, v.real**2 * v.imag / z_sq_sum
+            )
+
+        for result, formula in (
+            (data.gain, lambda v: 20 * math.log10(abs(v))),
+            (data.phase, cmath.phase),
+            (serial_to_parallel_array(z), s2p),
+            (parallel_to_serial_array(z), p2s),
+            (data.impedance(), lambda v: (-v - 1) / (v - 1) * 50),
+        ):
+            expected = [formula(v) for v in values]
+            self.assertEqual(result.tolist(), expected)
+        for dp, v in zip(data, values, strict=True):
+            self.assertEqual(dp.gain, 20 * math.log10(abs(v)))
+            self.assertEqual(dp.phase, cmath.phase(v))
+            self.assertEqual(serial_to_parallel(v), s2p(v))
+            self.assertEqual(parallel_to_serial(v), p2s(v))
+
+    def test_edge_cases(self):
+        with np.errstate(all="raise"):
+            self.assertEqual(
+                gamma_to_impedance_array([1, 0]).tolist(), [math.inf, 50]
+            )
+            self.assertEqual(
+                impedance_to_capacitance_array([0, 0], [0, 10]).tolist(),
+                [-math.inf, math.inf],
+            )
+            self.assertEqual(
+                serial_to_parallel_array([0, 50]).tolist(),
+                [complex(math.inf, math.inf), complex(50, math.inf)],
+            )
+            self.assertTrue(np.isnan(impedance_to_norm_array(0, 0)))
+            self.assertTrue(np.isnan(reflection_coefficient_array(-50)))
+            self.assertEqual(SweepData().gain.tolist(), [])
+            self.assertEqual(SweepData().groupDelay().tolist(), [])
@@ -0,0 +1,115 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.RFTools import SweepData
+from NanoVNASaver.Settings.Sweep import Properties, Sweep, SweepMode
+from NanoVNASaver.SweepArchive import INDEX_DTYPE, SweepArchive
+from NanoVNASaver.Touchstone import Touchstone
+
+
+class TestSweepArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "test.nvsa")
+        self.sweep = Sweep(
+            1000000,
+            2000000,
+            11,
+            properties=Properties("dut", SweepMode.CONTINOUS, (3, 1), False),
+        )
+        freq = np.linspace(1e6, 2e6, 11).astype(np.int64)
+        self.s11 = SweepData(freq, np.linspace(0, 1, 11) * 1j)
+        self.s21 = SweepData(freq, np.linspace(1, 0, 11))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_and_read(self):
+        archive = SweepArchive(self.filename)
+        self.assertEqual(len(archive), 0)
+        self.assertEqual(
+            archive.append(
+                self.s11,
+                self.s21,
+                self.sweep,
+                calibration="cal",
+                calibration_checksum="abc",
+                timestamp=10.0,
+            ),
+            0,
+        )
+        # entries appended after the first read are mapped as well
+        self.assertEqual(archive[0].calibration, "cal")
+        archive.append(self.s21, self.s11, self.sweep, timestamp=20.0)
+        self.assertEqual(len(archive), 2)
+
+        reopened = SweepArchive(self.filename)
+        self.assertEqual(len(reopened), 2)
+        first = reopened.entry(0)
+        self.assertEqual(first.time, 10.0)
+        self.assertEqual(first.sweep, self.sweep)
+        self.assertEqual(first.calibration_checksum, "abc")
+        self.assertEqual(first.s11, self.s11)
+        self.assertEqual(first.s21, self.s21)
+        last = reopened[-1]
+        self.assertEqual(last.calibration, "")
+        self.assertEqual(last.s11, self.s21)
+        self.assertEqual(reopened.find(15.0), [1])
+        self.assertEqual(reopened.find(0.0, 15.0), [0])
+        self.assertRaises(IndexError, reopened.entry, 2)
+
+    def test_incomplete_record(self):
+        archive = SweepArchive(self.filename)
+        archive.append(self.s11, self.s21, self.sweep)
+        with open(archive.index_filename, "ab") as indexfile:
+            indexfile.write(b"\0" * (INDEX_DTYPE.itemsize // 2))
+        with self.assertLogs(level="WARNING"):
+            archive = SweepArchive(self.filename)
+        self.assertEqual(len(archive), 1)
+        archive.append(self.s11, self.s21, self.sweep)
+        self.assertEqual(SweepArchive(self.filename)[1].s11, self.s11)
+
+    def test_not_an_archive(self):
+        with open(self.filename, "wb") as file:
+            file.write(b"# HZ S RI R 50\n")
+        self.assertRaises(ValueError, SweepArchive, self.filename)
+
+    def test_export(self):
+        archive = SweepArchive(self.filename)
+        archive.append(self.s11, self.s21, self.sweep, timestamp=10.0)
+        archive.append(self.s11, self.s21, self.sweep, timestamp=20.0)
+        filenames = archive.export_range(self.tmpdir.name, start=15.0)
+        self.assertEqual(len(filenames), 1)
+        ts = Touchstone(filenames[0])
+        ts.load()
+        self.assertEqual(ts.s11, self.s11)
+        self.assertEqual(ts.s21, self.s21)
+
+        filename = os.path.join(self.tmpdir.name, "first.s1p.gz")
+        archive.export(0, filename, 1)
+        ts = Touchstone(filename)
+        ts.load()
+        self.assertEqual(ts.s11, self.s11)
+        self.assertEqual(len(ts.s21), 0)
@@ -0,0 +1,325 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import threading
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.Calibration import Calibration
+from NanoVNASaver.Settings.Sweep import (
+    AverageMethod,
+    Properties,
+    Sweep,
+    SweepMode,
+)
+from NanoVNASaver.SweepWorker import (
+    ADAPTIVE_MIN_READS,
+    SweepWorker,
+    find_glitches,
+)
+
+
+class FakeVNA:
+    def __init__(self, points: int):
+        self.validateInput = False
+        self.points = points
+        self.sweeps: list[tuple[int, int]] = []
+
+    def connected(self) -> bool:
+        return True
+
+    def setSweep(self, start: int, stop: int):
+        self.sweeps.append((start, stop))
+
+    def resetSweep(self, start: int, stop: int):
+        pass
+
+    def read_frequencies(self) -> list[int]:
+        start, stop = self.sweeps[-1]
+        return np.linspace(start, stop, self.points).astype(int).tolist()
+
+    def readValues(self, value: str) -> list[complex]:
+        start, _ = self.sweeps[-1]
+        scale = 0.5 if value == "data 0" else 0.25
+        return [complex(scale, start * 1e-9)] * self.points
+
+
+class CountingVNA(FakeVNA):
+    """returns the number of the read as value"""
+
+    def __init__(self, points: int):
+        super().__init__(points)
+        self.reads = 0
+
+    def readValues(self, value: str) -> list[complex]:
+        if value == "data 0":
+            self.reads += 1
+        return [complex(self.reads)] * self.points
+
+
+class NoisyVNA(CountingVNA):
+    """s21 alternates by noise around a constant value"""
+
+    def __init__(self, points: int, noise: float):
+        super().__init__(points)
+        self.noise = noise
+
+    def readValues(self, value: str) -> list[complex]:
+        if value == "data 0":
+            self.reads += 1
+            return [complex(0.5)] * self.points
+        return [complex(0.1 + self.noise * (-1) ** self.reads)] * self.points
+
+
+class GlitchVNA(FakeVNA):
+    """s11 reads glitch at the points index for the first reads"""
+
+    def __init__(
+        self,
+        points: int,
+        glitch: complex,
+        reads: int,
+        index: tuple[int, ...] = (2,),
+    ):
+        super().__init__(points)
+        self.validateInput = True
+        self.glitch = glitch
+        self.reads = reads
+        self.index = index
+        self.reconnects = 0
+
+    def reconnect(self):
+        self.reconnects += 1
+
+    def readValues(self, value: str) -> list[complex]:
+        values = super().readValues(value)
+        if value == "data 0" and self.reads:
+            self.reads -= 1
+            start, stop = self.sweeps[-1]
+            if start == stop:
+                return [self.glitch] * self.points
+            for i in self.index:
+                values[i] = self.glitch
+        return values
+
+
+class TestFindGlitches(unittest.TestCase):
+    def test_find_glitches(self):
+        values = np.full(40, 0.5 + 0.1j)
+        values[3] = 20
+        values[7] = np.nan
+        values[12] = -0.5
+        values[15] = 0.6
+        np.testing.assert_array_equal(
+            np.flatnonzero(find_glitches(values)), [3, 7, 12]
+        )
+        previous = np.full(40, 0.5 + 0.1j)
+        previous[15] = -0.5
+        previous[16] = 0
+        values[16] = 2
+        np.testing.assert_array_equal(
+            np.flatnonzero(find_glitches(values, previous)),
+            [3, 7, 12, 15, 16],
+        )
+        # many points jumping is a new device under test
+        np.testing.assert_array_equal(
+            find_glitches(np.full(20, 0.5), np.full(20, -0.5)),
+            np.zeros(20, dtype=bool),
+        )
+
+
+class TestSweepWorker(unittest.TestCase):
+    def setUp(self):
+        self.saved = []
+        self.app = SimpleNamespace(
+            vna=FakeVNA(5),
+            sweep=Sweep(1000000, 15000000, 5, 3),
+            calibration=Calibration(),
+            s21table=None,
+            s21att=0.0,
+            sweep_archive=None,
+            saveData=lambda s11, s21: self.saved.append((s11, s21)),
+        )
+        self.worker = SweepWorker(self.app)
+        self.app.worker = self.worker
+
+    def test_run(self):
+        self.worker._run()
+        self.assertEqual(len(self.saved), 3)
+        self.assertEqual(len(self.app.vna.sweeps), 3)
+        s11, s21 = self.saved[-1]
+        freq = np.array(list(self.app.sweep.get_frequencies()))
+        np.testing.assert_array_equal(s11.freq, freq)
+        np.testing.assert_array_equal(s11.re, np.full(15, 0.5))
+        np.testing.assert_array_equal(s21.re, np.full(15, 0.25))
+        start = np.repeat([s[0] for s in self.app.vna.sweeps], 5)
+        np.testing.assert_allclose(s11.im, start * 1e-9)
+        # published data are snapshots of the worker data
+        self.assertEqual(len(self.saved[0][0].freq), 15)
+        self.assertEqual(self.saved[0][0].re[-1], 0.0)
+
+    def test_processing_error(self):
+        def fail(s11, s21):
+            raise ValueError("processing failed")
+
+        self.app.saveData = fail
+        self.assertRaisesRegex(
+            ValueError, "processing failed", self.worker._run
+        )
+        self.assertTrue(
+            all(t.name != "SweepProcessing" for t in threading.enumerate())
+        )
+
+    def test_quit(self):
+        self.app.sweep = Sweep(
+            1000000,
+            15000000,
+            5,
+            3,
+            Properties(mode=SweepMode.CONTINOUS),
+        )
+
+        def quit_after_first(s11, s21):
+            self.saved.append((s11, s21))
+            self.worker.quit()
+
+        self.app.saveData = quit_after_first
+        self.worker._run()
+        self.assertGreaterEqual(len(self.saved), 1)
+        self.assertLessEqual(len(self.app.vna.sweeps), 1 + 2 + 1)
+
+    def test_running_mean(self):
+        self.app.vna = CountingVNA(5)
+        self.app.sweep = Sweep(
+            1000000,
+            5000000,
+            5,
+            properties=Properties(
+                mode=SweepMode.AVERAGE,
+                averages=(4, 0),
+                average_method=AverageMethod.RUNNING_MEAN,
+            ),
+        )
+        self.worker._run()
+        # estimates after each read
+        self.assertEqual(
+            [float(s11.re[0]) for s11, _ in self.saved], [1, 1.5, 2, 2.5]
+        )
+
+    def test_exponential(self):
+        self.app.vna = CountingVNA(5)
+        self.app.sweep = Sweep(
+            1000000,
+            5000000,
+            5,
+            properties=Properties(
+                averages=(3, 0),
+                average_method=AverageMethod.EXPONENTIAL,
+            ),
+        )
+        self.worker._run()
+        self.worker._run()
+        self.worker._run()
+        # each read weighted by 2 / (3 + 1), continued across sweeps
+        self.assertEqual(
+            [float(s11.re[0]) for s11, _ in self.saved], [1, 1.5, 2.25]
+        )
+        # the estimate starts over on another frequency grid
+        self.app.vna = CountingVNA(4)
+        self.app.sweep.set_points(4)
+        self.worker._run()
+        self.assertEqual(float(self.saved[-1][0].re[0]), 1)
+
+    def test_adaptive(self):
+        self.app.sweep = Sweep(
+            1000000,
+            15000000,
+            5,
+            3,
+            properties=Properties(
+                mode=SweepMode.AVERAGE,
+                averages=(20, 0),
+                average_method=AverageMethod.ADAPTIVE,
+                noise_target=(0.01, False),
+            ),
+        )
+        self.app.vna = NoisyVNA(5, 0.0)
+        self.worker._run()
+        # quiet segments stop as soon as the variance is estimated
+        self.assertEqual(self.app.vna.reads, 3 * ADAPTIVE_MIN_READS)
+        self.assertEqual(len(self.worker.segment_noise), 3)
+        for noise in self.worker.segment_noise.values():
+            self.assertEqual(noise.reads, ADAPTIVE_MIN_READS)
+            self.assertEqual(noise.s21, 0.0)
+
+        self.app.vna = NoisyVNA(5, 0.1)
+        self.worker._run()
+        # the standard error of n reads is about 0.1 / sqrt(n)
+        self.assertEqual(
+            [n.reads for n in self.worker.segment_noise.values()], [20] * 3
+        )
+        self.assertAlmostEqual(float(self.saved[-1][1].re[0]), 0.1)
+
+        self.app.sweep.set_noise_target(1.0, True)
+        self.app.vna = NoisyVNA(5, 0.001)
+        self.worker._run()
+        noise = next(iter(self.worker.segment_noise.values()))
+        self.assertTrue(noise.in_db)
+        self.assertLessEqual(noise.s21, 1.0)
+        self.assertEqual(noise.reads, ADAPTIVE_MIN_READS)
+
+    def test_remeasure_glitch(self):
+        self.app.vna = GlitchVNA(5, 20, 1)
+        self.worker._run()
+        s11, _ = self.saved[-1]
+        np.testing.assert_array_equal(s11.re, np.full(15, 0.5))
+        freq = int(s11.freq[2])
+        start, stop = self.app.sweep.get_index_range(0)
+        # one zero span sweep of the point, then back to the segment
+        self.assertEqual(
+            self.app.vna.sweeps[:3],
+            [(start, stop), (freq, freq), (start, stop)],
+        )
+        self.assertEqual(len(self.app.vna.sweeps), 3 + 2)
+        self.assertEqual(self.app.vna.reconnects, 0)
+
+    def test_remeasure_glitches(self):
+        self.app.vna = GlitchVNA(5, 20, 1, (1, 3))
+        self.worker._run()
+        s11, _ = self.saved[-1]
+        np.testing.assert_array_equal(s11.re, np.full(15, 0.5))
+        # a single sweep of the segment for both points
+        start, stop = self.app.sweep.get_index_range(0)
+        self.assertEqual(self.app.vna.sweeps[:2], [(start, stop)] * 2)
+        self.assertEqual(len(self.app.vna.sweeps), 3 + 1)
+
+    def test_remeasure_feature(self):
+        self.app.vna = GlitchVNA(5, 1.4, 100)
+        self.worker._run()
+        s11, _ = self.saved[-1]
+        self.assertEqual(s11.re[2], 1.4)
+        self.assertEqual(s11.re[7], 1.4)
+        self.assertEqual(s11.re[3], 0.5)
+
+    def test_remeasure_failed(self):
+        self.app.vna = GlitchVNA(5, 20, 100)
+        self.assertRaises(IOError, self.worker._run)
+        self.assertEqual(self.app.vna.reconnects, 0)
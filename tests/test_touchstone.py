@@ -18,9 +18,10 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import logging
 import os
+import tempfile
 import unittest
 
-from NanoVNASaver.RFTools import Datapoint
+from NanoVNASaver.RFTools import Datapoint, SweepData
 
 # Import targets to be tested
 from NanoVNASaver.Touchstone import Options, Touchstone
@@ -162,6 +163,36 @@ class TestTouchstoneTouchstone(unittest.TestCase):
             "!freq ReS11 ImS11 ReS21 ImS21 ReS12 ImS12 ReS22 ImS22", ts.comments
         )
 
+    def test_loads_inline_comments(self):
+        ts = Touchstone("")
+        with self.assertLogs(level=logging.WARNING) as cm:
+            ts.loads(
+                "! header\n"
+                "# MHZ S DB R 50\n"
+                "1 0 0 ! first\n"
+                "\n"
+                "! between\n"
+                "3 -6.020599913 90\n"
+                "2 -20 180\n"
+            )
+        self.assertEqual(
+            cm.output,
+            [
+                "WARNING:NanoVNASaver.Touchstone:Comment after header:"
+                " ! between",
+                "WARNING:NanoVNASaver.Touchstone:Frequency not ascending:"
+                " 2 -20 180",
+                "WARNING:NanoVNASaver.Touchstone:Reordering data",
+            ],
+        )
+        self.assertEqual(ts.comments, ["! header", "! between"])
+        self.assertEqual(
+            [dp.freq for dp in ts.s11], [1000000, 2000000, 3000000]
+        )
+        self.assertAlmostEqual(ts.s11[0].z, 1 + 0j)
+        self.assertAlmostEqual(ts.s11[1].z, -0.1 + 0j)
+        self.assertAlmostEqual(ts.s11[2].z, 0.5j)
+
     def test_setter(self):
         ts = Touchstone("")
         dp_list = [Datapoint(1, 0.0, 0.0), Datapoint(3, 1.0, 1.0)]
@@ -178,7 +209,24 @@ class TestTouchstoneTouchstone(unittest.TestCase):
         ts.gen_interpolation()
         self.assertEqual(ts.s_freq("11", 2), Datapoint(2, 0.5, 0.5))
 
-    def test_save(self):
+    def test_resample(self):
+        ts = Touchstone("")
+        ts.s11 = SweepData([10, 20], [0, 1 + 1j])
+        ts.s21 = SweepData([10, 20], [1, 1])
+        s11, s21, s12, s22 = ts.resample([5, 15, 20, 30])
+        self.assertEqual(list(s11.freq), [5, 15, 20, 30])
+        self.assertEqual(list(s11.z), [0, 0.5 + 0.5j, 1 + 1j, 1 + 1j])
+        self.assertEqual(list(s21.z), [1, 1, 1, 1])
+        self.assertEqual((len(s12), len(s22)), (0, 0))
+        self.assertEqual(ts.s_freq("11", 15), Datapoint(15, 0.5, 0.5))
+
+        # changed data invalidates the interpolation
+        ts.s11[1] = Datapoint(20, 2.0, 0.0)
+        self.assertEqual(list(ts.resample([15])[0].z), [1 + 0j])
+        ts.swap()
+        self.assertEqual(len(ts.resample([15])[0]), 0)
+
+
         ts = Touchstone("./tests/data/valid.s2p")
         self.assertEqual(ts.saves(), "# HZ S RI R 50\n")
         ts.load()
@@ -210,3 +258,64 @@ class TestTouchstoneTouchstone(unittest.TestCase):
         self.assertRaisesRegex(
             LookupError, "Frequencies of sdata not correlated", ts.saves, 4
         )
+
+    def test_save_zero_columns(self):
+        ts = Touchstone("")
+        ts.WRITE_CHUNK = 2
+        ts.s11 = SweepData([1, 2, 3], [0.5, 0.25j, -1])
+        ts.s21 = SweepData([1, 2, 3], [1, 2, 3])
+        self.assertEqual(
+            ts.saves(4).splitlines(),
+            [
+                "# HZ S RI R 50",
+                "1 0.5 0.0 1.0 0.0 0.0 0.0 0.0 0.0",
+                "2 0.0 0.25 2.0 0.0 0.0 0.0 0.0 0.0",
+                "3 -1.0 0.0 3.0 0.0 0.0 0.0 0.0 0.0",
+            ],
+        )
+        ts.s21 = SweepData([1, 2], [1, 2])
+        self.assertRaisesRegex(
+            LookupError, "Frequencies of sdata not correlated", ts.saves, 4
+        )
+
+    def test_compressed(self):
+        ts = Touchstone("./tests/data/valid.s2p")
+        ts.load()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for suffix in (".gz", ".bz2", ".xz"):
+                ts.filename = os.path.join(tmpdir, f"out.s2p{suffix}")
+                ts.save(4)
+                ts_read = Touchstone(ts.filename)
+                ts_read.load()
+                self.assertEqual(ts_read.saves(4), ts.saves(4))
+
+            ts_read = Touchstone(os.path.join(tmpdir, "broken.s2p.gz"))
+            with open(ts_read.filename, "wb") as broken:
+                broken.write(b"not gzip")
+            with self.assertLogs(level=logging.ERROR):
+                ts_read.load()
+
+    def test_load_chunks(self):
+        ts = Touchstone("")
+        ts.READ_CHUNK = 2
+        with self.assertLogs(level=logging.WARNING) as cm:
+            ts.loads("# HZ S RI\n1 1 0\n3 3 0\n2 2 0\n! note\n4 4 0 ! end\n")
+        self.assertEqual(
+            cm.output,
+            [
+                "WARNING:NanoVNASaver.Touchstone:Frequency not ascending:"
+                " 2 2 0",
+                "WARNING:NanoVNASaver.Touchstone:Comment after header:"
+                " ! note",
+                "WARNING:NanoVNASaver.Touchstone:Reordering data",
+            ],
+        )
+        self.assertEqual(list(ts.s11.freq), [1, 2, 3, 4])
+        self.assertEqual(list(ts.s11.re), [1, 2, 3, 4])
+
+        ts = Touchstone("")
+        ts.READ_CHUNK = 2
+        with self.assertLogs(level=logging.ERROR) as cm:
+            ts.loads("# HZ S RI\n1 1 0\n2 2 0\n3 3 0 0 0\n")
+        self.assertRegex(cm.output[0], "Inconsistent number")
+        self.assertEqual(len(ts.s11), 0)
@@ -0,0 +1,138 @@
+#  NanoVNASaver
+#
+#  A python program to view and export Touchstone data from a NanoVNA
+#  Copyright (C) 2019, 2020  Rune B. Broberg
+#  Copyright (C) 2020,2021 NanoVNA-Saver Authors
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+
+# Import targets to be tested
+from NanoVNASaver.Touchstone import Touchstone
+from NanoVNASaver.TouchstoneBatch import find_files, load_batch
+
+
+class TestTouchstoneBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for name in ("valid.s2p", "attenuator-0643_RI.s2p", "broken_pair.s2p"):
+            shutil.copy(os.path.join("./tests/data", name), self.tmpdir.name)
+        shutil.copy("./tests/data/valid.s1p", self.tmpdir.name)
+        with open(os.path.join(self.tmpdir.name, "notes.txt"), "w") as notes:
+            notes.write("not touchstone\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_find_files(self):
+        names = [
+            os.path.basename(name) for name in find_files(self.tmpdir.name)
+        ]
+        self.assertEqual(
+            names,
+            [
+                "attenuator-0643_RI.s2p",
+                "broken_pair.s2p",
+                "valid.s1p",
+                "valid.s2p",
+            ],
+        )
+        self.assertEqual(
+            len(find_files(os.path.join(self.tmpdir.name, "valid.*"))), 2
+        )
+
+    def test_load_batch(self):
+        filenames = [
+            os.path.join(self.tmpdir.name, name)
+            for name in ("valid.s2p", "valid.s2p", "broken_pair.s2p")
+        ]
+        progress = []
+        with self.assertLogs(level=logging.WARNING):
+            result = load_batch(
+                filenames,
+                workers=2,
+                progress=lambda done, total: progress.append((done, total)),
+            )
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.failed, [(filenames[2], "No data")])
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        self.assertGreater(result.files_per_second, 0)
+
+        ts = Touchstone(filenames[0])
+        ts.load()
+        np.testing.assert_array_equal(result.freq, ts.s11.freq)
+        np.testing.assert_array_equal(result.s21[1], ts.s21.z)
+        s11, s21 = result.mean()
+        self.assertEqual(s11, ts.s11)
+        self.assertEqual(s21, ts.s21)
+
+        summary = result.summary()
+        self.assertEqual(len(summary), 2)
+        idx = int(np.argmin(ts.s11.vswr))
+        self.assertEqual(summary[0].points, 1020)
+        self.assertAlmostEqual(summary[0].min_vswr, float(ts.s11.vswr[idx]))
+        self.assertEqual(summary[0].min_vswr_freq, int(ts.s11.freq[idx]))
+
+    def test_resampled(self):
+        result = load_batch(
+            [
+                os.path.join(self.tmpdir.name, "valid.s2p"),
+                os.path.join(self.tmpdir.name, "valid.s1p"),
+            ],
+            workers=1,
+        )
+        self.assertEqual(result.s11.shape, (2, 1020))
+        # s1p files have no s21
+        np.testing.assert_array_equal(result.s21[1], np.zeros(1020))
+        ts = Touchstone(os.path.join(self.tmpdir.name, "valid.s1p"))
+        ts.load()
+        np.testing.assert_allclose(
+            result.s11[1], ts.resample(result.freq)[0].z
+        )
+        np.testing.assert_array_equal(result.has_s21, [True, False])
+        # the mean s21 is of the files with s21 only
+        self.assertEqual(result.mean()[1], result.sweep_data(0)[1])
+
+    def test_one_port(self):
+        filename = os.path.join(self.tmpdir.name, "valid.s1p")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = load_batch([filename], workers=1)
+            summary = result.summary()
+        self.assertTrue(np.isnan(summary[0].min_gain))
+        self.assertTrue(np.isnan(summary[0].max_gain))
+        self.assertFalse(np.isnan(summary[0].min_vswr))
+        self.assertTrue(np.isnan(result.gain_statistics()["mean"]).all())
+
+    def test_malformed(self):
+        bad = os.path.join(self.tmpdir.name, "bad.s2p")
+        with open(bad, "w", encoding="utf-8") as file:
+            file.write("# HZ S RI R 50\n1 abc 0 0 0 0 0 0 0\n")
+        filenames = [
+            os.path.join(self.tmpdir.name, "valid.s2p"),
+            bad,
+            os.path.join(self.tmpdir.name, "valid.s2p"),
+        ]
+        with self.assertLogs(level=logging.WARNING):
+            result = load_batch(filenames, workers=2)
+        self.assertEqual(result.filenames, [filenames[0], filenames[2]])
+        self.assertEqual([name for name, _ in result.failed], [bad])
+        self.assertTrue(result.failed[0][1])
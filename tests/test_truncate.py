@@ -18,8 +18,17 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import unittest
 
+import numpy as np
+
 # Import targets to be tested
-from NanoVNASaver.SweepWorker import truncate
+from NanoVNASaver.Settings.Sweep import AverageMethod
+from NanoVNASaver.SweepWorker import (
+    average_array,
+    median_array,
+    sigma_clipped_array,
+    standard_error,
+    truncate,
+)
 
 DATA = [
     [
@@ -63,7 +72,70 @@ DATA_TRUNCATED = [
 ]
 
 
+def truncate_reference(
+    values: list[list[complex]], count: int
+) -> list[list[complex]]:
+    """the former list based truncate"""
+    keep = len(values) - count
+    truncated = []
+    for valueset in np.swapaxes(values, 0, 1).tolist():
+        avg = complex(np.average(valueset))
+        truncated.append(sorted(valueset, key=lambda v: abs(avg - v))[:keep])
+    return np.swapaxes(truncated, 0, 1).tolist()
+
+
 class TestSweepWorkerTruncate(unittest.TestCase):
     def test_truncate(self):
         x = truncate(DATA, 1)
         self.assertEqual(x, DATA_TRUNCATED)
+
+    def test_truncate_identical(self):
+        rng = np.random.default_rng(1)
+        for samples, count in ((16, 4), (25, 6), (9, 8)):
+            values = (
+                rng.normal(size=(samples, 301))
+                + 1j * rng.normal(size=(samples, 301))
+            ).tolist()
+            expected = truncate_reference(values, count)
+            self.assertEqual(truncate(values, count), expected)
+            self.assertEqual(
+                average_array(
+                    np.array(values), AverageMethod.TRUNCATED_MEAN, count
+                ).tolist(),
+                np.average(expected, axis=0).tolist(),
+            )
+        self.assertEqual(truncate(DATA, 4), DATA)
+
+    def test_median(self):
+        values = np.array([[1 + 5j, 0], [2 + 1j, 0], [9 + 2j, 3j]])
+        np.testing.assert_array_equal(median_array(values), [2 + 2j, 0])
+        np.testing.assert_array_equal(
+            average_array(values, AverageMethod.MEDIAN, 2), [2 + 2j, 0]
+        )
+
+    def test_sigma_clipped(self):
+        values = np.full((10, 2), 1 + 1j)
+        values[:, 1] += np.linspace(-0.01, 0.01, 10)
+        values[3, 0] = 10
+        values[7, 1] = -10j
+        result = sigma_clipped_array(values)
+        self.assertAlmostEqual(result[0], 1 + 1j)
+        expected = np.delete(values[:, 1], 7).mean()
+        self.assertAlmostEqual(result[1], expected)
+        np.testing.assert_array_equal(
+            sigma_clipped_array(np.full((5, 3), 2j)), np.full(3, 2j)
+        )
+
+    def test_standard_error(self):
+        values = np.array([[1 + 1j, 0.1], [1 - 1j, 0.3], [1 + 0j, 0.2]])
+        mean = values.mean(axis=0)
+        sum_sq = (np.abs(values - mean) ** 2).sum(axis=0)
+        np.testing.assert_allclose(
+            standard_error(mean, sum_sq, 3),
+            np.sqrt(sum_sq / 2 / 3),
+        )
+        np.testing.assert_allclose(
+            standard_error(mean, sum_sq, 3, True),
+            20 / np.log(10) * np.sqrt(sum_sq / 6) / np.abs(mean),
+        )
+        self.assertTrue(np.isinf(standard_error(mean, sum_sq, 1)).all())